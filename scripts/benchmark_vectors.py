@@ -0,0 +1,207 @@
+"""
+Micro-benchmarks of core.vector against euclid.
+
+Times the vector math done by NPC.move, then the real function on a
+loaded map.  For the real function, the game is started without a window
+and the vectors of core.map and core.entity are switched between the two
+modules.
+
+WorldState.get_exits adds tuple offsets to tile positions, instead of
+vectors.  It is timed on the tiles of the map which define their exits,
+the only ones where offsets are added, against adding vectors as it did
+before.
+
+Call this script from the root folder:
+
+    python scripts/benchmark_vectors.py [map_name]
+"""
+from __future__ import division
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+from tuxemon.core import euclid, vector  # noqa: E402
+
+modules = ("euclid", euclid), ("vector", vector)
+
+
+def report(name, results):
+    base = results[0][1]
+    line = "{:<28}".format(name)
+    for module_name, seconds in results:
+        line += "{:>10}: {:8.2f}us".format(module_name, seconds * 1e6)
+    line += "  x{:.2f}".format(base / results[-1][1])
+    print(line)
+
+
+def best(function, number):
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def compare(setups, function, number, rounds=15):
+    """ Time a function after each setup, taking turns, so changes in load affect all alike
+
+    :param setups: list of (name, function called before timing)
+    :returns: list of (name, best time of one call)
+    """
+    times = {name: list() for name, setup in setups}
+    for _ in range(rounds):
+        for name, setup in setups:
+            setup()
+            times[name].append(timeit.timeit(function, number=number) / number)
+    return [(name, min(times[name])) for name, setup in setups]
+
+
+def get_kernels(module):
+    """ Return the vector math of NPC.move and get_exits, without the game """
+    Point2, Point3, Vector2, Vector3 = module.Point2, module.Point3, module.Vector2, module.Vector3
+    dirs2 = {"up": Vector2(0, -1), "down": Vector2(0, 1), "left": Vector2(-1, 0), "right": Vector2(1, 0)}
+    dirs3 = {"down": Vector3(0, 1, 0)}
+    position3 = Point3(1, 2, 0)
+    velocity3 = Vector3(0, 3.75, 0)
+    tile_pos = Point2(4, 5)
+
+    return [
+        ("move: set velocity", lambda: 3.75 * dirs3["down"]),
+        ("move: update position", lambda: position3.__iadd__(velocity3 * (1 / 60))),
+        ("move: project", lambda: Point2(position3.x, position3.y)),
+        ("move: next tile", lambda: tuple(int(i) for i in tile_pos + dirs2["down"])),
+        ("move: is moving", lambda: not velocity3 == (0, 0, 0)),
+    ]
+
+
+def kernels():
+    """ Time the vector math of NPC.move, and the offsets of get_exits """
+    from tuxemon.core.map import tile_offsets
+
+    all_kernels = [get_kernels(module) for module_name, module in modules]
+    for i, (name, _) in enumerate(all_kernels[0]):
+        report(name, [(module_name, best(kernels[i][1], 20000))
+                      for (module_name, _), kernels in zip(modules, all_kernels)])
+
+    results = list()
+    for module_name, module in modules:
+        dirs2 = {key: module.Vector2(*value) for key, value in tile_offsets.items()}
+        results.append((module_name, best(lambda: [tuple(dirs2[i] + (4, 5)) for i in dirs2], 20000)))
+    x, y = 4, 5
+    results.append(("tuple", best(lambda: [(x + dx, y + dy) for dx, dy in tile_offsets.values()], 20000)))
+    report("get_exits: neighbors", results)
+
+
+def vector_tile_exits(module):
+    """ Return get_explicit_tile_exits as it was, adding vectors to positions """
+    from tuxemon.core import collision
+    from tuxemon.core.map import tile_offsets
+
+    dirs2 = {key: module.Vector2(*value) for key, value in tile_offsets.items()}
+
+    def get_explicit_tile_exits(position, tile, skip_nodes):
+        continues = collision.get_directions(tile, collision.CONTINUE)
+        if continues:
+            return [tuple(dirs2[continues[0]] + position)]
+        exits = (tuple(dirs2[i] + position) for i in collision.get_directions(tile, collision.EXIT))
+        return [i for i in exits if i not in skip_nodes]
+
+    return get_explicit_tile_exits
+
+
+def use_vectors(module):
+    """ Switch the vectors used by the game to another module """
+    from tuxemon.core import entity, map as map_module
+
+    for name in ("dirs2", "dirs3", "short_dirs"):
+        dirs = getattr(map_module, name)
+        for key, value in dirs.items():
+            cls = module.Vector3 if len(value) == 3 else module.Vector2
+            dirs[key] = cls(*value)
+    map_module.Point2 = module.Point2
+    entity.Point2, entity.Point3, entity.Vector3 = module.Point2, module.Point3, module.Vector3
+
+
+def use_entity_vectors(module, npc):
+    npc.tile_pos = module.Point2(*npc.tile_pos)
+    npc._position3 = module.Point3(*npc.position3)
+    npc._velocity3 = module.Vector3(*npc.velocity3)
+
+
+def game(map_name):
+    """ NPC.move and get_exits on a loaded map """
+    from tuxemon.core import collision, prepare
+    prepare.init()
+    prepare.CONFIG.batch_physics = False
+
+    from tuxemon.core.control import Control
+    from tuxemon.core.player import Player
+
+    control = Control(prepare.ORIGINAL_CAPTION)
+    control.auto_state_discovery()
+    setattr(prepare, "GLOBAL_CONTROL", control)
+    control.add_player(Player(prepare.CONFIG.player_npc))
+    control.push_state("BackgroundState")
+    world = control.push_state("WorldState")
+    control.event_engine.execute_action("teleport", [map_name, "5", "5"])
+    control.update(1 / 60)
+
+    npc = world.player1
+    width, height = world.map_size
+    tiles = [(x, y) for y in range(height) for x in range(width)]
+    collision_map = world.get_collision_map()
+
+    # two tiles far apart, so the walk has many steps
+    start = tuple(int(i) for i in npc.tile_pos)
+    field = world.flow_fields.get(start)
+    for distance, dest in sorted(((field.distance(i) or 0, i) for i in tiles), reverse=True):
+        if world.pathfinder.search(start, dest, collision_map):
+            break
+
+    def walk():
+        frames = 0
+        for goal in (dest, start):
+            npc.pathfind(goal)
+            while npc.path or npc.moving:
+                npc.move(1 / 60)
+                frames += 1
+        return frames
+
+    frames = walk()
+    print("map {}, walk of {} frames between {} and {}".format(map_name, frames, start, dest))
+
+    def switch(module):
+        def setup():
+            use_vectors(module)
+            use_entity_vectors(module, npc)
+        return setup
+
+    results = compare([(name, switch(module)) for name, module in modules], walk, 1, rounds=40)
+    report("NPC.move", [(name, seconds / frames) for name, seconds in results])
+
+    exit_tiles = [i for i in tiles if world.collision_map.get_flags(i) & collision.PROPERTIES]
+    if not exit_tiles:
+        print("no tiles of {} define their exits".format(map_name))
+        return
+
+    def get_exits():
+        return [world.get_exits(i, collision_map) for i in exit_tiles]
+
+    def replace(module):
+        def setup():
+            world.get_explicit_tile_exits = vector_tile_exits(module)
+        return setup
+
+    def restore():
+        world.__dict__.pop("get_explicit_tile_exits", None)
+
+    setups = [(name, replace(module)) for name, module in modules] + [("tuple", restore)]
+    results = compare(setups, get_exits, 200)
+    report("WorldState.get_exits", [(name, seconds / len(exit_tiles)) for name, seconds in results])
+
+
+if __name__ == "__main__":
+    kernels()
+    game(sys.argv[1] if len(sys.argv) > 1 else "taba_town.tmx")
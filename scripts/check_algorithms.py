@@ -0,0 +1,675 @@
+"""
+Check the algorithms of the world against simple versions of them.
+
+Maps are small grids drawn as text, and tile exits are found by the
+functions of WorldState, so the checks follow the same rules as the
+game, without loading maps.  Only the level of detail checks start the
+display, with the dummy video driver, to walk real npcs.
+
+* pathfinding: A* paths are valid walks, as short as the paths of a
+  breadth-first search, and cached until collisions change
+* flow fields: distances are the distances of a breadth-first search,
+  and following `next_step` reaches the destination in that many moves
+* routes: routes planned over a teleport graph are as short as the best
+  of all routes through the teleports, and follow real paths on the
+  current map
+* entity store: entities moved by the store are where entities moving
+  themselves with `Entity.update_physics` are, with the same tile
+  positions
+* vectors: operations of core.vector give the same types and values as
+  the euclid vectors they replace
+* level of detail: entities out of view are moved less often, by all the
+  time since they were last moved, and npcs walking a path out of view
+  are where npcs walking it in view are, when they are moved
+
+Call this script from the root folder:
+
+    python scripts/check_algorithms.py
+
+It exits with status 1 if a check fails.
+"""
+from __future__ import division
+from __future__ import print_function
+
+import os
+import random
+import sys
+from collections import deque, namedtuple
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+from tuxemon.core import euclid, prepare, vector  # noqa: E402
+from tuxemon.core.collision import COLLISION, CollisionGrid, Occupancy  # noqa: E402
+from tuxemon.core.db import db  # noqa: E402
+from tuxemon.core.entity import Entity  # noqa: E402
+from tuxemon.core.entitystore import EntityStore  # noqa: E402
+from tuxemon.core.event import MapAction, MapCondition, EventObject  # noqa: E402
+from tuxemon.core.pathfinding import FlowFields, Pathfinder, manhattan  # noqa: E402
+from tuxemon.core.routes import Leg, RoutePlanner, Teleport, TeleportGraph, find_teleports  # noqa: E402
+from tuxemon.core.states.world.worldstate import WorldState  # noqa: E402
+from tuxemon.core.vector import Point3, Vector3  # noqa: E402
+
+# "#" is a blocked tile, "v" a tile which can only be left downwards,
+# and "n" a tile with an npc
+MAZE = [
+    "..........",
+    ".####.###.",
+    ".#......#.",
+    ".#.####.#.",
+    ".#.#..#.#.",
+    "...#..#...",
+    "####.##.##",
+    "......v...",
+    ".###.#..#.",
+    "....n.....",
+]
+
+# a room which cannot be entered
+CLOSED = [
+    ".....",
+    ".###.",
+    ".#.#.",
+    ".###.",
+    ".....",
+]
+
+# the current map of a GridWorld, for the route planner
+loaded_map = namedtuple("loaded_map", "filename")
+
+# the game of a LodWorld, which is not networked
+offline_game = namedtuple("offline_game", "isclient ishost")
+
+# operations on vectors a and b, points p and q, a tuple t and a number s
+VECTOR_OPERATIONS = [
+    "a + b", "a + p", "p + a", "p + q", "a + t", "t + a", "p + t",
+    "a - b", "p - a", "p - q", "a - t",
+    "a * s", "s * a", "p * s", "a / s", "a // s", "-a", "abs(a)",
+    "a.magnitude()", "a.magnitude_squared()", "a.normalized()", "a.dot(b)",
+    "a == t", "a == b", "a == a.copy()", "a != t", "a.__nonzero__()", "(a * 0).__nonzero__()",
+    "tuple(a)", "len(a)", "a[1]", "a.copy()",
+]
+VECTOR_STATEMENTS = ["a += b", "a += t", "a -= b", "a -= t", "a *= s", "a /= s", "a.normalize()"]
+
+# euclid's 3D vectors make a Vector3 here, unlike its 2D vectors, which
+# make a point; core.vector makes a point in both
+EUCLID_3D_POINTS = "p + t", "p - a"
+
+failures = list()
+
+
+def check(condition, message):
+    print("{} {}".format("ok  " if condition else "FAIL", message))
+    if not condition:
+        failures.append(message)
+
+
+class GridWorld(object):
+    """ The parts of WorldState used by the algorithms, on a map drawn as text """
+    get_exits = WorldState.__dict__["get_exits"]
+    get_explicit_tile_exits = WorldState.__dict__["get_explicit_tile_exits"]
+
+    def __init__(self, rows):
+        width, height = len(rows[0]), len(rows)
+        collisions = dict()
+        self.occupancy = Occupancy()
+        for y, row in enumerate(rows):
+            for x, char in enumerate(row):
+                if char == "#":
+                    collisions[(x, y)] = None
+                elif char == "v":
+                    collisions[(x, y)] = {"enter": ["up", "down", "left", "right"], "exit": ["down"]}
+                elif char == "n":
+                    self.add_npc((x, y))
+
+        self.collision_map = CollisionGrid.from_maps((width, height), collisions, set())
+        self.invalid_x = (-1, width)
+        self.invalid_y = (-1, height)
+        self.tiles = [(x, y) for y in range(height) for x in range(width)]
+        self.pathfinder = Pathfinder(self)
+        self.current_map = None
+
+    def add_npc(self, position):
+        self.occupancy.place(object(), [position])
+
+    def get_collision_map(self):
+        return self.occupancy
+
+
+def random_rows(rng, size, walls=0.25):
+    """ Return a random map drawn as text, with walls, one-way tiles and npcs """
+    rows = list()
+    for _ in range(size):
+        row = ""
+        for _ in range(size):
+            roll = rng.random()
+            row += "#" if roll < walls else "v" if roll < walls + 0.04 else "n" if roll < walls + 0.07 else "."
+        rows.append(row)
+    return rows
+
+
+def bfs_distance(world, start, dest, entities):
+    """ Return the number of moves between two tiles, found by breadth-first search, or None """
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        tile = queue.popleft()
+        if tile == dest:
+            return distances[tile]
+        for neighbor in world.get_exits(tile, entities, ()):
+            if neighbor not in distances:
+                distances[neighbor] = distances[tile] + 1
+                queue.append(neighbor)
+    return None
+
+
+def is_walk(world, start, path, entities):
+    """ Return True if a path, from the destination back to the first step, can be walked from a tile """
+    tile = start
+    for step in reversed(path):
+        if step not in world.get_exits(tile, entities, ()):
+            return False
+        tile = step
+    return True
+
+
+def check_pathfinding():
+    rng = random.Random(19)
+    worlds = [GridWorld(MAZE)] + [GridWorld(random_rows(rng, 12)) for _ in range(4)]
+    searches = wrong = 0
+    for world in worlds:
+        open_tiles = [t for t in world.tiles if not world.collision_map.get_flags(t) & COLLISION]
+        for _ in range(100):
+            start, dest = rng.choice(open_tiles), rng.choice(open_tiles)
+            path = world.pathfinder.search(start, dest, world.occupancy)
+            expected = bfs_distance(world, start, dest, world.occupancy)
+            searches += 1
+            if expected is None:
+                wrong += path is not None
+            elif path is None or len(path) != expected or (path and path[0] != dest):
+                wrong += 1
+            elif not is_walk(world, start, path, world.occupancy):
+                wrong += 1
+    check(wrong == 0, "a* paths are walkable and shortest: {} wrong of {}".format(wrong, searches))
+
+    world = GridWorld(MAZE)
+    search = world.pathfinder.search
+    check(search((3, 3), (3, 3), world.occupancy) == [], "the path to the start tile is empty")
+    check(search((6, 7), (7, 7), world.occupancy) == [(7, 7), (7, 8), (6, 8)],
+          "one-way tiles are only left one way")
+    check(search((0, 9), (9, 9), world.occupancy) is not None
+          and (4, 9) not in search((0, 9), (9, 9), world.occupancy), "paths go around npcs")
+    closed = GridWorld(CLOSED)
+    check(closed.pathfinder.search((0, 0), (2, 2), closed.occupancy) is None,
+          "there is no path into a closed room")
+
+    # cache
+    pathfinder = world.pathfinder
+    first = pathfinder.find((0, 0), (9, 9))
+    second = pathfinder.find((0, 0), (9, 9))
+    check(first == second and (pathfinder.misses, pathfinder.hits) == (1, 1), "paths are cached")
+    second.pop()
+    check(pathfinder.find((0, 0), (9, 9)) == first, "changing a returned path does not change the cache")
+
+    blocked = first[len(first) // 2]
+    world.collision_map.add_flags(blocked, COLLISION)
+    misses = pathfinder.misses
+    path = pathfinder.find((0, 0), (9, 9))
+    check(pathfinder.misses == misses + 1 and blocked not in path,
+          "the cache is cleared when the collision grid changes")
+    check(len(path) == bfs_distance(world, (0, 0), (9, 9), world.occupancy),
+          "the new path is the shortest")
+
+    world = GridWorld(MAZE)
+    pathfinder = world.pathfinder
+    pathfinder.find((0, 0), (9, 0))
+    world.add_npc((5, 0))
+    misses = pathfinder.misses
+    path = pathfinder.find((0, 0), (9, 0))
+    check(pathfinder.misses == misses + 1 and (5, 0) not in path,
+          "the cache is cleared when an npc moves")
+
+    pathfinder = Pathfinder(GridWorld(MAZE), cache_size=2)
+    for dest in (5, 0), (9, 0), (0, 5):
+        pathfinder.find((0, 0), dest)
+    check(len(pathfinder.cache) == 2 and ((0, 0), (5, 0)) not in pathfinder.cache,
+          "the least recently used paths are dropped")
+
+
+def check_flow_fields():
+    rng = random.Random(20)
+    worlds = [GridWorld(MAZE)] + [GridWorld(random_rows(rng, 12)) for _ in range(4)]
+    tiles = wrong_distances = wrong_steps = 0
+    for world in worlds:
+        fields = FlowFields(world)
+        open_tiles = [t for t in world.tiles if not world.collision_map.get_flags(t) & COLLISION]
+        for dest in rng.sample(open_tiles, 4):
+            field = fields.get(dest)
+            for tile in open_tiles:
+                tiles += 1
+                # fields ignore npcs
+                expected = bfs_distance(world, tile, dest, {})
+                if field.distance(tile) != expected:
+                    wrong_distances += 1
+                    continue
+                if expected is None:
+                    wrong_steps += field.next_step(tile) is not None
+                    continue
+
+                # step downhill until there is no next step
+                position, moves = tile, 0
+                while moves <= expected:
+                    step = fields.next_step(position, dest)
+                    if step is None:
+                        break
+                    if step not in world.get_exits(position, {}, ()):
+                        moves = None
+                        break
+                    position, moves = step, moves + 1
+                wrong_steps += position != dest or moves != expected
+    check(wrong_distances == 0, "flow field distances are shortest: {} wrong of {}".format(wrong_distances, tiles))
+    check(wrong_steps == 0, "next steps reach the destination: {} wrong of {}".format(wrong_steps, tiles))
+
+    world = GridWorld(MAZE)
+    fields = FlowFields(world)
+    check(fields.get((9, 0)) is fields.get((9, 0)), "npcs going to the same tile share a field")
+    check(fields.next_step((9, 0), (9, 0)) is None, "there is no step at the destination")
+    check(fields.next_step((7, 0), (9, 0)) == (8, 0), "the next step is downhill")
+    check(fields.next_step((7, 0), (9, 0), occupied={(8, 0)}) is None, "npcs wait when their step is occupied")
+    check(fields.next_step((6, 7), (7, 7)) == (6, 8), "one-way tiles are only left one way")
+
+    field = FlowFields(world).get((9, 0))
+    field.distance((8, 0))
+    check(len(field.distances) < len(world.tiles) // 2,
+          "fields are only expanded as far as needed: {} tiles".format(len(field.distances)))
+
+    closed = GridWorld(CLOSED)
+    check(FlowFields(closed).next_step((0, 0), (2, 2)) is None, "there is no step into a closed room")
+
+    before = fields.get((9, 0))
+    world.collision_map.add_flags((8, 0), COLLISION)
+    after = fields.get((9, 0))
+    check(after is not before and after.distance((7, 0)) == bfs_distance(world, (7, 0), (9, 0), {}),
+          "fields are found again when the collision grid changes")
+
+
+def random_graph(rng, maps, teleports):
+    """ Return a teleport graph of maps named "0.tmx", "1.tmx"..., with teleports between random tiles """
+    names = ["{}.tmx".format(i) for i in range(maps)]
+    graph = {name: (0, list()) for name in names}
+    for _ in range(teleports):
+        source, dest = rng.choice(names), rng.choice(names)
+        tile = rng.randrange(10), rng.randrange(10)
+        position = rng.randrange(10), rng.randrange(10)
+        graph[source][1].append(Teleport(source, tile, dest, position))
+    return TeleportGraph(graph)
+
+
+def route_cost(start_map, start, dest_map, dest, legs):
+    """ Return the number of moves of a route, or None if it does not go from start to dest """
+    map_name, position, cost = start_map, start, 0
+    for leg in legs:
+        if leg.map != map_name:
+            return None
+        cost += manhattan(position, leg.position)
+        if leg.teleport is None:
+            if leg is not legs[-1]:
+                return None
+            position = leg.position
+        else:
+            if leg.position != leg.teleport.tile:
+                return None
+            map_name, position = leg.teleport.dest, leg.teleport.position
+            cost += 1
+    if (map_name, position) != (dest_map, dest):
+        return None
+    return cost
+
+
+def best_route_cost(graph, start_map, start, dest_map, dest, used=frozenset()):
+    """ Return the number of moves of the shortest route, trying every order of teleports """
+    best = manhattan(start, dest) if start_map == dest_map else None
+    for teleport in graph.get_teleports(start_map):
+        if teleport in used:
+            continue
+        rest = best_route_cost(graph, teleport.dest, teleport.position, dest_map, dest, used | {teleport})
+        if rest is not None:
+            cost = manhattan(start, teleport.tile) + 1 + rest
+            if best is None or cost < best:
+                best = cost
+    return best
+
+
+def check_routes():
+    rng = random.Random(21)
+    world = GridWorld(CLOSED)
+    routes = wrong = 0
+    for _ in range(500):
+        graph = random_graph(rng, 4, 10)
+        planner = RoutePlanner(world, graph)
+        start_map, dest_map = rng.choice(sorted(graph.maps)), rng.choice(sorted(graph.maps))
+        start = rng.randrange(10), rng.randrange(10)
+        dest = rng.randrange(10), rng.randrange(10)
+        legs = planner.plan(start_map, start, dest_map, dest)
+        expected = best_route_cost(graph, start_map, start, dest_map, dest)
+        routes += 1
+        if expected is None:
+            wrong += legs is not None
+        else:
+            wrong += legs is None or route_cost(start_map, start, dest_map, dest, legs) != expected
+    check(wrong == 0, "routes are the shortest: {} wrong of {}".format(wrong, routes))
+
+    a_to_b = Teleport("a.tmx", (9, 0), "b.tmx", (0, 0))
+    b_to_a = Teleport("b.tmx", (0, 1), "a.tmx", (9, 1))
+    b_to_c = Teleport("b.tmx", (5, 0), "c.tmx", (1, 1))
+    graph = TeleportGraph({
+        "a.tmx": (0, [a_to_b]),
+        "b.tmx": (0, [b_to_a, b_to_c]),
+        "c.tmx": (0, []),
+        "d.tmx": (0, []),
+    })
+    planner = RoutePlanner(world, graph)
+    check(planner.plan("a.tmx", (0, 0), "a.tmx", (3, 4)) == [Leg("a.tmx", (3, 4), None)],
+          "a route on one map is one walk")
+    check(planner.plan("a.tmx", (0, 0.5), "c.tmx", (2, 2)) == [
+        Leg("a.tmx", (9, 0), a_to_b), Leg("b.tmx", (5, 0), b_to_c), Leg("c.tmx", (2, 2), None)],
+        "a route walks to each teleport, then to the destination")
+    check(planner.plan("c.tmx", (0, 0), "a.tmx", (0, 0)) is None, "there is no route without teleports")
+    check(planner.plan("a.tmx", (0, 0), "d.tmx", (0, 0)) is None, "there is no route to an unconnected map")
+
+    # on the current map, walls make the closer teleport farther
+    world = GridWorld(MAZE)
+    world.current_map = loaded_map("maps/maze.tmx")
+    near = Teleport("maze.tmx", (2, 2), "e.tmx", (0, 0))
+    far = Teleport("maze.tmx", (9, 0), "e.tmx", (0, 0))
+    graph = TeleportGraph({"maze.tmx": (0, [near, far]), "e.tmx": (0, [])})
+    legs = RoutePlanner(world, graph).plan("maze.tmx", (0, 0), "e.tmx", (0, 0))
+    walk = len(world.pathfinder.search((0, 0), near.tile, world.occupancy))
+    check(walk > 9 and legs is not None and legs[0].teleport == far,
+          "routes on the current map follow paths, not straight lines: {} moves to the near teleport".format(walk))
+
+    # teleports are read from events started by walking onto their area
+    def event(operator, action, parameters):
+        condition = MapCondition("player_at", [], 3, 4, 1, 1, operator, None)
+        return EventObject(1, "door", 3, 4, 1, 1, [condition], [MapAction(action, parameters, None)])
+
+    teleports = find_teleports("a.tmx", [
+        event("is", "teleport", ["b.tmx", "5", "6"]),
+        event("is_not", "teleport", ["b.tmx", "5", "6"]),
+        event("is", "transition_teleport", ["c.tmx", "1", "2", "0.3"]),
+        event("is", "teleport", ["b.tmx", "x", "6"]),
+        event("is", "play_sound", ["door"]),
+    ])
+    check(teleports == [Teleport("a.tmx", (3, 4), "b.tmx", (5, 6)), Teleport("a.tmx", (3, 4), "c.tmx", (1, 2))],
+          "teleports are found in the events of a map")
+
+
+def random_entity(rng):
+    entity = Entity()
+    entity.set_position((rng.uniform(0, 20), rng.uniform(0, 20)))
+    entity.velocity3 = Vector3(rng.choice((-1, 0, 1)) * 3.75, rng.choice((-1, 0, 1)) * 7.5, 0)
+    return entity
+
+
+def copy_entity(entity):
+    copy = Entity()
+    copy.position3 = tuple(entity.position3)
+    copy.velocity3 = tuple(entity.velocity3)
+    copy.pos_update()
+    return copy
+
+
+def same_places(pairs):
+    """ Return the number of entities which are not where their copy is """
+    return sum(1 for a, b in pairs
+               if max(abs(i - j) for i, j in zip(a.position3, b.position3)) > 1e-9
+               or tuple(a.tile_pos) != tuple(b.tile_pos))
+
+
+def move_entity(entity, td):
+    entity.update_physics(td)
+    # entities change their velocity when they start and stop moving
+    if entity.velocity3.x and entity.tile_pos[0] > 30:
+        entity.velocity3.x = 0
+
+
+def check_entity_store():
+    if not EntityStore.available:
+        print("skip entity store: numpy is not installed")
+        return
+
+    rng = random.Random(23)
+    store = EntityStore()
+    pairs = list()
+    for _ in range(40):
+        entity = random_entity(rng)
+        pairs.append((entity, copy_entity(entity)))
+        store.add(entity)
+    check(len(store.positions) >= 40 and same_places(pairs) == 0, "entities keep their places when the store grows")
+
+    wrong = 0
+    for frame in range(240):
+        td = rng.uniform(0.5, 2) / 60
+        store.step(td)
+        for entity, copy in pairs:
+            move_entity(entity, td)
+            move_entity(copy, td)
+        if frame == 120:
+            for entity, copy in pairs[::3]:
+                entity.velocity3 = copy.velocity3 = Vector3(0, -3.75, 0)
+        wrong += same_places(pairs)
+    check(wrong == 0, "stepping the store moves entities like update_physics: {} wrong".format(wrong))
+
+    wrong = 0
+    for _ in range(60):
+        moves = [(entity, rng.uniform(0, 4) / 60) for entity, copy in pairs if rng.random() < 0.5]
+        store.step_entities(moves)
+        times = dict(moves)
+        for entity, copy in pairs:
+            if entity in times:
+                entity.update_physics(times[entity])
+                copy.update_physics(times[entity])
+        wrong += same_places(pairs)
+    check(wrong == 0, "stepping some entities, each by its own time, moves only them: {} wrong".format(wrong))
+
+    entity, copy = pairs[0]
+    view = entity.position3
+    entity.position3 = Point3(3, 4, 0)
+    check(entity.position3 is view and tuple(store.positions[view.index]) == (3, 4, 0),
+          "assigning a position changes the row of the store")
+
+    index = view.index
+    entity.set_position((5, 6))
+    store.remove(entity)
+    check(entity not in store and isinstance(entity.position3, Point3) and tuple(entity.position3) == (5, 6, 0),
+          "removed entities get their own vectors, with the same values")
+    other = random_entity(rng)
+    place = tuple(other.position3)
+    store.add(other)
+    check(other.position3.index == index and tuple(other.position3) == place,
+          "the rows of removed entities are reused")
+
+    store.step(1 / 60)
+    check(tuple(entity.position3) == (5, 6, 0), "removed entities are not moved by the store")
+
+
+def get_vectors(module, size, values):
+    """ Return the names used by the vector operations, made with a module """
+    vector_class = getattr(module, "Vector{}".format(size))
+    point_class = getattr(module, "Point{}".format(size))
+    a, b, p, q, t = (values[i:i + size] for i in range(0, 5 * size, size))
+    return {"a": vector_class(*a), "b": vector_class(*b), "p": point_class(*p), "q": point_class(*q),
+            "t": tuple(t), "s": values[-1]}
+
+
+def same_result(a, b):
+    if isinstance(a, (float, int)) and isinstance(b, (float, int)):
+        return abs(a - b) <= 1e-9 * max(1, abs(a))
+    if hasattr(a, "x") or isinstance(a, tuple):
+        return (type(a).__name__ == type(b).__name__ and len(a) == len(b)
+                and all(same_result(i, j) for i, j in zip(a, b)))
+    return a == b
+
+
+def check_vectors():
+    rng = random.Random(24)
+    operations = [(size, i) for size in (2, 3) for i in VECTOR_OPERATIONS]
+    operations.append((3, "a.cross(b)"))
+    wrong = set()
+    statements = moved = 0
+    for _ in range(50):
+        values = [rng.choice((-1, 1)) * rng.uniform(0.5, 20) for _ in range(16)]
+        for size, expression in operations:
+            expected, result = [eval(expression, get_vectors(module, size, values)) for module in (euclid, vector)]
+            if size == 3 and expression in EUCLID_3D_POINTS:
+                same = type(result) is vector.Point3 and same_result(tuple(expected), tuple(result))
+            else:
+                same = same_result(expected, result)
+            if not same:
+                wrong.add(expression)
+        for size in 2, 3:
+            for statement in VECTOR_STATEMENTS:
+                names = [get_vectors(module, size, values) for module in (euclid, vector)]
+                before = names[1]["a"]
+                for i in names:
+                    exec(statement, i)
+                statements += 1
+                moved += names[1]["a"] is not before
+                if not same_result(names[0]["a"], names[1]["a"]):
+                    wrong.add(statement)
+    check(not wrong, "vector operations are the same as euclid's: {}".format(sorted(wrong) or "all"))
+    check(moved == 0, "in-place operations change the vector: {} of {} made a new one".format(moved, statements))
+
+    a = vector.Vector2(1, 2)
+    try:
+        hash(a)
+    except TypeError:
+        hashable = False
+    else:
+        hashable = True
+    check(not hashable and {tuple(a): 1}[(1, 2)] == 1, "vectors are not hashable, but their tuples are")
+
+
+class LodWorld(GridWorld):
+    """ A GridWorld which moves npcs like WorldState, with a fixed level of detail """
+    get_moves = WorldState.__dict__["get_moves"]
+    move_npcs = WorldState.__dict__["move_npcs"]
+    pathfind = WorldState.__dict__["pathfind"]
+
+    def __init__(self, rows, rate):
+        super(LodWorld, self).__init__(rows)
+        self.rate = rate
+        self.lod_frame = 0
+        self.npcs = dict()
+        self.npcs_off_map = dict()
+        self.player1 = None
+        self.game = offline_game(False, False)
+        self.entity_store = EntityStore() if EntityStore.available else None
+
+    def get_lod(self):
+        # no tiles are in view
+        return self.rate, None
+
+    def get_all_entities(self):
+        return self.npcs.values()
+
+
+def walk_out_of_view(rate, start, dest, frames):
+    """ Walk an npc on a path, moved by a world with a level of detail
+
+    :returns: position of the npc after each frame where it was moved, and the frame it arrived
+    """
+    from tuxemon.core.npc import NPC
+
+    world = LodWorld(MAZE, rate)
+    npc = NPC("37707_male")
+    npc.world = world
+    world.npcs[npc.slug] = npc
+    if world.entity_store is not None:
+        world.entity_store.add(npc)
+    npc.set_position(start)
+    npc.path = world.pathfind(start, dest)
+    npc.next_waypoint()
+
+    positions = dict()
+    arrived = None
+    for frame in range(frames):
+        # moves do not end on tiles, so waypoints are overshot
+        world.move_npcs(1 / 50)
+        if npc.lod_time == 0:
+            positions[frame] = tuple(npc.position3)
+            if arrived is None and not npc.path:
+                arrived = frame
+    return positions, arrived
+
+
+def check_lod():
+    rng = random.Random(25)
+    world = LodWorld(CLOSED, 4)
+    world.player1 = Entity()
+    entities = [world.player1] + [Entity() for _ in range(39)]
+    moved = {entity: list() for entity in entities}
+    elapsed = 0.0
+    spread = set()
+    lost = 0
+    for frame in range(40):
+        world.lod_frame += 1
+        td = rng.uniform(0.5, 2) / 60
+        elapsed += td
+        moves = world.get_moves(entities, td, 4, None)
+        spread.add(len(moves) - 1)
+        for entity, time in moves:
+            moved[entity].append((frame, time))
+        lost += sum(1 for entity in entities
+                    if abs(sum(t for f, t in moved[entity]) + entity.lod_time - elapsed) > 1e-9)
+    frames = [[f for f, t in moved[entity]] for entity in entities[1:]]
+    check(len(moved[world.player1]) == 40, "the player is always moved")
+    check(all(len(i) == 10 and i[1] - i[0] == 4 for i in frames), "entities out of view are moved every 4 frames")
+    check(spread == {9, 10}, "they are spread over the frames: {} moved each frame".format(sorted(spread)))
+    check(lost == 0, "they are moved by all the time since they were last moved: {} wrong".format(lost))
+
+    entity = Entity()
+    entity.set_position((3, 3))
+    world.lod_frame += 1
+    first = world.get_moves([entity], 0.1, 4, (0, 0, 1, 1))
+    world.lod_frame += 1
+    second = world.get_moves([entity], 0.1, 4, (0, 0, 1, 1))
+    world.lod_frame += 1
+    arriving = world.get_moves([entity], 0.1, 4, (2, 2, 4, 4))
+    check(first == [] and second == [] and len(arriving) == 1 and abs(arriving[0][1] - 0.3) < 1e-9,
+          "entities coming into view catch up on the next frame")
+
+    # the path turns several times, so waypoints are passed between moves
+    start, dest = (0, 0), (7, 4)
+    full, full_arrived = walk_out_of_view(1, start, dest, 240)
+    reduced, reduced_arrived = walk_out_of_view(4, start, dest, 240)
+    wrong = sum(1 for frame, position in reduced.items()
+                if max(abs(i - j) for i, j in zip(position, full[frame])) > 1e-6)
+    check(len(reduced) == 60 and wrong == 0,
+          "npcs walking out of view are where npcs in view are: {} wrong of {}".format(wrong, len(reduced)))
+    check(full_arrived is not None and reduced_arrived is not None and 0 <= reduced_arrived - full_arrived < 4
+          and tuple(int(i) for i in reduced[max(reduced)][:2]) == dest,
+          "npcs out of view arrive on time: frame {} instead of {}".format(reduced_arrived, full_arrived))
+
+
+def main():
+    check_pathfinding()
+    check_flow_fields()
+    check_routes()
+    check_entity_store()
+    check_vectors()
+
+    # npcs load their sprites, which needs a display, and the database
+    prepare.init()
+    db.load()
+    check_lod()
+
+    if failures:
+        print("{} checks failed".format(len(failures)))
+        sys.exit(1)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Walk across the chunks of the sample world, without a window.
+
+The player starts in the northwest chunk of sample_world.world, next
+to the northeast chunk, walks east into the northeast chunk, then south
+into the southeast chunk.  The script checks that chunks are attached
+before the player reaches them, that chunks left behind are detached
+along with the NPCs they created, that the chunk edges can be walked across, and that no visible tile is
+left undrawn, including chunks which are loaded while they are in view.
+
+Call this script from the root folder:
+
+    python scripts/check_world.py
+
+It exits with status 1 if a check fails.
+"""
+from __future__ import division
+from __future__ import print_function
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+import pygame  # noqa: E402
+
+from tuxemon.core import prepare  # noqa: E402
+
+WORLD = "sample_world.world"
+START = 17, 7
+
+# created by an init of the northwest chunk
+NPC = "37707_male"
+
+# (direction, destination)
+WALK = [
+    ("right", (30, 7)),
+    ("down", (30, 24)),
+]
+
+failures = list()
+
+
+def check(condition, message):
+    print("{} {}".format("ok  " if condition else "FAIL", message))
+    if not condition:
+        failures.append(message)
+
+
+def start_game():
+    prepare.init()
+    # small distances, so chunks are detached within the small sample world
+    prepare.CONFIG.chunk_load_distance = 1
+    prepare.CONFIG.chunk_unload_distance = 2
+
+    from tuxemon.core.control import Control
+    from tuxemon.core.player import Player
+
+    control = Control(prepare.ORIGINAL_CAPTION)
+    control.auto_state_discovery()
+    setattr(prepare, "GLOBAL_CONTROL", control)
+    control.add_player(Player(prepare.CONFIG.player_npc))
+    control.push_state("BackgroundState")
+    world = control.push_state("WorldState")
+    control.event_engine.execute_action("teleport", [WORLD, str(START[0]), str(START[1])])
+    return control, world
+
+
+def loaded(world):
+    return {chunk.name for chunk in world.current_map.loaded_chunks()}
+
+
+def undrawn_tiles(world, surface):
+    """ Return the number of tiles in view which are the clear color of the renderer """
+    tw, th = world.current_map.render_tile_size
+    player = pygame.Rect(world.get_pos_from_tilepos(world.player1.tile_pos), (tw, th))
+    count = 0
+    for x in range(tw // 2, surface.get_width(), tw):
+        for y in range(th // 2, surface.get_height(), th):
+            if not player.collidepoint(x, y) and surface.get_at((x, y))[:3] == (0, 0, 0):
+                count += 1
+    return count
+
+
+def frame(control, world, surface, seen):
+    control.update(1 / 60)
+    world.draw(surface)
+    seen.update(loaded(world))
+
+
+def walk(control, world, surface, direction, destination):
+    """ Walk one tile at a time in a direction, until the player reaches a tile
+
+    :returns: names of the chunks which were loaded during the walk
+    """
+    player = world.player1
+    seen = set()
+    for _ in range(60 * 30):
+        if player.path:
+            # finish the step to the next tile, then stop
+            player.move_direction = None
+        elif tuple(int(i) for i in player.tile_pos) == destination:
+            break
+        else:
+            world.move_player(direction)
+        frame(control, world, surface, seen)
+    return seen
+
+
+def main():
+    control, world = start_game()
+    surface = pygame.Surface(prepare.SCREEN_SIZE)
+    frame(control, world, surface, set())
+
+    chunks = {chunk.name: chunk for chunk in world.current_map.chunks}
+    check("northwest" in loaded(world), "the start chunk is loaded")
+
+    # the northeast chunk is in view, and is loaded in the background
+    for _ in range(10):
+        frame(control, world, surface, set())
+    check(loaded(world) == {"northwest", "northeast"},
+          "only the chunks near the start are loaded: {}".format(sorted(loaded(world))))
+    check(undrawn_tiles(world, surface) == 0, "the view is drawn on arrival")
+    check(NPC in world.npcs, "the npc of the start chunk is created")
+
+    previous = "northwest"
+    for direction, destination in WALK:
+        seen = walk(control, world, surface, direction, destination)
+        position = tuple(int(i) for i in world.player1.tile_pos)
+        current = world.current_map.get_chunk(*position)
+        check(position == destination, "walked {} to {}: {}".format(direction, destination, position))
+        check(current is not None and current.name in seen,
+              "{} was attached during the walk".format(current and current.name))
+        check(chunks[previous].map is None, "{} was detached".format(previous))
+        if previous == "northwest":
+            check(NPC not in world.npcs, "the npc of northwest was removed")
+        for _ in range(10):
+            frame(control, world, surface, seen)
+        check(undrawn_tiles(world, surface) == 0, "the view is drawn in {}".format(current and current.name))
+        previous = current.name
+
+    if failures:
+        print("{} checks failed".format(len(failures)))
+        sys.exit(1)
+    print("all checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -42,6 +42,9 @@ setup(name='tuxemon',
       license="GPLv3",
       long_description='https://github.com/Tuxemon/Tuxemon',
       install_requires=REQUIREMENTS,
+      extras_require={
+          'physics': ['numpy'],
+      },
       entry_points={
           'gui_scripts': [
               'tuxemon = tuxemon.__main__:main'
@@ -56,6 +56,7 @@ if __name__ == '__main__':
 
     if args.mod:
         prepare.CONFIG.mods.insert(0, args.mod)
+        prepare.refresh_resource_index()
     if args.starting_map:
         prepare.CONFIG.starting_map = args.starting_map
 
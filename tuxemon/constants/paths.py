@@ -54,6 +54,9 @@ USER_GAME_DATA_DIR = os.path.join(USER_GAME_DIR, "data")
 # game savegame dir
 USER_GAME_SAVE_DIR = os.path.join(USER_GAME_DIR, "saves")
 
+# compiled game data, such as the database.  safe to delete.
+CACHE_DIR = os.path.join(USER_GAME_DIR, "cache")
+
 # mods
 mods_folder = os.path.join(BASEDIR, "..", "mods")
 
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.atlas Texture atlases for sprite frames.
+#
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+import math
+
+import pygame
+
+logger = logging.getLogger(__name__)
+
+# largest width or height of an atlas page, unless a frame is larger
+MAX_PAGE_SIZE = 2048
+
+
+class Atlas(object):
+    """ Many small images packed into a few large surfaces
+
+    Each frame is a subsurface of a page, so frames share the pixels of
+    the page and can be blitted like any other surface.  Frames must not
+    be drawn on; that would change the page.
+
+    **Examples:**
+
+    >>> atlas = build_atlas([("a.png", surface_a), ("b.png", surface_b)])
+    >>> atlas["a.png"]
+    <Surface(16x32x32 SW)>
+    """
+
+    def __init__(self, pages, frames):
+        """
+        :param list pages: atlas pages
+        :param dict frames: names mapped to subsurfaces of the pages
+        """
+        self.pages = pages
+        self.frames = frames
+
+    def __getitem__(self, name):
+        return self.frames[name]
+
+    def __contains__(self, name):
+        return name in self.frames
+
+    def __len__(self):
+        return len(self.frames)
+
+    def get_byte_size(self):
+        """ Return the number of bytes used by the pixels of all pages
+
+        :rtype: int
+        """
+        return sum(page.get_pitch() * page.get_height() for page in self.pages)
+
+
+def pack_rects(sizes, max_size=MAX_PAGE_SIZE):
+    """ Place rectangles on pages, shelf by shelf
+
+    Rectangles are sorted by height, then placed left to right on a shelf.
+    When a shelf is full, a new one is started below it, and when the page
+    is full, a new page is started.
+
+    :param list sizes: (width, height) of each rectangle
+    :param int max_size: maximum width and height of a page
+
+    :rtype: tuple
+    :returns: list of page sizes, and (page, x, y) of each rectangle
+    """
+    if not sizes:
+        return list(), list()
+
+    area = sum(w * h for w, h in sizes)
+    widest = max(w for w, h in sizes)
+    page_width = max(widest, min(max_size, int(math.ceil(math.sqrt(area)))))
+
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions = [None] * len(sizes)
+    pages = list()
+    page = x = y = shelf_height = 0
+
+    for index in order:
+        w, h = sizes[index]
+        if x + w > page_width:
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        if y + h > max_size and y > 0:
+            pages.append((page_width, y))
+            page += 1
+            x = y = shelf_height = 0
+        positions[index] = page, x, y
+        x += w
+        shelf_height = max(shelf_height, h)
+
+    pages.append((page_width, y + shelf_height))
+    return pages, positions
+
+
+def build_atlas(images, max_size=MAX_PAGE_SIZE):
+    """ Pack named surfaces into an atlas
+
+    Pages have per-pixel alpha if any of the images do.  Images must be
+    converted to the display format, such as the ones returned by
+    `tools.load_and_scale`.
+
+    :param list images: (name, pygame.Surface) pairs
+    :param int max_size: maximum width and height of a page
+    :rtype: Atlas
+    """
+    sizes = [surface.get_size() for name, surface in images]
+    page_sizes, positions = pack_rects(sizes, max_size)
+
+    alpha = any(surface.get_flags() & pygame.SRCALPHA for name, surface in images)
+    if alpha:
+        pages = [pygame.Surface(size, pygame.SRCALPHA).convert_alpha() for size in page_sizes]
+    else:
+        pages = [pygame.Surface(size).convert() for size in page_sizes]
+
+    frames = dict()
+    for (name, surface), (page, x, y) in zip(images, positions):
+        # pages start as all zeros, so a MAX blend copies pixels exactly,
+        # without blending them with the transparent page
+        pages[page].blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        frames[name] = pages[page].subsurface((x, y) + surface.get_size())
+
+    logger.debug("packed {} images into {} atlas pages".format(len(frames), len(pages)))
+    return Atlas(pages, frames)
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.cache Caches for loaded resources.
+#
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+import pygame
+
+logger = logging.getLogger(__name__)
+
+
+def surface_size(surface):
+    """ Return the number of bytes used by the pixels of a surface
+
+    :type surface: pygame.Surface
+    :rtype: int
+    """
+    return surface.get_pitch() * surface.get_height()
+
+
+class LRUCache(object):
+    """ Least-recently-used cache with a memory budget
+
+    Each value has a size, computed by the `sizeof` function.  When the
+    total size is over the budget, the least recently used values are
+    evicted.  Pinned values are never evicted; use them for things that
+    are always needed, like UI chrome.
+
+    The cache is thread-safe.
+
+    **Examples:**
+
+    >>> cache = LRUCache(64 * 1024 * 1024, surface_size)
+    >>> cache.put(("gfx/d-pad.png", 2), surface)
+    >>> cache.get(("gfx/d-pad.png", 2))
+    <Surface(...)>
+    """
+
+    def __init__(self, budget, sizeof=None):
+        """
+        :param budget: maximum total size of unpinned values
+        :param sizeof: function that returns the size of a value; defaults to 1 per value
+        """
+        self.budget = budget
+        self.sizeof = sizeof or (lambda value: 1)
+        self.size = 0
+        self.pinned_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._sizes = dict()
+        self._pinned = set()
+        self._lock = threading.RLock()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        """ Return a cached value and mark it as recently used
+
+        :param key: any hashable key
+        :param default: returned if the key is not cached
+        """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._items[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value, pin=False):
+        """ Add a value to the cache, evicting old values if over budget
+
+        :param key: any hashable key
+        :param value: value to cache
+        :param pin: if True, the value is never evicted
+        """
+        with self._lock:
+            self.discard(key)
+            size = self.sizeof(value)
+            self._items[key] = value
+            self._sizes[key] = size
+            self.size += size
+            if pin:
+                self._pinned.add(key)
+                self.pinned_size += size
+            self.evict()
+
+    def put_if_absent(self, key, value):
+        """ Add a value to the cache, unless the key is cached already
+
+        Checking and adding is done at once, so another thread cannot
+        add the key in between.
+
+        :param key: any hashable key
+        :param value: value to cache
+        :returns: True if the value was added
+        :rtype: bool
+        """
+        with self._lock:
+            if key in self._items:
+                return False
+            self.put(key, value)
+            return True
+
+    def pin(self, key):
+        """ Prevent a cached value from being evicted
+
+        :param key: key of a cached value
+        """
+        with self._lock:
+            if key in self._items and key not in self._pinned:
+                self._pinned.add(key)
+                self.pinned_size += self._sizes[key]
+
+    def unpin(self, key):
+        """ Allow a pinned value to be evicted again
+
+        :param key: key of a cached value
+        """
+        with self._lock:
+            if key in self._pinned:
+                self._pinned.remove(key)
+                self.pinned_size -= self._sizes[key]
+                self.evict()
+
+    def discard(self, key):
+        """ Remove a value from the cache, if it is cached
+
+        :param key: key of a cached value
+        """
+        with self._lock:
+            if key in self._items:
+                del self._items[key]
+                size = self._sizes.pop(key)
+                self.size -= size
+                if key in self._pinned:
+                    self._pinned.remove(key)
+                    self.pinned_size -= size
+
+    def evict(self):
+        """ Remove least recently used values until the cache is within budget
+
+        Pinned values do not count towards the budget.
+        """
+        with self._lock:
+            items = self._items
+            while self.size - self.pinned_size > self.budget:
+                key = next(iter(items))
+                if key in self._pinned:
+                    # pinned values are not evicted; skip over them
+                    items[key] = items.pop(key)
+                else:
+                    self.discard(key)
+                    self.evictions += 1
+
+    def clear(self, keep_pinned=False):
+        """ Remove all values
+
+        :param keep_pinned: if True, pinned values are kept
+        """
+        with self._lock:
+            if keep_pinned:
+                for key in list(self._items):
+                    if key not in self._pinned:
+                        self.discard(key)
+                return
+            self._items.clear()
+            self._sizes.clear()
+            self._pinned.clear()
+            self.size = 0
+            self.pinned_size = 0
+
+    def stats(self):
+        """ Return a dictionary of statistics, for debugging
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "pinned": len(self._pinned),
+                "size": self.size,
+                "pinned_size": self.pinned_size,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class ImageDiskCache(object):
+    """ Persistent cache of converted and scaled images
+
+    Decoding an image, checking it for transparency and scaling it is slow,
+    and is done for every image, every launch.  This cache stores the
+    final pixels of an image, together with the result of the transparency
+    check, so the next time the image is loaded only the pixels need to be
+    read and converted to the display format.
+
+    There is one entry for each source file and scale factor.  Entries
+    record the modification time and size of their source file, and are
+    only used if the source file is unchanged, so the source file is never
+    read when the entry is used.  A changed file replaces its entry.  The
+    least recently used entries are removed by `prune` when the cache is
+    over its size.
+
+    Entry format:
+
+    * header: magic, version, width, height, alpha flag, source
+      modification time, source size
+    * pixels: RGBA if the alpha flag is set, otherwise RGB
+    """
+    MAGIC = b"TXIC"
+    VERSION = 2
+    HEADER = struct.Struct("<4sHIIBdQ")
+
+    def __init__(self, folder):
+        """
+        :param folder: folder to store entries in; created if missing
+        """
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+
+    @staticmethod
+    def make_key(path, scale):
+        """ Return the key of an image
+
+        :param str path: path of the source file
+        :param scale: scale factor of the image
+        :rtype: str
+        """
+        name = "{}@{}".format(path, scale)
+        return hashlib.sha1(name.encode("utf-8")).hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.folder, key + ".img")
+
+    def load(self, key, source_stat):
+        """ Return an image from the cache, or None if missing or out of date
+
+        The image is not converted, so this may be called from loader
+        threads.  Convert it on the main thread, with `convert_alpha` if
+        the alpha flag is set, otherwise with `convert`.
+
+        :param str key: key returned by make_key
+        :param tuple source_stat: (modification time, size) of the source file
+        :returns: (pygame.Surface, alpha flag) or None
+        :rtype: tuple
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as fp:
+                data = fp.read()
+            magic, version, width, height, alpha, mtime, size = self.HEADER.unpack_from(data)
+        except (IOError, OSError, struct.error):
+            self.misses += 1
+            return None
+
+        if magic != self.MAGIC or version != self.VERSION or (mtime, size) != tuple(source_stat):
+            self.misses += 1
+            return None
+
+        mode = "RGBA" if alpha else "RGB"
+        try:
+            image = pygame.image.fromstring(data[self.HEADER.size:], (width, height), mode)
+        except ValueError:
+            logger.debug("corrupt image cache entry: {}".format(key))
+            self.misses += 1
+            return None
+
+        # entries are pruned by modification time, so mark it as used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return image, bool(alpha)
+
+    def save(self, key, source_stat, surface, alpha):
+        """ Store a surface in the cache
+
+        Errors are logged and ignored; the cache is only an optimization.
+
+        :param str key: key returned by make_key
+        :param tuple source_stat: (modification time, size) of the source file
+        :param pygame.Surface surface: image to store
+        :param bool alpha: True if the image has transparent pixels
+        :rtype: None
+        """
+        from tuxemon.core.tools import replace_file
+
+        mode = "RGBA" if alpha else "RGB"
+        width, height = surface.get_size()
+        mtime, size = source_stat
+        path = self.get_path(key)
+        temp_path = "{}.{}.tmp".format(path, threading.current_thread().ident)
+        try:
+            with open(temp_path, "wb") as fp:
+                fp.write(self.HEADER.pack(self.MAGIC, self.VERSION, width, height, alpha, mtime, size))
+                fp.write(pygame.image.tostring(surface, mode))
+            replace_file(temp_path, path)
+        except (IOError, OSError) as e:
+            logger.debug("cannot write image cache entry {}: {}".format(key, e))
+
+    def prune(self, max_size):
+        """ Remove the least recently used entries, until the cache is within a size
+
+        Entries of deleted files and old scale factors are never used
+        again, so they become the oldest, and are removed first.  Call this
+        before the cache is used.
+
+        :param int max_size: maximum total size of the entries, in bytes
+        :rtype: int
+        :returns: number of entries removed
+        """
+        entries = list()
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            try:
+                if name.endswith(".tmp"):
+                    # left by a game which was stopped while writing
+                    os.remove(path)
+                elif name.endswith(".img"):
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                pass
+
+        total = sum(size for mtime, size, path in entries)
+        removed = 0
+        for mtime, size, path in sorted(entries):
+            if total <= max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        if removed:
+            logger.debug("removed {} old image cache entries".format(removed))
+        return removed
+
+    def clear(self):
+        """ Remove all entries
+
+        :rtype: None
+        """
+        for name in os.listdir(self.folder):
+            if name.endswith((".img", ".tmp")):
+                os.remove(os.path.join(self.folder, name))
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.collision Collision grid of a map.
+#
+"""Collision data of a map, stored as one integer of flags per tile.
+
+Each tile has these flags:
+
+* COLLISION: the tile is in a collision region
+* PROPERTIES: the collision region has properties, so the tile may be
+  entered, exited or continued through in some directions
+* enter, exit and continue directions of the region
+* walls: collision lines on the sides of the tile
+
+Checking a tile is one array read, and the grid uses the same amount of
+memory for any number of collision objects.
+
+`CollisionGrid` can also be used like the old collision map, a dict of
+(x, y) tiles mapped to None or a dict of tile conditions, and its `lines`
+like the old set of (tile, direction) collision lines.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+directions = "up", "down", "left", "right"
+
+COLLISION = 1 << 0
+PROPERTIES = 1 << 1
+
+# shift of the direction flags of each kind; one bit per direction
+ENTER = 2
+EXIT = 6
+CONTINUE = 10
+WALL = 14
+
+direction_bits = {direction: 1 << i for i, direction in enumerate(directions)}
+
+# complimentary directions
+opposite = {
+    "up": "down",
+    "down": "up",
+    "left": "right",
+    "right": "left"
+}
+
+
+def flag(kind, direction):
+    """ Return the flag of a direction
+
+    **Examples:**
+
+    >>> flag(WALL, "left") == 1 << 16
+    True
+
+    :param kind: ENTER, EXIT, CONTINUE or WALL
+    :param direction: "up", "down", "left" or "right"
+    :rtype: int
+    """
+    return direction_bits[direction] << kind
+
+
+def get_directions(tile, kind):
+    """ Return the directions of a kind which are set in a tile
+
+    :param tile: flags of a tile
+    :param kind: ENTER, EXIT, CONTINUE or WALL
+    :rtype: list
+    """
+    return [d for d in directions if tile & (direction_bits[d] << kind)]
+
+
+class CollisionLines(object):
+    """ Set-like view of the walls of a collision grid
+
+    Items are (tile, direction) pairs, where direction is the side of the
+    tile which cannot be crossed.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def __contains__(self, item):
+        position, direction = item
+        return bool(self.grid.get_flags(position) & flag(WALL, direction))
+
+    def __iter__(self):
+        for position, tile in self.grid.iter_flags():
+            for direction in get_directions(tile, WALL):
+                yield position, direction
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class CollisionGrid(object):
+    """ Collision flags of each tile of a map
+
+    `version` increases when flags change, so things computed from the
+    grid, like paths, can tell when they are out of date.
+    """
+    version = 0
+
+    def __init__(self, size, tiles=None):
+        """
+        :param size: (width, height) of the map in tiles
+        :param tiles: optional flags of all tiles, row by row
+        """
+        self.width, self.height = int(size[0]), int(size[1])
+        if tiles is None:
+            tiles = array(str("I"), [0]) * (self.width * self.height)
+        self.tiles = tiles
+        self.lines = CollisionLines(self)
+
+    @classmethod
+    def from_maps(cls, size, collision_map, collision_lines_map):
+        """ Create a grid from a collision map and collision lines
+
+        Collisions outside the map are ignored.
+
+        :param size: (width, height) of the map in tiles
+        :param dict collision_map: tiles mapped to None or tile conditions
+        :param set collision_lines_map: (tile, direction) pairs
+        :rtype: CollisionGrid
+        """
+        grid = cls(size)
+        for position, conditions in collision_map.items():
+            tile = COLLISION
+            if conditions is not None:
+                tile |= PROPERTIES
+                for direction in conditions.get("enter", ()):
+                    if direction in direction_bits:
+                        tile |= flag(ENTER, direction)
+                for direction in conditions.get("exit", ()):
+                    if direction in direction_bits:
+                        tile |= flag(EXIT, direction)
+                if conditions.get("continue") in direction_bits:
+                    tile |= flag(CONTINUE, conditions["continue"])
+            grid.add_flags(position, tile)
+
+        for position, direction in collision_lines_map:
+            grid.add_flags(position, flag(WALL, direction))
+
+        return grid
+
+    def index(self, position):
+        """ Return the index of a tile in `tiles`, or None if it is outside the map
+
+        :param position: (x, y) of the tile
+        :rtype: int or None
+        """
+        x, y = int(position[0]), int(position[1])
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def get_flags(self, position):
+        """ Return the flags of a tile; 0 if outside the map
+
+        :param position: (x, y) of the tile
+        :rtype: int
+        """
+        x, y = int(position[0]), int(position[1])
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.tiles[y * self.width + x]
+        return 0
+
+    def add_flags(self, position, flags):
+        """ Set flags of a tile; ignored if outside the map
+
+        :param position: (x, y) of the tile
+        :param flags: flags to set
+        :rtype: None
+        """
+        index = self.index(position)
+        if index is not None:
+            self.tiles[index] |= flags
+            self.version += 1
+
+    def is_blocked(self, position, direction):
+        """ Return True if a tile cannot be entered by moving in a direction
+
+        Does not check walls.
+
+        :param position: (x, y) of the tile
+        :param direction: direction of the movement
+        :rtype: bool
+        """
+        tile = self.get_flags(position)
+        if not tile & COLLISION:
+            return False
+        return not tile & flag(ENTER, opposite[direction])
+
+    def iter_flags(self):
+        """ Iterate over the positions and flags of tiles which have flags
+
+        :rtype: iterator
+        """
+        width = self.width
+        for index, tile in enumerate(self.tiles):
+            if tile:
+                yield (index % width, index // width), tile
+
+    # collision map compatibility
+
+    def get_conditions(self, tile):
+        """ Return the tile conditions of tile flags, in collision map format
+
+        :param tile: flags of a tile
+        :rtype: dict or None
+        """
+        if not tile & PROPERTIES:
+            return None
+        conditions = dict()
+        enters = get_directions(tile, ENTER)
+        if enters:
+            conditions["enter"] = enters
+        exits = get_directions(tile, EXIT)
+        if exits:
+            conditions["exit"] = exits
+        continues = get_directions(tile, CONTINUE)
+        if continues:
+            conditions["continue"] = continues[0]
+        return conditions
+
+    def __getitem__(self, position):
+        tile = self.get_flags(position)
+        if not tile & COLLISION:
+            raise KeyError(position)
+        return self.get_conditions(tile)
+
+    def get(self, position, default=None):
+        try:
+            return self[position]
+        except KeyError:
+            return default
+
+    def __contains__(self, position):
+        return bool(self.get_flags(position) & COLLISION)
+
+    def __iter__(self):
+        for position, tile in self.iter_flags():
+            if tile & COLLISION:
+                yield position
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(position, self[position]) for position in self]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class Occupancy(object):
+    """ Tiles occupied by entities
+
+    Entities tell the occupancy when they are placed, start moving or
+    finish moving, so checking a tile is one dict lookup, and does not
+    depend on the number of entities.  A moving entity occupies the tile
+    it comes from and the tile it goes to.
+
+    `Occupancy` can be used like the old dict of entities, where (x, y)
+    tiles are mapped to {"entity": entity}.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._entities = dict()
+        self._tiles = dict()
+
+    def place(self, entity, tiles):
+        """ Set the tiles occupied by an entity
+
+        :param entity: any entity
+        :param tiles: sequence of (x, y) tiles
+        :rtype: None
+        """
+        tiles = tuple((int(x), int(y)) for x, y in tiles)
+        if self._entities.get(entity) == tiles:
+            return
+
+        self.remove(entity)
+        self._entities[entity] = tiles
+        for tile in tiles:
+            self._tiles.setdefault(tile, []).append(entity)
+        self.version += 1
+
+    def remove(self, entity):
+        """ Remove an entity, if it is placed
+
+        :param entity: any entity
+        :rtype: None
+        """
+        tiles = self._entities.pop(entity, None)
+        if tiles is None:
+            return
+
+        for tile in tiles:
+            entities = self._tiles[tile]
+            entities.remove(entity)
+            if not entities:
+                del self._tiles[tile]
+        self.version += 1
+
+    def clear(self):
+        """ Remove all entities
+
+        :rtype: None
+        """
+        self._entities.clear()
+        self._tiles.clear()
+        self.version += 1
+
+    def count(self):
+        """ Return the number of placed entities
+
+        :rtype: int
+        """
+        return len(self._entities)
+
+    def get_entity(self, position):
+        """ Return the last entity placed on a tile, or None
+
+        :param position: (x, y) of the tile
+        """
+        try:
+            return self._tiles[position][-1]
+        except KeyError:
+            return None
+
+    # collision dict compatibility
+
+    def __getitem__(self, position):
+        return {"entity": self._tiles[position][-1]}
+
+    def get(self, position, default=None):
+        try:
+            return self[position]
+        except KeyError:
+            return default
+
+    def __contains__(self, position):
+        return position in self._tiles
+
+    def __iter__(self):
+        return iter(self._tiles)
+
+    def keys(self):
+        return list(self._tiles)
+
+    def items(self):
+        return [(position, self[position]) for position in self._tiles]
+
+    def __len__(self):
+        return len(self._tiles)
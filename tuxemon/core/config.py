@@ -77,6 +77,9 @@ class TuxemonConfig(object):
         self.controller_transparency = cfg.getint("display", "controller_transparency")
         self.hide_mouse = cfg.getboolean("display", "hide_mouse")
         self.window_caption = cfg.get("display", "window_caption")
+        self.surface_cache_size = cfg.getint("display", "surface_cache_size")  # megabytes
+        self.image_disk_cache = cfg.getboolean("display", "image_disk_cache")
+        self.image_disk_cache_size = cfg.getint("display", "image_disk_cache_size")  # megabytes
 
         # [sound]
         self.sound_volume = cfg.getfloat("sound", "sound_volume")
@@ -89,6 +92,18 @@ class TuxemonConfig(object):
         self.net_controller_enabled = cfg.getboolean("game", "net_controller_enabled")
         self.locale = cfg.get("game", "locale")
         self.dev_tools = cfg.getboolean("game", "dev_tools")
+        self.lazy_database = cfg.getboolean("game", "lazy_database")
+        self.warm_database = cfg.getboolean("game", "warm_database")
+        self.loader_threads = cfg.getint("game", "loader_threads")
+        self.compiled_maps = cfg.getboolean("game", "compiled_maps")
+        self.map_cache_size = cfg.getint("game", "map_cache_size")  # megabytes
+        self.chunk_load_distance = cfg.getint("game", "chunk_load_distance")  # tiles
+        self.chunk_unload_distance = cfg.getint("game", "chunk_unload_distance")  # tiles
+        self.event_cache = cfg.getboolean("game", "event_cache")
+        self.event_cache_check = cfg.getboolean("game", "event_cache_check")
+        self.batch_physics = cfg.getboolean("game", "batch_physics")
+        self.lod_rate = cfg.getint("game", "lod_rate")  # frames
+        self.lod_margin = cfg.getint("game", "lod_margin")  # tiles
         
         # [gameplay]
         self.items_consumed_on_failure = cfg.getboolean("gameplay", "items_consumed_on_failure")
@@ -151,6 +166,9 @@ def get_defaults():
             ("controller_transparency", 45),
             ("hide_mouse", True),
             ("window_caption", "Tuxemon"),
+            ("surface_cache_size", 64),
+            ("image_disk_cache", True),
+            ("image_disk_cache_size", 256),
         ))),
         ("sound", OrderedDict((
             ("sound_volume", 1.0),
@@ -163,6 +181,18 @@ def get_defaults():
             ("net_controller_enabled", False),
             ("locale", "en_US"),
             ("dev_tools", False),
+            ("lazy_database", True),
+            ("warm_database", True),
+            ("loader_threads", 2),
+            ("compiled_maps", True),
+            ("map_cache_size", 64),
+            ("chunk_load_distance", 8),
+            ("chunk_unload_distance", 16),
+            ("event_cache", True),
+            ("event_cache_check", False),
+            ("batch_physics", True),
+            ("lod_rate", 1),
+            ("lod_margin", 4),
         ))),
         ("gameplay", OrderedDict((
             ("items_consumed_on_failure", True),
@@ -36,12 +36,46 @@ from __future__ import unicode_literals
 import json
 import logging
 import os
+import pickle
+import threading
 from operator import itemgetter
 
+from tuxemon.constants import paths
 from tuxemon.core import prepare
 
 logger = logging.getLogger(__name__)
 
+# tables which are loaded when the entire database is requested
+tables = (
+    "item",
+    "monster",
+    "npc",
+    "technique",
+    "encounter",
+    "inventory",
+    "environment",
+    "sounds",
+    "music",
+)
+
+# secondary indexes which are built when a table is loaded
+# each function returns the index keys for a record
+indexes = {
+    "monster": {
+        "type": lambda record: record.get("types", ()),
+        "shape": lambda record: (record.get("shape", "landrace").lower(),),
+        "category": lambda record: (record["category"],) if "category" in record else (),
+        "technique": lambda record: {i["technique"] for i in record.get("moveset", ())},
+        "evolves_into": lambda record: {i["monster_slug"] for i in record.get("evolutions", ())},
+    },
+    "item": {
+        "usable_in": lambda record: record.get("usable_in", ()),
+    },
+}
+
+# bump this when the layout of the compiled database changes
+COMPILED_VERSION = 3
+
 
 def process_targets(json_targets):
     """ Return values in order of preference for targeting things.
@@ -55,6 +89,82 @@ def process_targets(json_targets):
     return list(map(itemgetter(0), filter(itemgetter(1), sorted(json_targets.items(), key=itemgetter(1), reverse=True))))
 
 
+class ReadOnlyDict(dict):
+    """Dictionary which cannot be modified.
+
+    Database records are shared by every object created from them, so
+    they are frozen after loading to prevent accidental changes.
+
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("database records are read-only")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __reduce__(self):
+        # pickle and copy would otherwise restore the items with __setitem__
+        return self.__class__, (dict(self),)
+
+
+def freeze(value):
+    """Returns a read-only copy of a JSON value.
+
+    Dictionaries become ReadOnlyDicts and lists become tuples.
+
+    :param value: Any value loaded from JSON
+
+    :returns: The read-only value
+    """
+    if isinstance(value, dict):
+        return ReadOnlyDict((k, freeze(v)) for k, v in value.items())
+    elif isinstance(value, list):
+        return tuple(freeze(i) for i in value)
+    return value
+
+
+class LazyTables(dict):
+    """Dictionary of database tables which are loaded on first access.
+
+    Tables which have not been loaded yet are listed in `pending`.  Getting
+    a pending table, or iterating over the values, will load it with the
+    loader function.  Checking for, or iterating over the table names
+    never loads anything.
+
+    """
+
+    def __init__(self, loader):
+        super(LazyTables, self).__init__((table, {}) for table in tables)
+        self.loader = loader
+        self.pending = set()
+
+    def __getitem__(self, table):
+        if table in self.pending:
+            self.loader(table)
+        return super(LazyTables, self).__getitem__(table)
+
+    def get(self, table, default=None):
+        if table in self.pending:
+            self.loader(table)
+        return super(LazyTables, self).get(table, default)
+
+    def values(self):
+        for table in list(self.pending):
+            self.loader(table)
+        return super(LazyTables, self).values()
+
+    def items(self):
+        for table in list(self.pending):
+            self.loader(table)
+        return super(LazyTables, self).items()
+
+
 class JSONDatabase(object):
     """Handles connecting to the game database for resources such as monsters,
     stats, etc.
@@ -63,26 +173,36 @@ class JSONDatabase(object):
 
     def __init__(self, dir=None):
         self.path = None
-        self.database = {
-            "item": {},
-            "monster": {},
-            "npc": {},
-            "technique": {},
-            "encounter": {},
-            "inventory": {},
-            "environment": {},
-            "sounds": {},
-            "music" : {}
-        }
+        self.database = LazyTables(self.load_table)
+        self.indexes = dict()
+        self.lock = threading.RLock()
+        self.use_compiled = True
+        self.compiled = None
+        self.compiled_tables = dict()
+        self.compiled_dirty = False
         if dir:
             self.load(dir)
 
-    def load(self, directory="all"):
+    def load(self, directory="all", use_compiled=True, lazy=False, warm=False):
         """Loads all data from JSON files located under our data path.
 
+        When loading the entire database, a compiled copy of each table
+        is used if it is newer than all of the table's JSON files.  If it
+        is missing or stale, the JSON files are parsed and a new compiled
+        copy is written for the next launch.
+
+        In lazy mode, tables are not loaded until they are first used.
+        Warming will load the tables in a background thread.
+
         :param directory: The directory under resources/db/ to load. Defaults
             to "all".
+        :param use_compiled: Use and update the compiled database.
+        :param lazy: Load each table when it is first used.
+        :param warm: If lazy, load the tables in the background.
         :type directory: String
+        :type use_compiled: Bool
+        :type lazy: Bool
+        :type warm: Bool
 
         :returns: None
 
@@ -90,18 +210,188 @@ class JSONDatabase(object):
 
         self.path = prepare.fetch("db")
         if directory == "all":
-            self.load_json("item")
-            self.load_json("monster")
-            self.load_json("npc")
-            self.load_json("technique")
-            self.load_json("encounter")
-            self.load_json("inventory")
-            self.load_json("environment")
-            self.load_json("sounds")
-            self.load_json("music")
+            with self.lock:
+                self.use_compiled = use_compiled
+                self.compiled = self.read_compiled() if use_compiled else None
+                self.compiled_tables = dict()
+                self.compiled_dirty = False
+                self.database.pending.update(tables)
+
+            if not lazy:
+                for table in tables:
+                    self.database[table]
+            elif warm:
+                thread = threading.Thread(target=self.warm)
+                thread.daemon = True
+                thread.start()
         else:
             self.load_json(directory)
+            self.build_indexes(directory)
+
+    def warm(self):
+        """Loads every table which hasn't been loaded yet.
+
+        Used in lazy mode to load the database in a background thread.
+
+        :returns: None
+
+        """
+        for table in tables:
+            self.database.get(table)
+        logger.debug("database warmed")
+
+    def load_table(self, table):
+        """Loads a table from the compiled database, or the JSON files if stale.
+
+        Called when a pending table is first used.  When all tables are
+        loaded and any were stale, a new compiled database is written.
+
+        :param table: The table to load
+        :type table: String
+
+        :returns: None
+
+        """
+        with self.lock:
+            if table not in self.database.pending:
+                # another thread loaded it while we were waiting
+                return
+
+            self.database.pending.discard(table)
+            try:
+                if not self.load_compiled_table(table):
+                    dict.__setitem__(self.database, table, {})
+                    self.load_json(table)
+                    if self.use_compiled:
+                        self.compiled_tables[table] = pickle.dumps(
+                            dict.__getitem__(self.database, table),
+                            pickle.HIGHEST_PROTOCOL)
+                        self.compiled_dirty = True
+            except Exception:
+                self.database.pending.add(table)
+                raise
+
+            self.build_indexes(table)
+            logger.debug("loaded table: %s", table)
+            if not self.database.pending:
+                if self.compiled_dirty:
+                    self.save_compiled()
+
+                # the compiled data is not needed anymore; free the memory
+                self.compiled = None
+                self.compiled_tables = dict()
+                self.compiled_dirty = False
+
+    def get_compiled_path(self):
+        """Returns the path of the compiled database for the active mods.
+
+        :rtype: String
+        :returns: Path to the compiled database file.
+
+        """
+        filename = "db-{}.pickle".format("-".join(prepare.CONFIG.mods))
+        return os.path.join(paths.CACHE_DIR, filename)
+
+    def get_sources(self, table):
+        """Returns the modification time of every JSON file in a table.
+
+        This is used to determine if the compiled table is stale.
+        Only the directory listing and file stats are read.
+
+        :param table: The table to check
+        :type table: String
+
+        :rtype: Dict
+        :returns: Dictionary of file names and modification times.
+
+        """
+        sources = dict()
+        directory = os.path.join(self.path, table)
+        for json_item in os.listdir(directory):
+            if json_item.endswith(".json"):
+                sources[json_item] = os.path.getmtime(os.path.join(directory, json_item))
+        return sources
+
+    def read_compiled(self):
+        """Reads the compiled database from disk.  Tables are not unpacked.
+
+        :rtype: Dict
+        :returns: The compiled database, or None if it cannot be used.
+
+        """
+        filename = self.get_compiled_path()
+        try:
+            with open(filename, "rb") as fp:
+                compiled = pickle.load(fp)
+        except (IOError, OSError):
+            logger.debug("compiled database not found: %s", filename)
+            return None
+        except Exception:
+            logger.warning("compiled database is corrupt: %s", filename)
+            return None
+
+        if compiled.get("version") != COMPILED_VERSION or compiled.get("path") != self.path:
+            logger.debug("compiled database is stale: %s", filename)
+            return None
+
+        return compiled
+
+    def load_compiled_table(self, table):
+        """Loads a table from the compiled database, if it is current.
+
+        :param table: The table to load
+        :type table: String
+
+        :rtype: Bool
+        :returns: True if the compiled table was used.
+
+        """
+        if self.compiled is None:
+            return False
+
+        try:
+            data = self.compiled["tables"][table]
+        except KeyError:
+            return False
+
+        if self.compiled["sources"].get(table) != self.get_sources(table):
+            logger.debug("compiled table is stale: %s", table)
+            return False
+
+        dict.__setitem__(self.database, table, pickle.loads(data))
+        self.compiled_tables[table] = data
+        return True
+
+    def save_compiled(self):
+        """Writes the loaded database to disk, so it can be loaded with one read.
+
+        All tables must be loaded before calling this.
+
+        :rtype: String
+        :returns: Path to the compiled database file.
 
+        """
+        from tuxemon.core.tools import replace_file
+
+        filename = self.get_compiled_path()
+        compiled = {
+            "version": COMPILED_VERSION,
+            "path": self.path,
+            "sources": {table: self.get_sources(table) for table in tables},
+            "tables": self.compiled_tables,
+        }
+
+        temp_filename = filename + ".tmp"
+        try:
+            with open(temp_filename, "wb") as fp:
+                pickle.dump(compiled, fp, pickle.HIGHEST_PROTOCOL)
+            replace_file(temp_filename, filename)
+        except (IOError, OSError):
+            logger.error("unable to write compiled database: %s", filename)
+            return
+
+        logger.debug("wrote compiled database: %s", filename)
+        return filename
 
     def load_json(self, directory):
         """Loads all JSON items under a specified path.
@@ -146,7 +436,7 @@ class JSONDatabase(object):
         """
 
         if item['slug'] not in self.database[table]:
-            self.database[table][item['slug']] = item
+            self.database[table][item['slug']] = normalize(item, table)
         else:
             logger.error(item, json)
             raise Exception("Error: Item with this slug was already loaded.")
@@ -161,13 +451,73 @@ class JSONDatabase(object):
         :type table: String
 
         :rtype: Dict
-        :returns: A dictionary from the resulting lookup.
+        :returns: A read-only dictionary from the resulting lookup.
 
         """
-        return set_defaults(
-            self.database[table][slug],
-            table
-        )
+        return self.database[table][slug]
+
+    def build_indexes(self, table):
+        """Builds the secondary indexes of a table.
+
+        Index values are tuples of slugs, sorted by slug.
+
+        :param table: The table to index
+        :type table: String
+
+        :returns: None
+
+        """
+        table_indexes = dict()
+        records = dict.__getitem__(self.database, table)
+        for name, get_keys in indexes.get(table, {}).items():
+            index = dict()
+            for slug in sorted(records):
+                for key in get_keys(records[slug]):
+                    index.setdefault(key, list()).append(slug)
+            table_indexes[name] = {key: tuple(slugs) for key, slugs in index.items()}
+        self.indexes[table] = table_indexes
+
+    def query(self, table, index, key):
+        """Returns the records of a table which have a key in a secondary index.
+
+        **Examples:**
+
+        >>> db.query("monster", "type", "fire")
+        >>> db.query("monster", "technique", "ram")
+        >>> db.query("monster", "evolves_into", "tigrock")
+        >>> db.query("item", "usable_in", "WorldState")
+
+        :param table: The table to search, such as "monster" or "item"
+        :param index: The name of the index, see `core.db.indexes`
+        :param key: The value to look for
+        :type table: String
+        :type index: String
+
+        :rtype: List
+        :returns: List of records, sorted by slug.
+
+        """
+        records = self.database[table]
+        return [records[slug] for slug in self.indexes[table][index].get(key, ())]
+
+    def query_keys(self, table, index):
+        """Returns all the keys of a secondary index.
+
+        **Examples:**
+
+        >>> db.query_keys("monster", "shape")
+
+        :param table: The table, such as "monster" or "item"
+        :param index: The name of the index, see `core.db.indexes`
+        :type table: String
+        :type index: String
+
+        :rtype: List
+        :returns: Sorted list of the keys.
+
+        """
+        self.database[table]
+        return sorted(self.indexes[table][index])
 
     def lookup_file(self, table, slug):
         """Does a lookup with the given slug in the given table, expecting a dictionary with two keys, 'slug' and 'file'
@@ -210,6 +560,32 @@ class JSONDatabase(object):
         return results
 
 
+def normalize(results, table):
+    """Prepares a record loaded from JSON for use in the game.
+
+    This is done once, when the record is loaded.  Defaults are set,
+    types are lower-cased, and targets are sorted by preference.
+    The returned record is read-only.
+
+    :param results: The record loaded from JSON
+    :param table: The table the record belongs to
+    :type results: Dict
+    :type table: String
+
+    :rtype: ReadOnlyDict
+    :returns: The normalized record
+    """
+    results = set_defaults(results, table)
+
+    if table in ("monster", "technique") and results.get("types"):
+        results["types"] = [i.lower() for i in results["types"]]
+
+    if table in ("item", "technique") and "target" in results:
+        results["target"] = process_targets(results["target"])
+
+    return freeze(results)
+
+
 def set_defaults(results, table):
     if table == "monster":
         name = results['slug']
@@ -225,7 +601,7 @@ def set_defaults(results, table):
                 ('menu1', 'menu01'),
                 ('menu2', 'menu02'),
         ):
-            if not results.get(key):
+            if not sprites.get(key):
                 sprites[key] = "gfx/sprites/battle/{}-{}".format(
                     name,
                     view
@@ -235,3 +611,26 @@ def set_defaults(results, table):
 
 # Global database container
 db = JSONDatabase()
+
+
+if __name__ == "__main__":
+    # Build the compiled database ahead of time:
+    #   python -m tuxemon.core.db
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Compile the game database")
+    parser.add_argument('-m', '--mod', dest='mod', metavar='mymod', type=str, nargs='?',
+                        default=None, help='The mod directory used in the mods directory')
+    args = parser.parse_args()
+
+    if args.mod:
+        prepare.CONFIG.mods.insert(0, args.mod)
+        prepare.refresh_resource_index()
+
+    db.load(use_compiled=False)
+    for table in tables:
+        db.compiled_tables[table] = pickle.dumps(db.database[table], pickle.HIGHEST_PROTOCOL)
+    filename = db.save_compiled()
+    if filename is None:
+        raise SystemExit(1)
+    print("Compiled database written to {}".format(filename))
@@ -28,8 +28,9 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.euclid import Point2, Vector3, Point3
+from tuxemon.core.vector import Point2, Vector3, Point3
 from tuxemon.core.map import proj
+from tuxemon.core.tools import nearest
 
 
 class Entity(object):
@@ -43,11 +44,52 @@ class Entity(object):
     def __init__(self):
         self.slug = None
         self.world = None
+        self.store = None  # core.entitystore.EntityStore, if the entity is in one
         self.tile_pos = Point2(0, 0)
-        self.position3 = Point3(0, 0, 0)
+        self._position3 = Point3(0, 0, 0)
         self.acceleration3 = Vector3(0, 0, 0)  # not used currently, just set velocity
-        self.velocity3 = Vector3(0, 0, 0)
+        self._velocity3 = Vector3(0, 0, 0)
         self.update_location = False
+        self.lod_time = 0.0  # seconds not moved yet, while out of view
+
+    # position3 and velocity3 may be views of an EntityStore; assigning
+    # to them copies the values, so the views are kept
+
+    @property
+    def position3(self):
+        return self._position3
+
+    @position3.setter
+    def position3(self, value):
+        position = self._position3
+        if value is not position:
+            position.x, position.y, position.z = value
+
+    @property
+    def velocity3(self):
+        return self._velocity3
+
+    @velocity3.setter
+    def velocity3(self, value):
+        velocity = self._velocity3
+        if value is not velocity:
+            velocity.x, velocity.y, velocity.z = value
+
+    def attach_vectors(self, position3, velocity3):
+        """ Use vectors kept by an EntityStore; they must have the current values
+
+        :return: None
+        """
+        self._position3 = position3
+        self._velocity3 = velocity3
+
+    def detach_vectors(self):
+        """ Use own vectors again, with the current values
+
+        :return: None
+        """
+        self._position3 = Point3(*self._position3)
+        self._velocity3 = Vector3(*self._velocity3)
 
     # === PHYSICS START ================================================================
     def stop_moving(self):
@@ -69,10 +111,13 @@ class Entity(object):
     def update_physics(self, td):
         """ Move the entity according to the movement vector
 
+        Entities in an EntityStore are moved by the store, all at once.
+
         :param td:
         :return:
         """
-        self.position3 += self.velocity3 * td
+        if self.store is None:
+            self.position3 += self.velocity3 * td
         self.pos_update()
 
     def set_position(self, pos):
@@ -84,6 +129,27 @@ class Entity(object):
         self.position3.x = pos[0]
         self.position3.y = pos[1]
         self.pos_update()
+        self.update_occupancy()
+
+    def get_occupied_tiles(self):
+        """ Return the tiles which other entities cannot move into
+
+        :rtype: tuple
+        """
+        return nearest(self.tile_pos),
+
+    def update_occupancy(self):
+        """ Tell the world which tiles the entity occupies
+
+        Call when the entity starts or finishes moving, or is placed.
+        Entities which are not in the world are ignored.
+
+        :return: None
+        """
+        world = self.world
+        occupancy = getattr(world, "occupancy", None)
+        if occupancy is not None and world.npcs.get(self.slug) is self:
+            occupancy.place(self, self.get_occupied_tiles())
 
     # === PHYSICS END ==================================================================
 
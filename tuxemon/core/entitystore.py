@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.entitystore Batched physics of entities.
+"""Positions and velocities of entities, stored in contiguous arrays.
+
+Moving every entity with its own vectors allocates new vectors for each
+entity, every frame.  The store keeps the positions and velocities of all
+entities of the world in two NumPy arrays, one row per entity, and moves
+them all with one vectorized operation.  The `position3` and `velocity3`
+of a stored entity are views of its rows, so the rest of the code does
+not need to know where they are kept.
+
+NumPy is optional.  Without it, `EntityStore.available` is False and
+entities move themselves, like before.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+
+class ArrayVector3(object):
+    """ View of a row of an EntityStore array, which works like a core.vector Vector3
+
+    The store and index are read every time, so the view stays valid when
+    the store grows.
+    """
+    __slots__ = ("store", "name", "index")
+
+    def __init__(self, store, name, index):
+        """
+        :param EntityStore store: store of the array
+        :param name: "positions" or "velocities"
+        :param int index: row of the entity
+        """
+        self.store = store
+        self.name = name
+        self.index = index
+
+    def _get(self, i):
+        return float(getattr(self.store, self.name)[self.index, i])
+
+    def _set(self, i, value):
+        getattr(self.store, self.name)[self.index, i] = value
+
+    x = property(lambda self: self._get(0), lambda self, value: self._set(0, value))
+    y = property(lambda self: self._get(1), lambda self, value: self._set(1, value))
+    z = property(lambda self: self._get(2), lambda self, value: self._set(2, value))
+
+    def __len__(self):
+        return 3
+
+    def __iter__(self):
+        return iter(getattr(self.store, self.name)[self.index].tolist())
+
+    def __getitem__(self, key):
+        return getattr(self.store, self.name)[self.index].tolist()[key]
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "ArrayVector3({:.2f}, {:.2f}, {:.2f})".format(*self)
+
+
+class EntityStore(object):
+    """ Positions and velocities of entities, moved together
+
+    **Examples:**
+
+    >>> store = EntityStore()
+    >>> store.add(npc)
+    >>> store.step(1 / 60.0)
+    """
+    available = numpy is not None
+
+    def __init__(self, capacity=32):
+        """
+        :param int capacity: number of rows to allocate at first; grows when needed
+        """
+        self.positions = numpy.zeros((capacity, 3))
+        self.velocities = numpy.zeros((capacity, 3))
+        self.entities = list()
+        self.free = list()
+
+    def __contains__(self, entity):
+        return getattr(entity, "store", None) is self
+
+    def grow(self):
+        """ Double the number of rows
+
+        :rtype: None
+        """
+        size = len(self.positions)
+        self.positions = numpy.concatenate((self.positions, numpy.zeros((size, 3))))
+        self.velocities = numpy.concatenate((self.velocities, numpy.zeros((size, 3))))
+
+    def add(self, entity):
+        """ Move the position and velocity of an entity into the store
+
+        :type entity: tuxemon.core.entity.Entity
+        :rtype: None
+        """
+        if entity in self:
+            return
+        if getattr(entity, "store", None) is not None:
+            entity.store.remove(entity)
+
+        if self.free:
+            index = self.free.pop()
+            self.entities[index] = entity
+        else:
+            index = len(self.entities)
+            self.entities.append(entity)
+            if index >= len(self.positions):
+                self.grow()
+
+        self.positions[index] = tuple(entity.position3)
+        self.velocities[index] = tuple(entity.velocity3)
+        entity.store = self
+        entity.attach_vectors(ArrayVector3(self, "positions", index),
+                              ArrayVector3(self, "velocities", index))
+
+    def remove(self, entity):
+        """ Give an entity its own vectors again
+
+        :type entity: tuxemon.core.entity.Entity
+        :rtype: None
+        """
+        if entity not in self:
+            return
+
+        index = entity.position3.index
+        entity.store = None
+        entity.detach_vectors()
+        self.entities[index] = None
+        self.positions[index] = 0
+        self.velocities[index] = 0
+        self.free.append(index)
+
+    def clear(self):
+        """ Remove all entities
+
+        :rtype: None
+        """
+        for entity in list(self.entities):
+            if entity is not None:
+                self.remove(entity)
+        self.entities = list()
+        self.free = list()
+
+    def step(self, td):
+        """ Move all entities according to their velocity
+
+        Tile positions are not updated; entities do that when they move.
+
+        :param float td: time passed, in seconds
+        :rtype: None
+        """
+        count = len(self.entities)
+        self.positions[:count] += self.velocities[:count] * td
+
+    def step_entities(self, moves):
+        """ Move some entities, each by its own time
+
+        Entities which are not in the store, or not in `moves`, are not moved.
+
+        :param moves: sequence of (entity, time passed in seconds)
+        :rtype: None
+        """
+        count = len(self.entities)
+        times = numpy.zeros((count, 1))
+        for entity, td in moves:
+            if entity.store is self:
+                times[entity.position3.index] = td
+        self.positions[:count] += self.velocities[:count] * times
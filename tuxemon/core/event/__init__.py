@@ -64,6 +64,12 @@ MapCondition = namedtuple("condition", condition_fields)
 MapAction = namedtuple("action", action_fields)
 EventObject = namedtuple("eventobject", event_fields)
 
+# Compiled objects are made by the event engine when a map is loaded.  They
+# have the fields of the map objects, so they can be used in their place.
+CompiledCondition = namedtuple("condition", condition_fields + ["id", "test", "expected"])
+CompiledAction = namedtuple("action", action_fields + ["action_class", "parsed_parameters"])
+CompiledEvent = namedtuple("eventobject", event_fields)
+
 __all__ = [
     "MapAction",
     "MapCondition",
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (c) 2014-2017 William Edwards <shadowapex@gmail.com>,
+#                         Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from tuxemon.core.event import get_npc
+from tuxemon.core.event.eventaction import EventAction
+
+
+class NpcFollowAction(EventAction):
+    """ Makes an NPC follow another NPC or the player
+
+    Valid Parameters: npc_slug, target_slug
+
+    The target_slug parameter can be an npc slug or "player".  If it is
+    left out, the NPC stops following.
+    """
+    name = "npc_follow"
+    valid_parameters = [
+        (str, "npc_slug"),
+        ((str, None), "target_slug")
+    ]
+
+    def start(self):
+        npc = get_npc(self.game, self.parameters.npc_slug)
+        if npc is None:
+            return
+
+        if not self.parameters.target_slug:
+            npc.follow(None)
+            return
+
+        target = get_npc(self.game, self.parameters.target_slug)
+        if target is not None:
+            npc.follow(target.slug)
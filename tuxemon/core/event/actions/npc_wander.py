@@ -24,9 +24,6 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-import math
-import random
-
 from tuxemon.core.event import get_npc
 from tuxemon.core.event.eventaction import EventAction
 
@@ -34,6 +31,9 @@ from tuxemon.core.event.eventaction import EventAction
 class NpcWanderAction(EventAction):
     """ Makes an NPC wander around the map
 
+    The NPC takes a step in a random direction every 0.5 to 1.0 times
+    the frequency, in seconds.  A frequency of 0 stops wandering.
+
     Valid Parameters: npc_slug, frequency
     """
     name = "npc_wander"
@@ -44,40 +44,16 @@ class NpcWanderAction(EventAction):
 
     def start(self):
         npc = get_npc(self.game, self.parameters.npc_slug)
-        world = self.game.get_state_name("WorldState")
-
-        def move():
-            # Don't interrupt existing movement
-            if npc.moving or npc.path:
-                return
-
-            # Suspend wandering if a dialog window is open
-            # TODO: this should only be done for the NPC the player is conversing with, not everyone
-            for state in self.game.active_states:
-                if state.name == "DialogState":
-                    return
-
-            # Choose a random direction that is free and walk toward it
-            origin = (int(npc.tile_pos[0]), int(npc.tile_pos[1]))
-            exits = world.get_exits(origin)
-            if exits:
-                npc.path = [random.choice(exits)]
-                npc.next_waypoint()
-
-        def schedule():
-            # The timer is randomized between 0.5 and 1.0 of the frequency parameter
-            # Frequency can be set to 0 to indicate that we want to stop wandering
-            world.remove_animations_of(schedule)
-            if npc is None or self.parameters.frequency == 0:
-                return
-            else:
-                frequency = 1
-                if self.parameters.frequency:
-                    frequency = min(5, max(0.5, self.parameters.frequency))
-                time = (0.5 + 0.5 * random.random()) * frequency
-                world.task(schedule, time)
-
-            move()
-
-        # Schedule the first move
-        schedule()
+        if npc is None:
+            return
+
+        frequency = self.parameters.frequency
+        if frequency == 0:
+            npc.wander(None)
+            return
+
+        if frequency:
+            frequency = min(5, max(0.5, frequency))
+        else:
+            frequency = 1
+        npc.wander(frequency)
@@ -25,8 +25,8 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import logging
+import os.path
 
-from tuxemon.core import prepare
 from tuxemon.core.event.eventaction import EventAction
 from tuxemon.core.tools import load_animation_from_frames
 
@@ -60,7 +60,7 @@ class PlayMapAnimationAction(EventAction):
         # "position" can be either a (x, y) tile coordinate or "player"
         animation_name = self.parameters.animation_name
         duration = self.parameters.duration
-        directory = prepare.fetch("animations", "tileset")
+        directory = os.path.join("animations", "tileset")
 
         if self.parameters.loop == "loop":
             loop = True
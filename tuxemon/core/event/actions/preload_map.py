@@ -53,7 +53,6 @@ class PreloadMapAction(EventAction):
         # Get the map name to preload
         mapname = prepare.fetch("maps", str(self.parameters[0]))
 
-        if mapname not in world.preloaded_maps.keys():
-            # TODO: We should do this asyncronously?
+        if mapname not in world.preloaded_maps:
             logger.debug("preloading map: {}".format(mapname))
             world.preload_map(mapname)
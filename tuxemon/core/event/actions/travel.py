@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (c) 2014-2017 William Edwards <shadowapex@gmail.com>,
+#                         Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from tuxemon.core.event import get_npc
+from tuxemon.core.event.eventaction import EventAction
+
+
+class TravelAction(EventAction):
+    """ Walk the player to a location on any map, or an npc within its map
+
+    The route goes through the teleport events of the maps on the way.
+    Teleports only move the player, so an npc cannot travel to another
+    map.  This action does not wait for the destination to be reached,
+    since the events of the map are stopped when the map changes.
+
+    Valid Parameters: npc_slug, map_name, tile_pos_x, tile_pos_y
+    """
+    name = "travel"
+    valid_parameters = [
+        (str, "npc_slug"),
+        (str, "map_name"),
+        (int, "tile_pos_x"),
+        (int, "tile_pos_y")
+    ]
+
+    def start(self):
+        npc = get_npc(self.game, self.parameters.npc_slug)
+        if npc is None:
+            return
+        npc.travel(self.parameters.map_name, (self.parameters.tile_pos_x, self.parameters.tile_pos_y))
@@ -24,7 +24,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, INPUT
 from tuxemon.core.platform.const import intentions
 
 
@@ -32,6 +32,7 @@ class ButtonPressedCondition(EventCondition):
     """ Checks to see if a particular key was pressed
     """
     name = "button_pressed"
+    reads = frozenset((INPUT,))
 
     def test(self, game, condition):
         """ Checks to see if a particular key was pressed
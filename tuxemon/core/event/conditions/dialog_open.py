@@ -24,13 +24,14 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, STATES
 
 
 class DialogOpenCondition(EventCondition):
     """ Checks to see if a dialog window is open.
     """
     name = "dialog_open"
+    reads = frozenset((STATES,))
 
     def test(self, game, condition):
         """ Checks to see if a dialog window is open.
@@ -24,13 +24,14 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, PARTY
 
 
 class EvolveMonstersCondition(EventCondition):
     """ Checks to see if monsters can be evolved on the specified evolutionary path
     """
     name = "evolve_monsters"
+    reads = frozenset((PARTY,))
 
     def test(self, game, condition):
         """Checks to see if a monster can be evolved on the specified evolutionary path
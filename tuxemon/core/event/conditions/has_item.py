@@ -27,7 +27,7 @@ from __future__ import unicode_literals
 from operator import eq, gt, lt, ge, le
 
 from tuxemon.core.event import get_npc
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, INVENTORY, POSITION
 
 cmp_dict = {
     None: ge,
@@ -55,6 +55,7 @@ class HasItemCondition(EventCondition):
     if quantity is None, then any number of items over 0 will return True ( quantity >= 1 )
     """
     name = "has_item"
+    reads = frozenset((INVENTORY, POSITION))
 
     def test(self, game, condition):
         """ Checks to see the player is has a monster in his party
@@ -24,13 +24,14 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, PARTY
 
 
 class HasMonsterCondition(EventCondition):
     """ Checks to see if an NPC is facing a tile position
     """
     name = "has_monster"
+    reads = frozenset((PARTY,))
 
     def test(self, game, condition):
         """Checks to see the player is has a monster in his party
@@ -24,13 +24,14 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, PARTY
 
 
 class MonsterPropertyCondition(EventCondition):
     """ Checks to see if a monster property or condition is as asked
     """
     name = "monster_property"
+    reads = frozenset((PARTY,))
 
     def test(self, game, condition):
         """Checks to see if a monster property or condition is as asked
@@ -31,6 +31,7 @@ class TrueCondition(EventCondition):
     """ This function always returns true unless the operator is set to "is_not"
     """
     name = "true"
+    reads = frozenset()
 
     def test(self, game, condition):
         """ This function always returns true unless the operator is set to "is_not"
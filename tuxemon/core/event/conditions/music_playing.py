@@ -24,7 +24,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, MUSIC, STATES
 from tuxemon.core.platform import mixer
 
 
@@ -32,6 +32,7 @@ class MusicPlayingCondition(EventCondition):
     """ Checks to see if a particular piece of music is playing or not.
     """
     name = "music_playing"
+    reads = frozenset((MUSIC, STATES))
 
     def test(self, game, condition):
         """ Checks to see if a particular piece of music is playing or not.
@@ -25,13 +25,14 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from tuxemon.core.event import get_npc
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION
 
 
 class NPCAtCondition(EventCondition):
     """ Checks to see if an npc is at a current position on the map.
     """
     name = "npc_at"
+    reads = frozenset((POSITION,))
 
     def test(self, game, condition):
         """ Checks to see if an npc is at a current position on the map.
@@ -25,13 +25,14 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from tuxemon.core.event import get_npc
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION
 
 
 class NPCExistsCondition(EventCondition):
     """ Checks to see if a particular NPC object exists in the current list of NPCs.
     """
     name = "npc_exists"
+    reads = frozenset((POSITION,))
 
     def test(self, game, condition):
         """ Checks to see if a particular NPC object exists in the current list of NPCs.
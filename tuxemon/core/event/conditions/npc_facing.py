@@ -25,13 +25,14 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from tuxemon.core.event import get_npc
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION
 
 
 class NPCFacingCondition(EventCondition):
     """ Checks to see where an NPC is facing
     """
     name = "npc_facing"
+    reads = frozenset((POSITION,))
 
     def test(self, game, condition):
         """ Checks to see where an NPC is facing
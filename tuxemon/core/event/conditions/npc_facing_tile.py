@@ -27,7 +27,7 @@ from __future__ import unicode_literals
 import logging
 
 from tuxemon.core.event import get_npc
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +36,7 @@ class NPCFacingTileCondition(EventCondition):
     """ Checks to see if an NPC is facing a tile position
     """
     name = "npc_facing_tile"
+    reads = frozenset((POSITION,))
 
     def test(self, game, condition):
         """ Checks to see if an NPC is facing a tile position
@@ -26,7 +26,7 @@ from __future__ import unicode_literals
 
 import logging
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, PARTY
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +35,7 @@ class PartySizeCondition(EventCondition):
     """ Checks to see where an NPC is facing
     """
     name = "party_size"
+    reads = frozenset((PARTY,))
 
     def test(self, game, condition):
         """Perform various checks about the player's party size. With this condition you can see if
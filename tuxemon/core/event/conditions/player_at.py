@@ -24,13 +24,15 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION
 
 
 class PlayerAtCondition(EventCondition):
     """ Checks to see if an npc is at a current position on the map.
     """
     name = "player_at"
+    player_area_margin = 0
+    reads = frozenset((POSITION,))
 
     def test(self, game, condition):
         """Checks to see if the player is at a current position on the map.
@@ -24,13 +24,14 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION
 
 
 class PlayerFacingCondition(EventCondition):
     """ Checks to see where an NPC is facing
     """
     name = "player_facing"
+    reads = frozenset((POSITION,))
 
     def test(self, game, condition):
         """Checks to see where the player is facing
@@ -27,7 +27,7 @@ from __future__ import unicode_literals
 import logging
 
 from tuxemon.core.event import get_npc
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +36,7 @@ class PlayerFacingNPCCondition(EventCondition):
     """ Checks to see the player is next to and facing a particular NPC
     """
     name = "player_facing_npc"
+    reads = frozenset((POSITION,))
 
     def test(self, game, condition):
         """ Checks to see the player is next to and facing a particular NPC
@@ -26,7 +26,7 @@ from __future__ import unicode_literals
 
 import logging
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +35,8 @@ class PlayerFacingTileCondition(EventCondition):
     """ Checks to see if an NPC is facing a tile position
     """
     name = "player_facing_tile"
+    player_area_margin = 1
+    reads = frozenset((POSITION,))
 
     def test(self, game, condition):
         """Checks to see the player is facing a tile position
@@ -53,6 +53,7 @@ class PlayerMovedCondition(EventCondition):
 
     """
     name = "player_moved"
+    side_effects = True
 
     def test(self, game, condition):
         """Checks to see the player has just moved into this tile. Using this condition will
@@ -94,8 +95,10 @@ class PlayerMovedCondition(EventCondition):
         # check where the npc is going, not where it is
         move_destination = npc.move_destination
 
-        # a hash/id of sorts for the condition
-        condition_str = str(condition)
+        # a hash/id of sorts for the condition; compiled conditions have an integer id
+        condition_str = getattr(condition, "id", None)
+        if condition_str is None:
+            condition_str = str(condition)
 
         stopped = move_destination is None
         collide_next = False if stopped else collide(condition, move_destination)
@@ -26,7 +26,7 @@ from __future__ import unicode_literals
 
 from tuxemon.core.event.conditions.button_pressed import ButtonPressedCondition
 from tuxemon.core.event.conditions.player_facing_tile import PlayerFacingTileCondition
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, POSITION, INPUT
 from tuxemon.core.map import MapCondition
 
 
@@ -34,6 +34,8 @@ class ToUseTileCondition(EventCondition):
     """ Checks if we are attempting to talk to an npc
     """
     name = "to_use_tile"
+    player_area_margin = 1
+    reads = frozenset((POSITION, INPUT))
 
     def test(self, game, condition):
         """ Checks to see the player is next to and facing a particular tile and that the Return button is pressed.
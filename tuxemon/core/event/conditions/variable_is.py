@@ -24,7 +24,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, VARIABLES
 from tuxemon.core.tools import number_or_variable
 
 import logging
@@ -37,6 +37,7 @@ class VariableIsCondition(EventCondition):
     return true.
     """
     name = "variable_is"
+    reads = frozenset((VARIABLES,))
 
     def test(self, game, condition):
         """ Checks to see if a player game variable meets a given condition. This will look
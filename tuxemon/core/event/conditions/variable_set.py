@@ -24,7 +24,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
-from tuxemon.core.event.eventcondition import EventCondition
+from tuxemon.core.event.eventcondition import EventCondition, VARIABLES
 
 
 class VariableSetCondition(EventCondition):
@@ -33,6 +33,7 @@ class VariableSetCondition(EventCondition):
     return true.
     """
     name = "variable_set"
+    reads = frozenset((VARIABLES,))
 
     def test(self, game, condition):
         """ Checks to see if a player game variable has been set. This will look for a particular
@@ -103,43 +103,58 @@ class EventAction(object):
     valid_parameters = list()
     _param_factory = None
 
-    def __init__(self, game, parameters):
+    def __init__(self, game, parameters, parsed_parameters=None):
         """
 
         :type game: tuxemon.core.control.Control
         :type parameters: list
+        :param parsed_parameters: parameters returned by parse_parameters, if already parsed
         """
         self.game = game
 
+        # if you need the parameters before they are processed, use this
+        self.raw_parameters = parameters
+
+        # the event engine parses the parameters of map actions once, when the map is loaded
+        if parsed_parameters is None:
+            parsed_parameters = self.parse_parameters(parameters)
+        self.parameters = parsed_parameters
+
+        self._done = False
+
+    @classmethod
+    def parse_parameters(cls, parameters):
+        """ Return the parameters cast to the types in valid_parameters
+
+        Returns None if the parameters are not valid
+
+        :type parameters: list
+        :rtype: namedtuple or list
+        """
         # TODO: METACLASS
         # make a namedtuple class that will generate the parameters
         # the patching of the class attribute should only happen once
-        if self.__class__._param_factory is None:
-            self.__class__._param_factory = namedtuple("parameters", [i[1] for i in self.valid_parameters])
+        if cls._param_factory is None:
+            cls._param_factory = namedtuple("parameters", [i[1] for i in cls.valid_parameters])
 
-        # if you need the parameters before they are processed, use this
-        self.raw_parameters = parameters
-
-        # parse parameters
         try:
-            if self.valid_parameters:
+            if cls.valid_parameters:
 
                 # cast the parameters to the correct type, as defined in cls.valid_parameters
-                values = self.cast_values(parameters)
-                self.parameters = self._param_factory(*values)
+                values = cls.cast_values(parameters)
+                return cls._param_factory(*values)
             else:
-                self.parameters = parameters
+                return parameters
 
         except:
-            logger.error("error while parsing for {}".format(self.name))
+            logger.error("error while parsing for {}".format(cls.name))
             logger.error("cannot parse parameters: {}".format(parameters))
-            logger.error(self.valid_parameters)
+            logger.error(cls.valid_parameters)
             logger.error("please check the parameters and verify they are correct")
-            self.parameters = None
-
-        self._done = False
+            return None
 
-    def cast_values(self, parameters):
+    @classmethod
+    def cast_values(cls, parameters):
         """ Change all the string values to the expected type
 
         This will also check and enforce the correct parameters for actions
@@ -177,15 +192,15 @@ class EventAction(object):
 
             except ValueError:
                 logger.error("Invalid parameters passed:")
-                logger.error("expected: {}".format(self.valid_parameters))
-                logger.error("got: {}".format(self.raw_parameters))
+                logger.error("expected: {}".format(cls.valid_parameters))
+                logger.error("got: {}".format(parameters))
 
         try:
-            return list(map(cast, zip_longest(self.valid_parameters, parameters)))
+            return list(map(cast, zip_longest(cls.valid_parameters, parameters)))
         except ValueError:
             logger.error("Invalid parameters passed:")
-            logger.error("expected: {}".format(self.valid_parameters))
-            logger.error("got: {}".format(self.raw_parameters))
+            logger.error("expected: {}".format(cls.valid_parameters))
+            logger.error("got: {}".format(parameters))
             raise
 
     def __enter__(self):
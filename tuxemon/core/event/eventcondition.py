@@ -31,6 +31,17 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+# What conditions read.  The event engine caches the results of events,
+# until something they read changes.
+VARIABLES = "variables"   # game variables of the player
+INVENTORY = "inventory"   # items of the player and npcs
+PARTY = "party"           # monsters of the player
+POSITION = "position"     # npcs in the world, their positions and facing
+INPUT = "input"           # buttons pressed this frame
+MUSIC = "music"           # music playing
+STATES = "states"         # game states which are running
+ALL_INPUTS = frozenset((VARIABLES, INVENTORY, PARTY, POSITION, INPUT, MUSIC, STATES))
+
 
 class EventCondition(object):
     """
@@ -38,6 +49,18 @@ class EventCondition(object):
     """
     name = "GenericCondition"
 
+    # If not None, the condition can only be true when the player is within
+    # this many tiles of the condition area.  Used to skip events far away
+    # from the player.
+    player_area_margin = None
+
+    # True if testing the condition changes the game, so it cannot be skipped
+    side_effects = False
+
+    # What the condition reads, from the inputs above.  None if unknown,
+    # so the condition is tested every frame.
+    reads = None
+
     def __init__(self):
         pass
 
@@ -30,7 +30,9 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import logging
+import math
 import os.path
+from collections import defaultdict
 from contextlib import contextmanager
 from lxml import etree
 from textwrap import dedent
@@ -38,10 +40,17 @@ from textwrap import dedent
 from tuxemon.constants import paths
 from tuxemon.core import prepare
 from tuxemon.core import plugin
+from tuxemon.core.event import CompiledAction, CompiledCondition, CompiledEvent
+from tuxemon.core.event.eventcondition import ALL_INPUTS, INPUT, MUSIC, POSITION, STATES
+from tuxemon.core.platform import mixer
 from tuxemon.core.platform.const import buttons
 
 logger = logging.getLogger(__name__)
 
+# integer ids of conditions, which are the same for the whole session.
+# conditions with the same data share an id, so they share state, too.
+condition_ids = dict()
+
 
 class RunningEvent(object):
     """ Manage MapEvents that are used during gameplay
@@ -69,11 +78,11 @@ class RunningEvent(object):
     def get_next_action(self):
         """ Get the next action to execute, if any
 
-        Returns MapActions, which are just data from the map, not live objects
+        Returns CompiledActions, which are just data from the map, not live objects
 
         None will be returned if the MapEvent is finished
 
-        :rtype: core.event.MapAction
+        :rtype: core.event.CompiledAction
         """
         # if None, then make a new one
         try:
@@ -87,6 +96,222 @@ class RunningEvent(object):
         return action
 
 
+class EventIndex(object):
+    """ Map events indexed by the tiles where they can start
+
+    Most events start with a condition like "is player_at", which can only
+    be true when the player is in the area of the condition.  These events
+    are indexed by the tiles of that area, so only the events near the
+    player are checked.  Other events are global, and always checked.
+
+    An event is only indexed if the conditions tested before the area
+    condition have no side effects, so skipping the event is the same as
+    testing it: `all` stops at the first false condition.
+    """
+
+    def __init__(self, events, conditions):
+        """
+        :param list events: EventObjects
+        :param dict conditions: condition names => EventCondition classes
+        """
+        self.events = events
+        self.global_events = list()
+        self.tiles = defaultdict(list)
+
+        for index, map_event in enumerate(events):
+            area = self.get_area(map_event, conditions)
+            if area is None:
+                self.global_events.append(index)
+                continue
+            x, y, w, h = area
+            for tx in range(x, x + w):
+                for ty in range(y, y + h):
+                    self.tiles[(tx, ty)].append(index)
+
+    @staticmethod
+    def get_area(map_event, conditions):
+        """ Return the area where the player must be for the event to start
+
+        :type map_event: core.event.EventObject
+        :param dict conditions: condition names => EventCondition classes
+        :rtype: tuple or None
+        :returns: (x, y, width, height) in tiles, or None if the event is global
+        """
+        for cond in map_event.conds:
+            condition = conditions.get(cond.type)
+            if condition is None:
+                # not loaded; keep logging it
+                return None
+            margin = condition.player_area_margin
+            if cond.operator == "is" and margin is not None:
+                return (cond.x - margin, cond.y - margin,
+                        cond.width + margin * 2, cond.height + margin * 2)
+            if condition.side_effects:
+                return None
+        return None
+
+    def get_events(self, position):
+        """ Return the events which may start with the player at a position
+
+        Events are returned in their original order.
+
+        :param position: (x, y) of the player, in tiles
+        :rtype: list
+        """
+        found = set(self.global_events)
+        # the player may be between two tiles
+        xs = {int(math.floor(position[0])), int(math.ceil(position[0]))}
+        ys = {int(math.floor(position[1])), int(math.ceil(position[1]))}
+        tiles = self.tiles
+        for x in xs:
+            for y in ys:
+                found.update(tiles.get((x, y), ()))
+        events = self.events
+        return [events[i] for i in sorted(found)]
+
+
+class EventResultCache(object):
+    """ Results of the conditions of events, kept until their inputs change
+
+    Conditions declare what they read, such as game variables or the
+    positions of npcs.  An event is only tested again when one of the
+    inputs of its conditions was invalidated since it was tested.  Events
+    with a condition which does not declare its inputs, or which has side
+    effects, are tested every frame.
+
+    Inputs are invalidated:
+
+    * by `invalidate`
+    * when positions, buttons, music or game states change, checked every frame
+    * everything, when actions run or another state is on top of the world,
+      since they can change anything
+
+    Results are kept for each compiled event object, since some maps have
+    several events with the same id.
+    """
+
+    def __init__(self):
+        self.versions = dict.fromkeys(ALL_INPUTS, 0)
+        self.clock = 0
+        self.events = None
+        self.results = dict()
+        self.reads = dict()
+        self.signatures = dict()
+
+    def invalidate(self, *inputs):
+        """ Mark inputs as changed, so events which read them are tested again
+
+        :param inputs: inputs from core.event.eventcondition; all if none given
+        :rtype: None
+        """
+        self.clock += 1
+        for name in inputs or ALL_INPUTS:
+            self.versions[name] = self.clock
+
+    def reset(self, events):
+        """ Forget all results; use when the events change
+
+        :param list events: compiled events of the map
+        :rtype: None
+        """
+        self.events = events
+        self.results = dict()
+        self.reads = dict()
+
+    def check_inputs(self, game):
+        """ Invalidate the inputs which changed since the last frame
+
+        :type game: core.control.Control
+        :rtype: None
+        """
+        states = game.active_states
+        world = None
+        for state in states:
+            if state.__class__.__name__ == "WorldState":
+                world = state
+                break
+
+        # other states may change anything
+        if world is None or states[0] is not world:
+            self.invalidate()
+
+        signatures = {
+            STATES: (tuple(states), game.player1),
+            INPUT: tuple(game.key_events),
+            MUSIC: (game.current_music.get("song"), mixer.music.get_busy()),
+            POSITION: self.get_positions(world),
+        }
+        changed = [k for k, v in signatures.items() if self.signatures.get(k) != v]
+        if changed:
+            self.invalidate(*changed)
+        self.signatures = signatures
+
+    @staticmethod
+    def get_positions(world):
+        """ Return the positions and facing of the npcs of the world
+
+        :rtype: tuple
+        """
+        if world is None:
+            return None
+        return tuple(
+            (slug, tuple(npc.tile_pos), npc.facing, npc.move_destination)
+            for slug, npc in world.npcs.items()
+        )
+
+    def get_reads(self, map_event, conditions):
+        """ Return what the conditions of an event read, or None if unknown
+
+        :type map_event: core.event.CompiledEvent
+        :param dict conditions: condition names => EventCondition classes
+        :rtype: frozenset or None
+        """
+        try:
+            return self.reads[id(map_event)]
+        except KeyError:
+            pass
+
+        reads = frozenset()
+        for cond in map_event.conds:
+            condition = conditions.get(cond.type)
+            if condition is None or condition.reads is None or condition.side_effects:
+                reads = None
+                break
+            reads |= condition.reads
+
+        self.reads[id(map_event)] = reads
+        return reads
+
+    def get(self, map_event, conditions):
+        """ Return the cached result of an event, or None if it must be tested
+
+        :type map_event: core.event.CompiledEvent
+        :param dict conditions: condition names => EventCondition classes
+        :rtype: bool or None
+        """
+        reads = self.get_reads(map_event, conditions)
+        if reads is None:
+            return None
+        try:
+            tested, result = self.results[id(map_event)]
+        except KeyError:
+            return None
+        versions = self.versions
+        for name in reads:
+            if versions[name] > tested:
+                return None
+        return result
+
+    def set(self, map_event, result):
+        """ Store the result of an event
+
+        :type map_event: core.event.CompiledEvent
+        :param bool result: True if all conditions passed
+        :rtype: None
+        """
+        self.results[id(map_event)] = self.clock, result
+
+
 class EventEngine(object):
     """ A class for the event engine. The event engine checks to see if a group of
     conditions have been met and then executes a set of actions.
@@ -103,8 +328,12 @@ class EventEngine(object):
         self.game = game
 
         self.conditions = dict()
+        self.condition_instances = dict()
         self.actions = dict()
+        self.compiled_events = dict()
         self.running_events = dict()
+        self.event_index = None
+        self.result_cache = EventResultCache()
         self.name = "Event"
         self.current_map = None
         self.timer = 0.0
@@ -202,7 +431,7 @@ class EventEngine(object):
     def get_condition(self, name):
         """ Get a condition that is loaded into the engine
 
-        A new instance will be returned each time
+        Conditions do not keep state, so the same instance is returned each time
 
         Return None if condition is not loaded
 
@@ -211,6 +440,11 @@ class EventEngine(object):
         :rtype: core.event.eventcondition.EventCondition
 
         """
+        try:
+            return self.condition_instances[name]
+        except KeyError:
+            pass
+
         # TODO: make generic
         try:
             condition = self.conditions[name]
@@ -220,7 +454,110 @@ class EventEngine(object):
             logger.error(error)
 
         else:
-            return condition()
+            instance = condition()
+            self.condition_instances[name] = instance
+            return instance
+
+    def compile_condition(self, cond_data):
+        """ Resolve the test of a condition, so it can be checked without lookups
+
+        The test is None if the condition is not loaded
+
+        :type cond_data: core.event.MapCondition
+        :rtype: core.event.CompiledCondition
+        """
+        try:
+            condition_id = condition_ids[str(cond_data)]
+        except KeyError:
+            condition_id = condition_ids[str(cond_data)] = len(condition_ids)
+
+        map_condition = self.get_condition(cond_data.type)
+        test = None if map_condition is None else map_condition.test
+        return CompiledCondition(*(tuple(cond_data) + (condition_id, test, cond_data.operator == "is")))
+
+    def compile_action(self, action_data):
+        """ Resolve the class of an action and parse its parameters once
+
+        The class is None if the action is not loaded
+
+        :type action_data: core.event.MapAction
+        :rtype: core.event.CompiledAction
+        """
+        action_class = self.actions.get(action_data.type)
+        parsed_parameters = None
+        if action_class is not None:
+            parsed_parameters = action_class.parse_parameters(action_data.parameters or list())
+        return CompiledAction(*(tuple(action_data) + (action_class, parsed_parameters)))
+
+    def compile_event(self, map_event):
+        """ Compile the conditions and actions of an event
+
+        :type map_event: core.event.EventObject
+        :rtype: core.event.CompiledEvent
+        """
+        if isinstance(map_event, CompiledEvent):
+            return map_event
+        return CompiledEvent(*(tuple(map_event[:6]) + (
+            tuple(self.compile_condition(i) for i in map_event.conds),
+            tuple(self.compile_action(i) for i in map_event.acts),
+        )))
+
+    def compile_events(self, events):
+        """ Return the compiled events of a list of events
+
+        Lists are compiled once; the map replaces its lists when it changes.
+
+        :type events: list
+        :rtype: list
+        """
+        try:
+            source, compiled = self.compiled_events[id(events)]
+            if source is events:
+                return compiled
+        except KeyError:
+            pass
+
+        compiled = [self.compile_event(i) for i in events]
+
+        # only keep the lists which are still used, so old maps are freed
+        current = self.game.events, self.game.inits, self.game.interacts
+        self.compiled_events = {k: v for k, v in self.compiled_events.items()
+                                if any(v[0] is i for i in current)}
+        self.compiled_events[id(events)] = events, compiled
+        return compiled
+
+    def check_event(self, map_event):
+        """ Return True if all conditions of a compiled event are true
+
+        Conditions which are not loaded are false
+
+        :type map_event: core.event.CompiledEvent
+        :rtype: bool
+        """
+        game = self.game
+        for cond in map_event.conds:
+            try:
+                if cond.test is None or cond.test(game, cond) != cond.expected:
+                    return False
+            except Exception:
+                report_error_context(map_event, cond, game)
+                raise
+        return True
+
+    def create_action(self, compiled_action):
+        """ Return a new instance of a compiled action
+
+        Return None if action is not loaded
+
+        :type compiled_action: core.event.CompiledAction
+        :rtype: core.event.eventaction.EventAction
+        """
+        if compiled_action.action_class is None:
+            logger.error('Error: EventAction "{}" not implemented'.format(compiled_action.type))
+            return None
+
+        return compiled_action.action_class(
+            self.game, compiled_action.parameters or list(), compiled_action.parsed_parameters)
 
     def check_condition(self, cond_data, map_event):
         """ Check if condition is true of false
@@ -254,6 +591,9 @@ class EventEngine(object):
         if parameters is None:
             parameters = list()
 
+        # actions can change anything that conditions read
+        self.result_cache.invalidate()
+
         action = self.get_action(action_name, parameters)
         if action is None:
             logger.debug('map action "{}" is not loaded'.format(action_name))
@@ -282,7 +622,7 @@ class EventEngine(object):
             logger.debug("starting map event: {}".format(map_event))
             logger.debug("Executing action list")
             logger.debug(map_event)
-            token = RunningEvent(map_event)
+            token = RunningEvent(self.compile_event(map_event))
             self.running_events[map_event.id] = token
 
     def process_map_event(self, map_event):
@@ -290,7 +630,7 @@ class EventEngine(object):
 
         Actions will be started, but may finish much later.
 
-        :type map_event: core.event.EventObject
+        :type map_event: core.event.CompiledEvent
         :return: None
         """
         # debugging mode is slower and will check all conditions
@@ -312,7 +652,7 @@ class EventEngine(object):
 
         else:
             # optimal, less debug
-            if all(self.check_condition(cond, map_event) for cond in map_event.conds):
+            if self.check_event(map_event):
                 self.start_event(map_event)
 
     def process_map_events(self, events):
@@ -320,7 +660,7 @@ class EventEngine(object):
 
         Simple now, may become more complex
 
-        :type events: list
+        :param list events: compiled events
         :return: None
         """
         for event in events:
@@ -352,11 +692,67 @@ class EventEngine(object):
         # TODO: find solution that doesn't nuke the init list
         # TODO: make event engine generic, so can be used in global scope, not just maps
         if self.game.inits:
-            self.process_map_events(self.game.inits)
+            self.process_map_events(self.compile_events(self.game.inits))
             self.game.inits = list()
 
         # process any other events
-        self.process_map_events(self.game.events)
+        events = self.get_nearby_events()
+        if prepare.CONFIG.event_cache and not prepare.CONFIG.collision_map:
+            self.process_cached_map_events(events)
+        else:
+            self.process_map_events(events)
+
+    def process_cached_map_events(self, events):
+        """ Check conditions of events which read something that changed.  Start actions
+
+        Events are started if their cached result is True, like when all
+        their conditions are checked.  If `event_cache_check` is enabled,
+        cached results are compared to checking all conditions.
+
+        :param list events: compiled events
+        :return: None
+        """
+        cache = self.result_cache
+        compiled = self.compile_events(self.game.events)
+        if cache.events is not compiled:
+            cache.reset(compiled)
+        cache.check_inputs(self.game)
+
+        check = prepare.CONFIG.event_cache_check
+        for map_event in events:
+            result = cache.get(map_event, self.conditions)
+            if result is None:
+                result = self.check_event(map_event)
+                cache.set(map_event, result)
+            elif check:
+                expected = self.check_event(map_event)
+                if expected != result:
+                    logger.error("cached event result is {}, should be {}: {}".format(result, expected, map_event))
+                    result = expected
+                    cache.set(map_event, result)
+
+            if result:
+                self.start_event(map_event)
+
+    def get_nearby_events(self):
+        """ Return the events of the map which may start this frame
+
+        Events which cannot start because the player is far from them
+        are not returned.  All events are returned in debug mode, so they
+        are shown in the event debug overlay.
+
+        :rtype: list
+        """
+        events = self.compile_events(self.game.events)
+        player = self.game.player1
+        if prepare.CONFIG.collision_map or player is None:
+            return events
+
+        # the event list is replaced when the map changes
+        if self.event_index is None or self.event_index.events is not events:
+            self.event_index = EventIndex(events, self.conditions)
+
+        return self.event_index.get_events(player.tile_pos)
 
     def update_running_events(self, dt):
         """ Update the events that are running
@@ -368,6 +764,10 @@ class EventEngine(object):
         """
         to_remove = set()
 
+        # actions can change anything that conditions read
+        if self.running_events:
+            self.result_cache.invalidate()
+
         # Loop through the list of actions and update them
         for i, e in self.running_events.items():
             while 1:
@@ -396,7 +796,7 @@ class EventEngine(object):
 
                     else:
                         # got an action, so start it
-                        action = self.get_action(next_action.type, next_action.parameters)
+                        action = self.create_action(next_action)
 
                         if action is None:
                             # action was not loaded, so, break?  raise exception, idk
@@ -413,6 +813,7 @@ class EventEngine(object):
 
                             # save the action that is running
                             e.current_action = action
+                            e.current_map_action = next_action
 
                 # update the action
                 action = e.current_action
@@ -424,6 +825,7 @@ class EventEngine(object):
                     action.cleanup()
                     e.action_index += 1
                     e.current_action = None
+                    e.current_map_action = None
                     logger.debug("action finished: {}".format(action))
 
                 else:
@@ -453,7 +855,7 @@ class EventEngine(object):
         """
         # has the player pressed the action key?
         if event.pressed and event.button == buttons.A:
-            for map_event in self.game.interacts:
+            for map_event in self.compile_events(self.game.interacts):
                 self.process_map_event(map_event)
 
         return event
@@ -470,34 +872,45 @@ def add_error_context(event, item, game):
     try:
         yield
     except Exception:
-        file_name = game.get_map_filepath()
-        tree = etree.parse(file_name)
-        event_node = tree.find("//object[@id='%s']" % event.id)
-        if item.name is None:
-            # It's an "interact" event, so no condition defined in the map
-            msg = """
-                Error in {file_name}
-                {event}
-                Line {line_number}
-            """.format(
-                file_name=file_name,
-                event=etree.tostring(event_node).decode().split("\n")[0].strip(),
-                line_number=event_node.sourceline,
-            )
-        else:
-            # This is either a condition or an action
-            child_node = event_node.find(".//property[@name='%s']" % (item.name))
-            msg = """
-                Error in {file_name}
-                {event}
-                    ...
-                    {line}
-                Line {line_number}
-            """.format(
-                file_name=file_name,
-                event=etree.tostring(event_node).decode().split("\n")[0].strip(),
-                line=etree.tostring(child_node).decode().strip(),
-                line_number=child_node.sourceline,
-            )
-        print(dedent(msg))
+        report_error_context(event, item, game)
         raise
+
+
+def report_error_context(event, item, game):
+    """ Print where an event which raised an error is in the map file
+
+    :type event: core.event.EventObject
+    :type item: core.event.MapCondition or core.event.MapAction
+    :type game: core.control.Control
+    :rtype None
+    """
+    file_name = game.get_map_filepath()
+    tree = etree.parse(file_name)
+    event_node = tree.find("//object[@id='%s']" % event.id)
+    if item.name is None:
+        # It's an "interact" event, so no condition defined in the map
+        msg = """
+            Error in {file_name}
+            {event}
+            Line {line_number}
+        """.format(
+            file_name=file_name,
+            event=etree.tostring(event_node).decode().split("\n")[0].strip(),
+            line_number=event_node.sourceline,
+        )
+    else:
+        # This is either a condition or an action
+        child_node = event_node.find(".//property[@name='%s']" % (item.name))
+        msg = """
+            Error in {file_name}
+            {event}
+                ...
+                {line}
+            Line {line_number}
+        """.format(
+            file_name=file_name,
+            event=etree.tostring(event_node).decode().split("\n")[0].strip(),
+            line=etree.tostring(child_node).decode().strip(),
+            line_number=child_node.sourceline,
+        )
+    print(dedent(msg))
@@ -41,7 +41,7 @@ import random
 
 from tuxemon.core import tools
 from tuxemon.core import prepare
-from tuxemon.core.db import db, process_targets
+from tuxemon.core.db import db
 from tuxemon.core.locale import T
 
 logger = logging.getLogger(__name__)
@@ -130,7 +130,7 @@ class Item(object):
         self.power = results["power"]
         self.sprite = results["sprite"]
         self.usable_in = results["usable_in"]
-        self.target = process_targets(results["target"])
+        self.target = results["target"]
         self.effect = results["effects"]
         self.surface = tools.load_and_scale(self.sprite)
         self.surface_size_original = self.surface.get_size()
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.loader Background loading of assets.
+#
+"""Load assets on worker threads, so the game loop doesn't hitch.
+
+States request assets they will need soon, and get a future for each
+request.  The future can be checked each frame, and the result used when
+it is ready.  Most loaders also put their results in a cache, such as
+`tools.decoded_cache`, so often the future can be ignored, and the asset
+loaded normally later; it will be a cache hit.
+
+Loaders must not touch the display, so surfaces are never converted on
+worker threads.  Images are only decoded in the background, and are
+converted on the main thread when they are first used.
+
+Requests are done in order of priority, then in the order they were made.
+Requesting an asset that is already requested, and not finished, returns
+the same future.
+
+**Examples:**
+
+>>> future = asset_loader.submit(("sound", "sound_ding"), tools.load_sound, "sound_ding")
+>>> if future.done():
+...     sound = future.result()
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import itertools
+import logging
+import threading
+
+from six.moves import queue
+
+from tuxemon.core import prepare
+
+logger = logging.getLogger(__name__)
+
+# request priorities; lower numbers are loaded first
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+
+class AssetFuture(object):
+    """ The result of a request to load an asset
+
+    """
+
+    def __init__(self, key, priority=NORMAL):
+        self.key = key
+        self.priority = priority
+        self.running = False
+        self.function = None
+        self.args = ()
+        self._event = threading.Event()
+        self._result = None
+        self._exception = None
+        self._callbacks = list()
+        self._lock = threading.Lock()
+
+    def done(self):
+        """ Return True if loading is finished, successfully or not
+
+        :rtype: bool
+        """
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """ Return the loaded asset, waiting for it if needed
+
+        If loading failed, the exception is raised here.
+
+        :param timeout: seconds to wait; None to wait forever
+        :raises: RuntimeError if the timeout expires
+        """
+        if not self._event.wait(timeout):
+            raise RuntimeError("timed out loading {}".format(self.key))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self):
+        """ Return the exception raised while loading, or None
+
+        Does not wait.
+
+        :rtype: Exception or None
+        """
+        return self._exception
+
+    def add_done_callback(self, callback):
+        """ Call a function with this future when loading is finished
+
+        Callbacks are called on the worker thread, or immediately if the
+        future is already done.  Do not touch game state in a callback.
+
+        :param callback: function taking one argument, this future
+        :rtype: None
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def set_result(self, result):
+        self._result = result
+        self._finish()
+
+    def set_exception(self, exception):
+        self._exception = exception
+        self._finish()
+
+    def _finish(self):
+        with self._lock:
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, list()
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                logger.exception("error in callback of {}".format(self.key))
+
+
+class AssetLoader(object):
+    """ Pool of worker threads that load assets in order of priority
+
+    With no workers, requests are loaded immediately on the calling thread,
+    which is useful for debugging and platforms without threads.
+    """
+
+    def __init__(self, workers=2):
+        """
+        :param int workers: number of worker threads
+        """
+        self.workers = workers
+        self._queue = queue.PriorityQueue()
+        self._futures = dict()
+        self._threads = list()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def submit(self, key, function, *args, **kwargs):
+        """ Request an asset
+
+        `function` is called with `args` on a worker thread to load the
+        asset.  If an asset with the same key is requested and not finished,
+        its future is returned instead, and if the new request has a higher
+        priority, the request is moved up the queue.
+
+        :param key: hashable key identifying the asset
+        :param function: function that loads the asset
+        :param args: arguments for function
+        :param priority: keyword only; HIGH, NORMAL or LOW
+
+        :rtype: AssetFuture
+        """
+        priority = kwargs.pop("priority", NORMAL)
+        if kwargs:
+            raise TypeError("unexpected keyword arguments: {}".format(", ".join(kwargs)))
+
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                if future.running or priority >= future.priority:
+                    return future
+            else:
+                future = AssetFuture(key, priority)
+                self._futures[key] = future
+
+            future.priority = priority
+
+        future.function = function
+        future.args = args
+        if self.workers <= 0:
+            self._run(future, function, args)
+        else:
+            self._start()
+            self._queue.put((priority, next(self._counter), future, function, args))
+
+        return future
+
+    def get(self, key):
+        """ Return the future of an unfinished request, or None
+
+        Finished requests are not tracked by the loader; keep the future
+        returned by `submit` to get the result.
+
+        :param key: key of the asset
+        :rtype: AssetFuture or None
+        """
+        return self._futures.get(key)
+
+    def wait(self, key, default=None):
+        """ Wait for an unfinished request and return its result
+
+        Use this before loading an asset on the main thread, so an asset
+        which is already loading in the background isn't loaded twice.
+
+        :param key: key of the asset
+        :param default: returned if the asset is not loading, or it is
+            being loaded by the calling thread
+        """
+        future = self._futures.get(key)
+        if future is None or getattr(self._local, "future", None) is future:
+            return default
+        # move it to the front of the queue if it hasn't started yet
+        with self._lock:
+            if not future.running and future.priority > HIGH:
+                future.priority = HIGH
+                self._queue.put((HIGH, next(self._counter), future, future.function, future.args))
+        return future.result()
+
+    def pending(self):
+        """ Return the number of requests that are not finished
+
+        :rtype: int
+        """
+        return len(self._futures)
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name="asset-loader-{}".format(len(self._threads)))
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            priority, count, future, function, args = self._queue.get()
+            # the request was moved up the queue, and already loaded
+            if not future.done():
+                self._run(future, function, args)
+            self._queue.task_done()
+
+    def _run(self, future, function, args):
+        # a request may be queued more than once if its priority changed,
+        # and two workers may pick it up at the same time
+        with future._lock:
+            if future.running:
+                return
+            future.running = True
+
+        self._local.future = future
+        try:
+            result = function(*args)
+        except Exception as e:
+            logger.error("error loading {}: {}".format(future.key, e))
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            self._local.future = None
+            # results live in the caches of the assets, and in the futures
+            # held by the requesters, not here
+            with self._lock:
+                if self._futures.get(future.key) is future:
+                    del self._futures[future.key]
+
+
+# Shared by all states
+asset_loader = AssetLoader(prepare.CONFIG.loader_threads)
@@ -34,18 +34,21 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import logging
+import math
 import re
+from functools import partial
 
 import pyscroll
 import pytmx
-from pytmx.util_pygame import load_pygame
 
-from tuxemon.core import prepare
-from tuxemon.core.euclid import Vector2, Vector3, Point2
+from tuxemon.core import mapcache, prepare
+from tuxemon.core.cache import surface_size
+from tuxemon.core.collision import CollisionGrid
+from tuxemon.core.vector import Vector2, Vector3, Point2
 from tuxemon.core.event import EventObject
 from tuxemon.core.event import MapAction
 from tuxemon.core.event import MapCondition
-from tuxemon.core.tools import scaled_image_loader
+from tuxemon.core.tools import load_tileset_image, scaled_image_loader
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +67,13 @@ dirs2 = {
 }
 # just the first letter of the direction => vector
 short_dirs = {d[0]: dirs2[d] for d in dirs2}
+# direction => (x, y) offset to the next tile, for tile positions as tuples
+tile_offsets = {
+    "up": (0, -1),
+    "down": (0, 1),
+    "left": (-1, 0),
+    "right": (1, 0),
+}
 
 # complimentary directions
 pairs = {
@@ -91,10 +101,39 @@ def translate_short_path(path, position=(0, 0)):
     """
     position = Point2(*position)
     for char in path.lower():
-        position += short_dirs[char]
+        position = position + short_dirs[char]
         yield position
 
 
+def get_optional_int(properties, name):
+    """ Return an integer map property, or None if the map does not have it
+
+    :param dict properties: properties of a map
+    :param name: name of the property
+    :rtype: int or None
+    """
+    value = properties.get(name)
+    return None if value is None else int(value)
+
+
+def get_renderer_byte_size(renderer):
+    """ Return an estimate of the memory used by the tile buffer of a renderer
+
+    The buffer is the size of the view, rounded up to tiles, plus one
+    tile, in 32 bit pixels.
+
+    :param pyscroll.BufferedRenderer renderer: renderer, or None
+    :rtype: int
+    """
+    if renderer is None:
+        return 0
+    tw, th = renderer.data.tile_size
+    width, height = renderer.view_rect.size
+    columns = int(math.ceil(width / tw)) + 1
+    rows = int(math.ceil(height / th)) + 1
+    return columns * tw * rows * th * 4
+
+
 def get_direction(base, target):
     y_offset = base[1] - target[1]
     x_offset = base[0] - target[0]
@@ -122,50 +161,392 @@ def proj(point):
         return point[0], point[1]
 
 
-class PathfindNode(object):
-    """ Used in path finding search
+class Tile(object):
+    """A class to create tile objects. Tile objects are used to keep track of tile properties such
+    as the layer it's on, its position, surface, and other properties.
+
+    """
+
+    def __init__(self, name, surface, tileset):
+        self.name = name
+        self.surface = surface
+        self.layer = None
+        self.type = None
+        self.tileset = tileset
+
+
+def round_to_divisible(x, base=16):
+    """Rounds a number to a divisible base. This is used to round collision areas that aren't
+    defined well. This function assists in making sure collisions work if the map creator
+    didn't set the collision areas to round numbers.
+
+    **Examples:**
+
+    >>> round_to_divisible(31.23, base=16)
+    32
+    >>> round_to_divisible(17.8, base=16)
+    16
+
+    :param x: The number we want to round.
+    :param base: The base that we want our number to be divisible by. (Default: 16)
+
+    :type x: Float
+    :type base: Integer
+
+    :rtype: Integer
+    :returns: Rounded number that is divisible by "base".
+    """
+    return int(base * round(float(x) / base))
+
+def split_escaped(string_to_split, delim=","):
+    """Splits a string by the specified deliminator excluding escaped
+    deliminators.
+
+    :param string_to_split: The string to split.
+    :param delim: The deliminator to split the string by.
+
+    :type string_to_split: Str
+    :type delim: Str
+
+    :rtype: List
+    :returns: A list of the splitted string.
+
+    """
+    # Split by "," unless it is escaped by a "\"
+    split_list = re.split(r'(?<!\\)' + delim, string_to_split)
+
+    # Remove the escape character from the split list
+    split_list = [w.replace('\,', ',') for w in split_list]
+
+    # strip whitespace around each
+    split_list = [i.strip() for i in split_list]
+
+    return split_list
+
+
+def load_event(obj, tile_size):
+    """ Return an event object from a Tiled object of a map
+
+    :param obj: pytmx.TiledObject
+    :param tile_size: (width, height) of the map tiles, in pixels
+    :rtype: EventObject
     """
 
-    def __init__(self, value, parent=None):
-        self.parent = parent
-        self.value = value
-        if self.parent:
-            self.depth = self.parent.depth + 1
+    conds = []
+    acts = []
+
+    # Conditions & actions are stored as Tiled properties.
+    # We need to sort them by name, so that "act1" comes before "act2" and so on..
+    keys = sorted(obj.properties.keys())
+
+    x = int(obj.x / tile_size[0])
+    y = int(obj.y / tile_size[1])
+    w = int(obj.width / tile_size[0])
+    h = int(obj.height / tile_size[1])
+
+    for k in keys:
+        if k.startswith('cond'):
+            words = obj.properties[k].split(' ', 2)
+
+            # Conditions have the form 'operator type parameters'.
+            operator, cond_type = words[0:2]
+
+            # If this condition has parameters, split them into a
+            # list
+            if len(words) > 2:
+                args = split_escaped(words[2])
+            else:
+                args = list()
+
+            # Create a condition object using named tuples
+            condition = MapCondition(cond_type, args, x, y, w, h, operator, k)
+            conds.append(condition)
+
+        elif k.startswith('act'):
+            words = obj.properties[k].split(' ', 1)
+
+            # Actions have the form 'type parameters'.
+            act_type = words[0]
+
+            # If this action has parameters, split them into a
+            # list
+            if len(words) > 1:
+                args = split_escaped(words[1])
+            else:
+                args = list()
+
+            # Create an action object using named tuples
+            action = MapAction(act_type, args, k)
+            acts.append(action)
+
+    for k in keys:
+        if k.startswith('behav'):
+            words = obj.properties[k].split(' ', 1)
+
+            # Actions have the form 'type parameters'.
+            behav_type = words[0]
+
+            # If this action has parameters, split them into a
+            # list
+            if len(words) > 1:
+                args = split_escaped(words[1])
+            else:
+                args = list()
+
+            if behav_type == "talk":
+                conds.insert(0, MapCondition("to_talk", args, x, y, w, h, "is", k))
+                acts.insert(0, MapAction("npc_face", [args[0], "player"], k))
+
+    # TODO: move this to some post-creation function, as more may be needed
+    # add a player_facing_tile condition automatically
+    if obj.type == "interact":
+        cond_data = MapCondition("player_facing_tile", list(), x, y, w, h, "is", None)
+        logger.debug(cond_data)
+        conds.append(cond_data)
+
+    return EventObject(obj.id, obj.name, x, y, w, h, conds, acts)
+
+
+def build_collision_maps(collisions, collision_lines, tile_size):
+    """Builds the collision data from the collision objects of the map file.
+
+    **Examples:**
+
+    The collision map is a set of (x,y) coordinates that the player cannot walk
+    through. This set is generated based on collision regions defined in the
+    map file.
+
+    :param collisions: pytmx.TiledObjects of type "collision"
+    :param collision_lines: pytmx.TiledObjects of type "collision-line"
+    :param tile_size: (width, height) of the map tiles, in pixels
+
+    :rtype: Tuple
+    :returns: A dict of collision coordinates; a set of collision lines.
+    """
+    # Create a list of all tiles that we cannot walk through
+    collision_map = {}
+
+    # Create a list of all pairs of adjacent tiles that are impassable (aka walls)
+    # example: ((5,4),(5,3), both)
+    collision_lines_map = set()
+
+    # Right now our collisions are defined in our tmx file as large regions that the player
+    # can't pass through. We need to convert these areas into individual tile coordinates
+    # that the player can't pass through.
+    # Loop through all of the collision objects in our tmx file.
+    for collision_region in collisions:
+
+        # >>> collision_region.__dict__
+        # {'gid': 0,
+        # 'height': 16,
+        # 'name': None,
+        # 'parent': <TiledMap: "resources/maps/pallet_town-room.tmx">,
+        # 'rotation': 0,
+        # 'type': 'collision',
+        # 'visible': 1,
+        # 'width': 16,
+        # 'x': 176,
+        # 'y': 64}
+
+        # Get the collision area's tile location and dimension in tiles using the tileset's
+        # tile size.
+        x = round_to_divisible(collision_region.x, tile_size[0]) / tile_size[0]
+        y = round_to_divisible(collision_region.y, tile_size[1]) / tile_size[1]
+        width = round_to_divisible(collision_region.width, tile_size[0]) / tile_size[0]
+        height = round_to_divisible(collision_region.height, tile_size[1]) / tile_size[1]
+
+        # Loop through properties and create list of directions for each property
+        if collision_region.properties:
+            enters = []
+            exits = []
+
+            for key in collision_region.properties:
+                if "enter" in key:
+                    for direction in collision_region.properties[key].split():
+                        enters.append(direction)
+                elif "exit" in key:
+                    for direction in collision_region.properties[key].split():
+                        exits.append(direction)
+
+        # Loop through the area of this region and create all the tile coordinates that are
+        # inside this region.
+        for a in range(0, int(width)):
+            for b in range(0, int(height)):
+                collision_tile = (a + x, b + y)
+                collision_map[collision_tile] = None
+
+                # Check if collision region has properties, and is therefore a conditional zone
+                # then add the location and conditions to semi_collision_map
+                if collision_region.properties:
+                    tile_conditions = {}
+                    for key in collision_region.properties.keys():
+                        if "enter" in key:
+                            tile_conditions['enter'] = enters
+                        if "exit" in key:
+                            tile_conditions['exit'] = exits
+                        if "continue" in key:
+                            tile_conditions['continue'] = collision_region.properties[key]
+                    collision_map[collision_tile] = tile_conditions
+
+    # Similar to collisions, except we need to identify the tiles
+    # on either side of the poly-line and prevent moving between
+    # them
+    for collision_line in collision_lines:
+
+        # >>> collision_wall.__dict__
+        # {'name': None,
+        # 'parent': <TiledMap: "resources/maps/test_pathfinding.tmx">,
+        # 'visible': 1,
+        # 'height': 160.0,
+        # 'width': 80.0, '
+        # gid': 0,
+        # 'closed': False,
+        # 'y': 80.0, 'x': 80.0,
+        # 'rotation': 0,
+        # 'type': 'collision-wall',
+        # 'points': ((80.0, 80.0), (80.0, 128.0), (160.0, 128.0), (160.0, 240.0))
+
+        # Another example:
+        # 'points': ((192.0, 80.0), (192.0, 192.0))
+
+        # For each pair of points, get the tiles on either side of the line.
+        # Assumption: A pair of points will only be vertical or horizontal (no diagonal lines)
+
+        if len(collision_line.points) < 2:
+            raise Exception("Error: map has polyline with only one point")
+
+        # get two points, and round them
+        point1 = (round_to_divisible(collision_line.points[0][0], tile_size[0]),
+                  round_to_divisible(collision_line.points[0][1], tile_size[1]))
+        point2 = (round_to_divisible(collision_line.points[1][0], tile_size[0]),
+                  round_to_divisible(collision_line.points[1][1], tile_size[1]))
+
+        # check to see if horizontal or vertical
+        line_type = None
+        if point1[0] == point2[0] and point1[1] != point2[1]:
+            # x's are same, must be vertical
+            line_type = 'vertical'
+        elif point1[0] != point2[0] and point1[1] == point2[1]:
+            # y's are same, must be horizontal
+            line_type = 'horizontal'
         else:
-            self.depth = 0
+            raise Exception("Error: Points on polyline are not strictly horizontal or vertical....")
+
+        if line_type is 'vertical':
+            # get all tile coordinates on either side
+            x = point1[0] / tile_size[0]  # same as point2[0] b/c vertical
+            line_start = point1[1]
+            line_end = point2[1]
+            num_tiles_in_line = abs(line_start - line_end) / tile_size[1]  # [1] b/c vertical
+            curr_y = line_start / tile_size[1]
+            for i in range(int(num_tiles_in_line)):
+                if line_start > line_end:  # slightly different
+                    # behavior depending on
+                    # direction
+                    left_side_tile = (x - 1, curr_y - 1)
+                    right_side_tile = (x, curr_y - 1)
+                    curr_y -= 1
+                else:
+                    left_side_tile = (x - 1, curr_y)
+                    right_side_tile = (x, curr_y)
+                    curr_y += 1
+
+                # TODO - if we want to enable single-direction
+                # walls (i.e. for jumping) then ask map-designer
+                # to include a special property for the direction
+                # to block, and then here we only block in one
+                # direction, not both.
+                collision_lines_map.add((left_side_tile, "right"))
+                collision_lines_map.add((right_side_tile, "left"))
+
+        elif line_type is 'horizontal':
+            # get all tile coordinates on either side
+            y = point1[1] / tile_size[1]  # same as point2[1] b/c horizontal
+            line_start = point1[0]
+            line_end = point2[0]
+            num_tiles_in_line = abs(line_start - line_end) / tile_size[0]  # [0] b/c horizontal
+            curr_x = line_start / tile_size[0]
+            for i in range(int(num_tiles_in_line)):
+                if line_start > line_end:  # slightly different
+                    # behavior depending on
+                    # direction
+                    top_side_tile = (curr_x - 1, y - 1)
+                    bottom_side_tile = (curr_x - 1, y)
+                    curr_x -= 1
+                else:
+                    top_side_tile = (curr_x, y - 1)
+                    bottom_side_tile = (curr_x, y)
+                    curr_x += 1
 
-    def get_parent(self):
-        return self.parent
+                # TODO - if we want to enable single-direction
+                # walls (i.e. for jumping) then ask map-designer
+                # to include a special property for the direction
+                # to block, and then here we only block in one
+                # direction, not both.
+                collision_lines_map.add((top_side_tile, "down"))
+                collision_lines_map.add((bottom_side_tile, "up"))
 
-    def set_parent(self, parent):
-        self.parent = parent
-        self.depth = parent.depth + 1
+    return collision_map, collision_lines_map
 
-    def get_value(self):
-        return self.value
 
-    def get_depth(self):
-        return self.depth
+def load_tmx(filename):
+    """ Parse a TMX map file, without loading its images
 
-    def __str__(self):
-        s = str(self.value)
-        if self.parent is not None:
-            s += str(self.parent)
-        return s
+    Tiles have an ImageReference instead of an image; see core.mapcache.
 
+    :param filename: The path to the tmx map file to load.
+    :rtype: pytmx.TiledMap
+    """
+    return pytmx.TiledMap(filename, image_loader=mapcache.record_image_loader, pixelalpha=True)
 
-class Tile(object):
-    """A class to create tile objects. Tile objects are used to keep track of tile properties such
-    as the layer it's on, its position, surface, and other properties.
 
+def get_tile_size(tmx_data):
+    """ Return the tile size of a map, from its first tileset
+
+    :param pytmx.TiledMap tmx_data: parsed map
+    :rtype: tuple
     """
+    if tmx_data.tilesets:
+        return tmx_data.tilesets[0].tilewidth, tmx_data.tilesets[0].tileheight
+    return prepare.TILE_SIZE
 
-    def __init__(self, name, surface, tileset):
-        self.name = name
-        self.surface = surface
-        self.layer = None
-        self.type = None
-        self.tileset = tileset
+
+def load_events(tmx_data, tile_size):
+    """ Return the event objects of a map, by object type
+
+    :param pytmx.TiledMap tmx_data: parsed map
+    :param tile_size: (width, height) of the map tiles, in pixels
+    :rtype: Dict
+    :returns: lists of EventObjects for "event", "init" and "interact"
+    """
+    events = {"event": [], "init": [], "interact": []}
+    for obj in tmx_data.objects:
+        if obj.type in events:
+            events[obj.type].append(load_event(obj, tile_size))
+    return events
+
+
+def load_collision_grid(tmx_data, tile_size):
+    """ Return the collision grid of a map, from its collision objects
+
+    :param pytmx.TiledMap tmx_data: parsed map
+    :param tile_size: (width, height) of the map tiles, in pixels
+    :rtype: CollisionGrid
+    """
+    collisions = [obj for obj in tmx_data.objects if obj.type == "collision"]
+    collision_lines = [obj for obj in tmx_data.objects if obj.type == "collision-line"]
+    size = tmx_data.width, tmx_data.height
+    return CollisionGrid.from_maps(size, *build_collision_maps(collisions, collision_lines, tile_size))
+
+
+def load_layers(tmx_data):
+    """ Return the visible tile layers of a map, as rows of tile ids
+
+    :param pytmx.TiledMap tmx_data: parsed map
+    :rtype: Dict
+    :returns: layer number => list of rows
+    """
+    return {i: [list(row) for row in tmx_data.layers[i].data] for i in tmx_data.visible_tile_layers}
 
 
 class Map(object):
@@ -177,12 +558,15 @@ class Map(object):
 
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, create_renderer=True):
         self.filename = None
         self.data = None
         self.size = None
         self.renderer = None
 
+        # compiled map, kept until the tile images are loaded
+        self._compiled = None
+
         # Initiate the properties of the map at their default values
         self.edges = ""
 
@@ -193,6 +577,10 @@ class Map(object):
         # set the default layer to draw character sprites
         self.sprite_layer = 2
 
+        # how often entities out of view are updated; None uses the config
+        self.lod_rate = None
+        self.lod_margin = None
+
         # Collision tiles in tmx object format
         self.collisions = []
 
@@ -208,12 +596,17 @@ class Map(object):
         self.inits = []
         self.interacts = []
 
+        # Tiles which cannot be walked through, and impassable tile borders
+        self.collision_map = None
+        self.collision_lines_map = None
+
         # Initialize the map
-        self.load(filename)
+        self.load(filename, create_renderer)
 
-    def load(self, filename):
+    def load(self, filename, create_renderer=True):
         """Load map data from a tmx map file and get all the map's events and collision areas.
-        Loading the map data is done using the pytmx library.
+        Loading the map data is done using the pytmx library.  The parsed map is saved as a
+        compiled map, and loaded from there until the map file changes.
 
         Specifications for the TMX map format can be found here:
         https://github.com/bjorn/tiled/wiki/TMX-Map-Format
@@ -226,380 +619,178 @@ class Map(object):
         .. image:: images/map/map_editor_action01.png
 
         :param filename: The path to the tmx map file to load.
+        :param create_renderer: If False, the tile images are only decoded, and the map has no
+            renderer, so it can be loaded on a loader thread.  Call `load_images` on the main
+            thread before the map is drawn.
         :type filename: String
+        :type create_renderer: Bool
 
         :rtype: None
         """
         self.filename = filename
 
         # Scale the loaded tiles if enabled
-        if prepare.CONFIG.scaling:
-            self.data = pytmx.TiledMap(filename,
-                                       image_loader=scaled_image_loader,
-                                       pixelalpha=True)
-            self.data.tilewidth, self.data.tileheight = prepare.TILE_SIZE
-        else:
-            self.data = load_pygame(filename, pixelalpha=True)
-
-        # Get the edge type of the map
-        self.edges = self.data.properties.get("edges", "")
-        # Get the layer to draw character sprites
-        self.sprite_layer = int(self.data.properties.get("sprite_layer", 2))
-
-        # make a scrolling renderer
-        self.renderer = self.initialize_renderer()
-
-        # Get the map dimensions
-        self.size = self.data.width, self.data.height
+        scale = prepare.SCALE if prepare.CONFIG.scaling else 1
 
-        # Get the tile size of the map
-        if self.data.tilesets:
-            self.tile_size = self.data.tilesets[0].tilewidth, self.data.tilesets[0].tileheight
-        else:
-            self.tile_size = prepare.TILE_SIZE
-
-        # Load all objects from the map file and sort them by their type.
-        for obj in self.data.objects:
-            if obj.type == 'collision':
-                self.collisions.append(obj)
+        compiled = None
+        if prepare.CONFIG.compiled_maps:
+            compiled = mapcache.read_compiled(filename, scale)
 
-            elif obj.type == 'collision-line':
-                self.collision_lines.append(obj)
+        if compiled is None:
+            logger.debug("compiling map {}".format(filename))
+            compiled = self.compile(filename, scale)
+            if prepare.CONFIG.compiled_maps:
+                mapcache.write_compiled(filename, scale, compiled)
 
-            elif obj.type == 'event':
-                self.events.append(self.loadevent(obj))
+        self.load_compiled(compiled, create_renderer)
 
-            elif obj.type == 'init':
-                self.inits.append(self.loadevent(obj))
+    @classmethod
+    def compile(cls, filename, scale):
+        """Parse a tmx map file into a compiled map, which can be saved and loaded quickly.
 
-            elif obj.type == 'interact':
-                self.interacts.append(self.loadevent(obj))
+        Images are not loaded; only the location of each tile in its
+        tileset is recorded.
 
-    def initialize_renderer(self):
-        """ Initialize the renderer for the map and sprites
+        :param filename: The path to the tmx map file to load.
+        :param scale: The scale of the map tiles.
 
-        :rtype: pyscroll.BufferedRenderer
+        :rtype: Dict
+        :returns: compiled map; see core.mapcache
         """
-        # TODO: Use self.edges == "stitched" here when implementing seamless maps
-        visual_data = pyscroll.data.TiledMapData(self.data)
-        clamp = (self.edges == "clamped")
-        return pyscroll.BufferedRenderer(visual_data, prepare.SCREEN_SIZE, clamp_camera = clamp, tall_sprites = 2)
+        data = load_tmx(filename)
+        tile_size = get_tile_size(data)
 
-    def loadevent(self, obj):
-        """
+        if scale == 1:
+            render_tile_size = data.tilewidth, data.tileheight
+        else:
+            render_tile_size = data.tilewidth * scale, data.tileheight * scale
+
+        events = load_events(data, tile_size)
+
+        animations = []
+        for gid, properties in data.tile_properties.items():
+            frames = properties.get('frames')
+            if frames:
+                animations.append((gid, [(frame.gid, frame.duration) for frame in frames]))
+
+        return {
+            "version": mapcache.COMPILED_VERSION,
+            "filename": filename,
+            "scale": scale,
+            "sources": mapcache.get_mtimes(mapcache.get_dependencies(filename, data)),
+            "edges": data.properties.get("edges", ""),
+            "sprite_layer": int(data.properties.get("sprite_layer", 2)),
+            "lod_rate": get_optional_int(data.properties, "lod_rate"),
+            "lod_margin": get_optional_int(data.properties, "lod_margin"),
+            "size": (data.width, data.height),
+            "tile_size": tuple(tile_size),
+            "render_tile_size": tuple(render_tile_size),
+            "layers": load_layers(data),
+            "images": [i.to_tuple() if i is not None else None for i in data.images],
+            "animations": animations,
+            "collision_grid": load_collision_grid(data, tile_size),
+            "events": mapcache.encode_events(events["event"]),
+            "inits": mapcache.encode_events(events["init"]),
+            "interacts": mapcache.encode_events(events["interact"]),
+        }
+
+    def load_compiled(self, compiled, create_renderer=True):
+        """Set up the map from a compiled map, and load its tile images.
+
+        :param compiled: compiled map returned by Map.compile
+        :param create_renderer: If False, the tile images are only decoded, and
+            the renderer is not created.
+        :type compiled: Dict
+        :type create_renderer: Bool
 
-        :param obj:
-        :rtype: EventObject
+        :rtype: None
         """
+        self.edges = compiled["edges"]
+        self.sprite_layer = compiled["sprite_layer"]
+        self.lod_rate = compiled["lod_rate"]
+        self.lod_margin = compiled["lod_margin"]
+        self.size = compiled["size"]
+        self.tile_size = compiled["tile_size"]
+        self.collision_map = compiled["collision_grid"]
+        self.collision_lines_map = self.collision_map.lines
+        self.events = mapcache.decode_events(compiled["events"])
+        self.inits = mapcache.decode_events(compiled["inits"])
+        self.interacts = mapcache.decode_events(compiled["interacts"])
+        self._compiled = compiled
 
-        conds = []
-        acts = []
-
-        # Conditions & actions are stored as Tiled properties.
-        # We need to sort them by name, so that "act1" comes before "act2" and so on..
-        keys = sorted(obj.properties.keys())
-
-        x = int(obj.x / self.tile_size[0])
-        y = int(obj.y / self.tile_size[1])
-        w = int(obj.width / self.tile_size[0])
-        h = int(obj.height / self.tile_size[1])
-
-        for k in keys:
-            if k.startswith('cond'):
-                words = obj.properties[k].split(' ', 2)
-
-                # Conditions have the form 'operator type parameters'.
-                operator, cond_type = words[0:2]
-
-                # If this condition has parameters, split them into a
-                # list
-                if len(words) > 2:
-                    args = self.split_escaped(words[2])
-                else:
-                    args = list()
-
-                # Create a condition object using named tuples
-                condition = MapCondition(cond_type, args, x, y, w, h, operator, k)
-                conds.append(condition)
-
-            elif k.startswith('act'):
-                words = obj.properties[k].split(' ', 1)
-
-                # Actions have the form 'type parameters'.
-                act_type = words[0]
-
-                # If this action has parameters, split them into a
-                # list
-                if len(words) > 1:
-                    args = self.split_escaped(words[1])
-                else:
-                    args = list()
-
-                # Create an action object using named tuples
-                action = MapAction(act_type, args, k)
-                acts.append(action)
-
-        for k in keys:
-            if k.startswith('behav'):
-                words = obj.properties[k].split(' ', 1)
-
-                # Actions have the form 'type parameters'.
-                behav_type = words[0]
-
-                # If this action has parameters, split them into a
-                # list
-                if len(words) > 1:
-                    args = self.split_escaped(words[1])
-                else:
-                    args = list()
-
-                if behav_type == "talk":
-                    conds.insert(0, MapCondition("to_talk", args, x, y, w, h, "is", k))
-                    acts.insert(0, MapAction("npc_face", [args[0], "player"], k))
-
-        # TODO: move this to some post-creation function, as more may be needed
-        # add a player_facing_tile condition automatically
-        if obj.type == "interact":
-            cond_data = MapCondition("player_facing_tile", list(), x, y, w, h, "is", None)
-            logger.debug(cond_data)
-            conds.append(cond_data)
-
-        return EventObject(obj.id, obj.name, x, y, w, h, conds, acts)
-
-    def loadfile(self):
-        """Loads the tile and collision data from the map file and returns a list of tiles with
-        their position and pygame surface, a set of collision tile coordinates, and the size of
-        the map itself. The list of tile surfaces is used to draw the map in the main game. The
-        list of collision tile coordinates is used for collision detection.
-
-        **Examples:**
+        # make a scrolling renderer
+        if create_renderer:
+            self.load_images()
+            self.renderer = self.initialize_renderer()
+        else:
+            for source in mapcache.get_tileset_sources(compiled["images"]):
+                load_tileset_image(source, compiled["scale"])
 
-        The list of tiles is structured in a way where you can access an individual tile by
-        index number.
+    def load_images(self):
+        """Convert the tile images of the map for the display.
 
-        The collision map is a set of (x,y) coordinates that the player cannot walk
-        through. This set is generated based on collision regions defined in the
-        map file.
+        Converting surfaces is not safe off the main thread, so maps loaded
+        without a renderer only decode their tileset images.  This must be
+        called on the main thread before the map is drawn.  Does nothing
+        if the images are loaded already.
 
-        :rtype: List
-        :returns: A multi-dimensional list of tiles in dictionary format; a set of collision
-            coordinates; the map size.
+        :rtype: None
         """
-        # Get the dimensions of the map
-        mapsize = self.size
-
-        # Create a list of all tiles that we cannot walk through
-        collision_map = {}
-
-        # Create a list of all pairs of adjacent tiles that are impassable (aka walls)
-        # example: ((5,4),(5,3), both)
-        collision_lines_map = set()
-
-        # Right now our collisions are defined in our tmx file as large regions that the player
-        # can't pass through. We need to convert these areas into individual tile coordinates
-        # that the player can't pass through.
-        # Loop through all of the collision objects in our tmx file.
-        for collision_region in self.collisions:
-
-            # >>> collision_region.__dict__
-            # {'gid': 0,
-            # 'height': 16,
-            # 'name': None,
-            # 'parent': <TiledMap: "resources/maps/pallet_town-room.tmx">,
-            # 'rotation': 0,
-            # 'type': 'collision',
-            # 'visible': 1,
-            # 'width': 16,
-            # 'x': 176,
-            # 'y': 64}
-
-            # Get the collision area's tile location and dimension in tiles using the tileset's
-            # tile size.
-            x = self.round_to_divisible(collision_region.x, self.tile_size[0]) / self.tile_size[0]
-            y = self.round_to_divisible(collision_region.y, self.tile_size[1]) / self.tile_size[1]
-            width = self.round_to_divisible(collision_region.width, self.tile_size[0]) / self.tile_size[0]
-            height = self.round_to_divisible(collision_region.height, self.tile_size[1]) / self.tile_size[1]
-
-            # Loop through properties and create list of directions for each property
-            if collision_region.properties:
-                enters = []
-                exits = []
-
-                for key in collision_region.properties:
-                    if "enter" in key:
-                        for direction in collision_region.properties[key].split():
-                            enters.append(direction)
-                    elif "exit" in key:
-                        for direction in collision_region.properties[key].split():
-                            exits.append(direction)
-
-            # Loop through the area of this region and create all the tile coordinates that are
-            # inside this region.
-            for a in range(0, int(width)):
-                for b in range(0, int(height)):
-                    collision_tile = (a + x, b + y)
-                    collision_map[collision_tile] = None
-
-                    # Check if collision region has properties, and is therefore a conditional zone
-                    # then add the location and conditions to semi_collision_map
-                    if collision_region.properties:
-                        tile_conditions = {}
-                        for key in collision_region.properties.keys():
-                            if "enter" in key:
-                                tile_conditions['enter'] = enters
-                            if "exit" in key:
-                                tile_conditions['exit'] = exits
-                            if "continue" in key:
-                                tile_conditions['continue'] = collision_region.properties[key]
-                        collision_map[collision_tile] = tile_conditions
-
-        # Similar to collisions, except we need to identify the tiles
-        # on either side of the poly-line and prevent moving between
-        # them
-        for collision_line in self.collision_lines:
-
-            # >>> collision_wall.__dict__
-            # {'name': None,
-            # 'parent': <TiledMap: "resources/maps/test_pathfinding.tmx">,
-            # 'visible': 1,
-            # 'height': 160.0,
-            # 'width': 80.0, '
-            # gid': 0,
-            # 'closed': False,
-            # 'y': 80.0, 'x': 80.0,
-            # 'rotation': 0,
-            # 'type': 'collision-wall',
-            # 'points': ((80.0, 80.0), (80.0, 128.0), (160.0, 128.0), (160.0, 240.0))
-
-            # Another example:
-            # 'points': ((192.0, 80.0), (192.0, 192.0))
-
-            # For each pair of points, get the tiles on either side of the line.
-            # Assumption: A pair of points will only be vertical or horizontal (no diagonal lines)
-
-            if len(collision_line.points) < 2:
-                raise Exception("Error: map has polyline with only one point")
-
-            # get two points, and round them
-            point1 = (self.round_to_divisible(collision_line.points[0][0], self.tile_size[0]),
-                      self.round_to_divisible(collision_line.points[0][1], self.tile_size[1]))
-            point2 = (self.round_to_divisible(collision_line.points[1][0], self.tile_size[0]),
-                      self.round_to_divisible(collision_line.points[1][1], self.tile_size[1]))
-
-            # check to see if horizontal or vertical
-            line_type = None
-            if point1[0] == point2[0] and point1[1] != point2[1]:
-                # x's are same, must be vertical
-                line_type = 'vertical'
-            elif point1[0] != point2[0] and point1[1] == point2[1]:
-                # y's are same, must be horizontal
-                line_type = 'horizontal'
-            else:
-                raise Exception("Error: Points on polyline are not strictly horizontal or vertical....")
-
-            if line_type is 'vertical':
-                # get all tile coordinates on either side
-                x = point1[0] / self.tile_size[0]  # same as point2[0] b/c vertical
-                line_start = point1[1]
-                line_end = point2[1]
-                num_tiles_in_line = abs(line_start - line_end) / self.tile_size[1]  # [1] b/c vertical
-                curr_y = line_start / self.tile_size[1]
-                for i in range(int(num_tiles_in_line)):
-                    if line_start > line_end:  # slightly different
-                        # behavior depending on
-                        # direction
-                        left_side_tile = (x - 1, curr_y - 1)
-                        right_side_tile = (x, curr_y - 1)
-                        curr_y -= 1
-                    else:
-                        left_side_tile = (x - 1, curr_y)
-                        right_side_tile = (x, curr_y)
-                        curr_y += 1
-
-                    # TODO - if we want to enable single-direction
-                    # walls (i.e. for jumping) then ask map-designer
-                    # to include a special property for the direction
-                    # to block, and then here we only block in one
-                    # direction, not both.
-                    collision_lines_map.add((left_side_tile, "right"))
-                    collision_lines_map.add((right_side_tile, "left"))
-
-            elif line_type is 'horizontal':
-                # get all tile coordinates on either side
-                y = point1[1] / self.tile_size[1]  # same as point2[1] b/c horizontal
-                line_start = point1[0]
-                line_end = point2[0]
-                num_tiles_in_line = abs(line_start - line_end) / self.tile_size[0]  # [0] b/c horizontal
-                curr_x = line_start / self.tile_size[0]
-                for i in range(int(num_tiles_in_line)):
-                    if line_start > line_end:  # slightly different
-                        # behavior depending on
-                        # direction
-                        top_side_tile = (curr_x - 1, y - 1)
-                        bottom_side_tile = (curr_x - 1, y)
-                        curr_x -= 1
-                    else:
-                        top_side_tile = (curr_x, y - 1)
-                        bottom_side_tile = (curr_x, y)
-                        curr_x += 1
-
-                    # TODO - if we want to enable single-direction
-                    # walls (i.e. for jumping) then ask map-designer
-                    # to include a special property for the direction
-                    # to block, and then here we only block in one
-                    # direction, not both.
-                    collision_lines_map.add((top_side_tile, "down"))
-                    collision_lines_map.add((bottom_side_tile, "up"))
-
-        return collision_map, collision_lines_map, mapsize
-
-    @staticmethod
-    def round_to_divisible(x, base=16):
-        """Rounds a number to a divisible base. This is used to round collision areas that aren't
-        defined well. This function assists in making sure collisions work if the map creator
-        didn't set the collision areas to round numbers.
+        if self._compiled is None:
+            return
 
-        **Examples:**
+        compiled, self._compiled = self._compiled, None
+        image_loader = partial(scaled_image_loader, scale=compiled["scale"])
+        images = mapcache.load_tile_images(compiled["images"], image_loader)
+        self.data = mapcache.CompiledMapData(compiled, images)
 
-        >>> round_to_divisible(31.23, base=16)
-        32
-        >>> round_to_divisible(17.8, base=16)
-        16
+    def get_byte_size(self):
+        """ Return an estimate of the memory used by the tile images and the renderer
 
-        :param x: The number we want to round.
-        :param base: The base that we want our number to be divisible by. (Default: 16)
+        :rtype: int
+        """
+        size = get_renderer_byte_size(self.renderer)
+        if self.data is not None:
+            size += sum(surface_size(i) for i in self.data.tmx.images if i is not None)
+        return size
 
-        :type x: Float
-        :type base: Integer
+    def initialize_renderer(self):
+        """ Initialize the renderer for the map and sprites
 
-        :rtype: Integer
-        :returns: Rounded number that is divisible by "base".
+        :rtype: pyscroll.BufferedRenderer
         """
-        return int(base * round(float(x) / base))
+        # stitched maps are streamed by core.worldmap.WorldMap
+        clamp = (self.edges == "clamped")
+        return pyscroll.BufferedRenderer(self.data, prepare.SCREEN_SIZE, clamp_camera = clamp, tall_sprites = 2)
 
-    @staticmethod
-    def split_escaped(string_to_split, delim=","):
-        """Splits a string by the specified deliminator excluding escaped
-        deliminators.
+    def loadevent(self, obj):
+        """ Return an event object from a Tiled object of the map; see `load_event`
 
-        :param string_to_split: The string to split.
-        :param delim: The deliminator to split the string by.
+        :param obj: pytmx.TiledObject
+        :rtype: EventObject
+        """
+        return load_event(obj, self.tile_size)
 
-        :type string_to_split: Str
-        :type delim: Str
+    def loadfile(self):
+        """Returns the collision data of the map and its size.
 
-        :rtype: List
-        :returns: A list of the splitted string.
+        The collision map is a CollisionGrid.  It can be used like a dict of (x,y)
+        coordinates that the player cannot walk through, mapped to the conditions of
+        the tile, if any.  The collision lines can be used like a set of
+        (tile, direction) pairs that cannot be crossed.
 
+        :rtype: Tuple
+        :returns: collision grid; collision lines; the map size.
         """
-        # Split by "," unless it is escaped by a "\"
-        split_list = re.split(r'(?<!\\)' + delim, string_to_split)
+        return self.collision_map, self.collision_lines_map, self.size
 
-        # Remove the escape character from the split list
-        split_list = [w.replace('\,', ',') for w in split_list]
+    def build_collision_maps(self):
+        """ Builds the collision data from the collision objects of the map; see `build_collision_maps`
 
-        # strip whitespace around each
-        split_list = [i.strip() for i in split_list]
-
-        return split_list
+        :rtype: Tuple
+        :returns: A dict of collision coordinates; a set of collision lines.
+        """
+        return build_collision_maps(self.collisions, self.collision_lines, self.tile_size)
 
+    round_to_divisible = staticmethod(round_to_divisible)
+    split_escaped = staticmethod(split_escaped)
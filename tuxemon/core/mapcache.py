@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.mapcache Compiled maps.
+#
+"""Compiled maps are TMX maps which have already been parsed.
+
+Parsing a TMX file, splitting the event properties and building the
+collision maps is slow, and done every time a map is loaded.  A compiled
+map stores the result, so loading it is one read.  It contains:
+
+* map properties and sizes
+* tile layers, as rows of tile ids
+* for each tile id, where to find its image in the tileset images
+* tile animations
+* collision grid
+* events, inits and interacts
+
+Images are not stored; they are loaded from the tilesets when the map is
+loaded, using the image caches.
+
+Compiled maps are stored in the cache folder, and are used if the map and
+its tilesets have not changed since it was compiled, and the scale is
+the same.  `Map` compiles maps when needed, but they can be compiled
+ahead of time:
+
+`python -m tuxemon.core.mapcache`
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import hashlib
+import logging
+import os
+import pickle
+import xml.etree.ElementTree as ElementTree
+from collections import namedtuple
+
+import pyscroll
+from pytmx import TileFlags
+
+from tuxemon.constants import paths
+from tuxemon.core.event import EventObject, MapAction, MapCondition
+from tuxemon.core.tools import replace_file
+
+logger = logging.getLogger(__name__)
+
+# increase when the format of compiled maps changes
+COMPILED_VERSION = 3
+
+tilelayer = namedtuple("tilelayer", "data")
+
+
+class ImageReference(object):
+    """ Where to find the image of a tile; recorded by `record_image_loader`
+
+    """
+    __slots__ = ("source", "colorkey", "rect", "flags")
+
+    def __init__(self, source, colorkey, rect=None, flags=None):
+        self.source = source
+        self.colorkey = colorkey
+        self.rect = rect
+        self.flags = flags
+
+    def to_tuple(self):
+        flags = tuple(self.flags) if self.flags else None
+        return self.source, self.colorkey, self.rect, flags
+
+
+def record_image_loader(filename, colorkey, **kwargs):
+    """ pytmx image loader which records image locations instead of loading images
+
+    :param filename: tileset image
+    :param colorkey: transparent color of the tileset, if any
+    :return: function which returns an ImageReference for a tile
+    """
+
+    def load_image(rect=None, flags=None):
+        return ImageReference(filename, colorkey, tuple(rect) if rect else None, flags)
+
+    return load_image
+
+
+def encode_events(event_objects):
+    """ Convert event objects to plain tuples, so they can be pickled
+
+    :param list event_objects: EventObjects
+    :rtype: list
+    """
+    return [
+        tuple(eo[:6]) + ([tuple(c) for c in eo.conds], [tuple(a) for a in eo.acts])
+        for eo in event_objects
+    ]
+
+
+def decode_events(data):
+    """ Convert plain tuples returned by encode_events to event objects
+
+    :param list data: tuples
+    :rtype: list
+    """
+    return [
+        EventObject(*(tuple(eo[:6]) + (
+            [MapCondition(*c) for c in eo[6]],
+            [MapAction(*a) for a in eo[7]],
+        )))
+        for eo in data
+    ]
+
+
+def get_dependencies(filename, tmx_data):
+    """ Return the files a map is made of: the map, tilesets and images
+
+    :param filename: path of the TMX file
+    :param tmx_data: pytmx.TiledMap, loaded with record_image_loader
+    :rtype: list
+    """
+    folder = os.path.dirname(filename)
+    files = {filename}
+
+    # external tilesets are not kept by pytmx
+    for tileset in ElementTree.parse(filename).getroot().findall("tileset"):
+        source = tileset.get("source")
+        if source:
+            files.add(os.path.normpath(os.path.join(folder, source)))
+
+    for image in tmx_data.images:
+        if image is not None:
+            files.add(image.source)
+
+    return sorted(files)
+
+
+def get_compiled_path(filename, scale):
+    """ Return the path of the compiled copy of a map
+
+    :param filename: path of the TMX file
+    :param scale: scale of the map tiles
+    :rtype: str
+    """
+    digest = hashlib.sha1(os.path.abspath(filename).encode("utf-8")).hexdigest()
+    name = "{}-{}-{}.pickle".format(os.path.splitext(os.path.basename(filename))[0], digest[:12], scale)
+    return os.path.join(paths.CACHE_DIR, "maps", name)
+
+
+def get_mtimes(files):
+    """ Return modification times of files; None for missing files
+
+    :param files: list of paths
+    :rtype: dict
+    """
+    mtimes = dict()
+    for path in files:
+        try:
+            mtimes[path] = os.path.getmtime(path)
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+
+def read_compiled(filename, scale):
+    """ Return a compiled map, or None if it is missing or out of date
+
+    :param filename: path of the TMX file
+    :param scale: scale of the map tiles
+    :rtype: dict or None
+    """
+    path = get_compiled_path(filename, scale)
+    try:
+        with open(path, "rb") as fp:
+            compiled = pickle.load(fp)
+    except (IOError, OSError):
+        return None
+    except Exception as e:
+        logger.debug("cannot read compiled map {}: {}".format(path, e))
+        return None
+
+    if compiled.get("version") != COMPILED_VERSION or compiled.get("scale") != scale:
+        return None
+
+    if get_mtimes(compiled["sources"]) != compiled["sources"]:
+        logger.debug("compiled map is out of date: {}".format(filename))
+        return None
+
+    return compiled
+
+
+def write_compiled(filename, scale, compiled):
+    """ Save a compiled map
+
+    Errors are logged and ignored; the compiled map is only an optimization.
+
+    :param filename: path of the TMX file
+    :param scale: scale of the map tiles
+    :param dict compiled: compiled map, returned by `Map.compile`
+    :rtype: None
+    """
+    path = get_compiled_path(filename, scale)
+    folder = os.path.dirname(path)
+    temp_path = path + ".tmp"
+    try:
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(temp_path, "wb") as fp:
+            pickle.dump(compiled, fp, protocol=2)
+        replace_file(temp_path, path)
+    except (IOError, OSError) as e:
+        logger.debug("cannot write compiled map {}: {}".format(path, e))
+
+
+def get_tileset_sources(image_references):
+    """ Return the tileset images used by the tiles of a compiled map
+
+    :param list image_references: tuples from ImageReference.to_tuple, or None
+    :rtype: list
+    """
+    return sorted({reference[0] for reference in image_references if reference is not None})
+
+
+def load_tile_images(image_references, image_loader):
+    """ Load the tile images of a compiled map
+
+    Each tileset image is loaded once.
+
+    :param list image_references: tuples from ImageReference.to_tuple, or None
+    :param image_loader: pytmx style image loader
+    :rtype: list
+    """
+    loaders = dict()
+    images = list()
+    for reference in image_references:
+        if reference is None:
+            images.append(None)
+            continue
+
+        source, colorkey, rect, flags = reference
+        try:
+            loader = loaders[(source, colorkey)]
+        except KeyError:
+            loader = image_loader(source, colorkey, pixelalpha=True)
+            loaders[(source, colorkey)] = loader
+
+        if flags is not None:
+            flags = TileFlags(*flags)
+        images.append(loader(rect, flags))
+
+    return images
+
+
+class CompiledTiledMap(object):
+    """ Compiled map with the attributes of a pytmx map used by pyscroll
+
+    """
+
+    def __init__(self, compiled, images):
+        """
+        :param dict compiled: compiled map
+        :param list images: tile images, from load_tile_images
+        """
+        self.filename = compiled["filename"]
+        self.images = images
+        self.tilewidth, self.tileheight = compiled["render_tile_size"]
+        self.width, self.height = compiled["size"]
+        self.visible_tile_layers = sorted(compiled["layers"])
+        self.layers = [None] * (max(self.visible_tile_layers or [-1]) + 1)
+        for i in self.visible_tile_layers:
+            self.layers[i] = tilelayer(compiled["layers"][i])
+        self.visible_layers = [self.layers[i] for i in self.visible_tile_layers]
+        self.tile_properties = {gid: {"frames": frames} for gid, frames in compiled["animations"]}
+
+    def get_tile_image(self, x, y, layer):
+        if x < 0 or y < 0:
+            raise ValueError("Tile coordinates must be non-negative, were ({0}, {1})".format(x, y))
+        try:
+            gid = self.layers[layer].data[y][x]
+        except (IndexError, AttributeError):
+            raise ValueError("Coords: ({0},{1}) in layer {2} is invalid".format(x, y, layer))
+        return self.images[gid] if gid else None
+
+
+class CompiledMapData(pyscroll.data.TiledMapData):
+    """ pyscroll data source for compiled maps
+
+    """
+
+    def __init__(self, compiled, images):
+        """
+        :param dict compiled: compiled map
+        :param list images: tile images, from load_tile_images
+        """
+        super(CompiledMapData, self).__init__(CompiledTiledMap(compiled, images))
+
+    def reload_data(self):
+        pass
+
+    def convert_surfaces(self, parent, alpha=False):
+        # tile images were converted when loaded, and are shared with other
+        # maps through the image cache; copies would only use more memory
+        pass
+
+
+def compile_all(mods=None):
+    """ Compile all maps of mods
+
+    :param mods: names of mods; all mods if None
+    :rtype: int
+    :returns: number of maps compiled
+    """
+    from tuxemon.core import prepare
+    from tuxemon.core.map import Map
+
+    if mods is None:
+        mods = sorted(i for i in os.listdir(paths.mods_folder)
+                      if os.path.isdir(os.path.join(paths.mods_folder, i)))
+
+    scale = prepare.SCALE if prepare.CONFIG.scaling else 1
+    count = 0
+    for mod in mods:
+        folder = os.path.join(paths.mods_folder, mod, "maps")
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(".tmx"):
+                continue
+            filename = os.path.join(folder, name)
+            try:
+                compiled = Map.compile(filename, scale)
+            except Exception as e:
+                logger.error("cannot compile {}: {}".format(filename, e))
+                continue
+            write_compiled(filename, scale, compiled)
+            count += 1
+
+    return count
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Compile the maps of mods, so they load faster")
+    parser.add_argument('mods', metavar='mymod', type=str, nargs='*',
+                        help='Mod directories used in the mods directory.  Defaults to all mods')
+    args = parser.parse_args()
+
+    count = compile_all(args.mods or None)
+    print("Compiled {} maps".format(count))
@@ -59,7 +59,7 @@ class HpBar(Bar):
         """ Image become class attribute, so is shared.
             Eventually, implement some game-wide image caching
         """
-        image = tools.load_and_scale(self.border_filename)
+        image = tools.load_and_scale(self.border_filename, pin=True)
         HpBar.border = GraphicBox(image)
 
     def draw(self, surface, rect):
@@ -88,7 +88,7 @@ class ExpBar(Bar):
         """ Image become class attribute, so is shared.
             Eventually, implement some game-wide image caching
         """
-        image = tools.load_and_scale(self.border_filename)
+        image = tools.load_and_scale(self.border_filename, pin=True)
         ExpBar.border = GraphicBox(image)
 
     def draw(self, surface, rect):
@@ -278,18 +278,18 @@ class Menu(state.State):
             # load and scale the _background
             background = None
             if self.background_filename:
-                background = tools.load_image(self.background_filename)
+                background = tools.load_image(self.background_filename, pin=True)
 
             # load and scale the menu borders
             border = None
             if self.draw_borders:
-                border = tools.load_and_scale(self.borders_filename)
+                border = tools.load_and_scale(self.borders_filename, pin=True)
 
             # set the helper to draw the _background
             self.window = GraphicBox(border, background, self.background_color)
 
         # handle the arrow cursor
-        image = tools.load_and_scale(self.cursor_filename)
+        image = tools.load_and_scale(self.cursor_filename, pin=True)
         self.arrow = MenuCursor(image)
 
     def show_cursor(self):
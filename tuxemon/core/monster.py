@@ -35,6 +35,7 @@ from __future__ import unicode_literals
 import logging
 import random
 
+from tuxemon.core import prepare
 from tuxemon.core import tools
 from tuxemon.core import ai, fusion
 from tuxemon.core.locale import T
@@ -279,9 +280,9 @@ class Monster(object):
         self.shape = results.get("shape", "landrace").lower()
         types = results.get("types")
         if types:
-            self.type1 = results["types"][0].lower()
+            self.type1 = results["types"][0]
             if len(types) > 1:
-                self.type2 = results["types"][1].lower()
+                self.type2 = results["types"][1]
 
         self.weight = results['weight']
 
@@ -503,12 +504,7 @@ class Monster(object):
         returns: path to sprite or placeholder image
         '''
         try:
-            exts = ["png", "gif", "jpg", "jpeg"]
-            for ext in exts:
-                path = "%s.png" % sprite
-                full_path = tools.transform_resource_filename(path)
-                if full_path:
-                    return full_path
+            return prepare.fetch_any(sprite)
         except IOError:
             logger.debug("Could not find monster sprite {}".format(sprite))
             return MISSING_IMAGE
@@ -528,9 +524,11 @@ class Monster(object):
         if len(self.sprites):
             return True
 
-        self.sprites["front"] = tools.load_and_scale(self.front_battle_sprite)
-        self.sprites["back"] = tools.load_and_scale(self.back_battle_sprite)
-        self.sprites["menu"] = tools.load_and_scale(self.menu_sprite_1)
+        filenames = self.front_battle_sprite, self.back_battle_sprite, self.menu_sprite_1
+        atlas = tools.load_atlas(filenames)
+        self.sprites["front"] = atlas[self.front_battle_sprite]
+        self.sprites["back"] = atlas[self.back_battle_sprite]
+        self.sprites["menu"] = atlas[self.menu_sprite_1]
         return False
 
     def get_state(self):
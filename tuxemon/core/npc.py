@@ -35,6 +35,7 @@ from __future__ import unicode_literals
 
 import logging
 import os
+import random
 from math import hypot
 
 import pygame
@@ -48,7 +49,8 @@ from tuxemon.core.locale import T
 from tuxemon.core.map import proj, facing, dirs3, dirs2, get_direction
 from tuxemon.core.monster import decode_monsters, encode_monsters
 from tuxemon.core.prepare import CONFIG
-from tuxemon.core.tools import nearest, load_and_scale, trunc
+from tuxemon.core.loader import NORMAL
+from tuxemon.core.tools import nearest, load_atlas, load_atlas_async, trunc
 
 logger = logging.getLogger(__name__)
 
@@ -68,12 +70,56 @@ animation_mapping = {
 }
 
 
+# names of the walking animations, which have 4 frames each
+walk_animations = ['front_walk', 'back_walk', 'left_walk', 'right_walk']
+
+
 def tile_distance(tile0, tile1):
     x0, y0 = tile0
     x1, y1 = tile1
     return hypot(x1 - x0, y1 - y0)
 
 
+def get_sprite_filenames(sprite_name):
+    """ Return the filenames of all frames of a sprite
+
+    The order is the order of the frames in the sprite's atlas.
+
+    :param sprite_name: name of the sprite, such as "adventurer"
+    :rtype: tuple
+    :returns: standing frames by facing, walking frames by animation, all frames
+    """
+    standing_files = {
+        standing_type: os.path.join("sprites", "{}_{}.png".format(sprite_name, standing_type))
+        for standing_type in facing
+    }
+    walking_files = {
+        anim_type: [
+            'sprites/%s_%s.%s.png' % (
+                sprite_name,
+                anim_type,
+                str(num).rjust(3, str('0'))
+            )
+            for num in range(4)
+        ]
+        for anim_type in walk_animations
+    }
+    filenames = [standing_files[i] for i in facing]
+    for anim_type in walk_animations:
+        filenames.extend(walking_files[anim_type])
+    return standing_files, walking_files, filenames
+
+
+def prefetch_sprites(sprite_name, priority=NORMAL):
+    """ Request the sprite atlas of a character to be loaded in the background
+
+    :param sprite_name: name of the sprite, such as "adventurer"
+    :param priority: loader priority
+    :rtype: tuxemon.core.loader.AssetFuture
+    """
+    return load_atlas_async(get_sprite_filenames(sprite_name)[2], priority)
+
+
 class NPC(Entity):
     """ Class for humanoid type game objects, NPC, Players, etc
 
@@ -125,6 +171,10 @@ class NPC(Entity):
 
         # pathfinding and waypoint related
         self.pathfinding = None
+        self.following = None  # slug of the npc to follow
+        self.wandering = None  # about how many seconds between random steps
+        self.wander_time = 0  # seconds until the next random step
+        self.route = []  # legs of a route through other maps
         self.path = []
         self.final_move_dest = [0, 0]  # Stores the final destination sent from a client
 
@@ -204,12 +254,15 @@ class NPC(Entity):
         :return:
         """
         # TODO: refactor animations into renderer
+        # All frames of a sprite are packed into one atlas, which is shared
+        # by every character using the same sprite
+        standing_files, walking_files, filenames = get_sprite_filenames(self.sprite_name)
+        atlas = load_atlas(filenames)
+
         # Get all of the player's standing animation images.
         self.standing = {}
         for standing_type in facing:
-            filename = "{}_{}.png".format(self.sprite_name, standing_type)
-            path = os.path.join("sprites", filename)
-            self.standing[standing_type] = load_and_scale(path)
+            self.standing[standing_type] = atlas[standing_files[standing_type]]
 
         self.playerWidth, self.playerHeight = self.standing["front"].get_size()  # The player's sprite size in pixels
 
@@ -218,21 +271,10 @@ class NPC(Entity):
         frame_duration = (1000 / CONFIG.player_walkrate) / frames / 1000 * 2
 
         # Load all of the player's sprite animations
-        anim_types = ['front_walk', 'back_walk', 'left_walk', 'right_walk']
-        for anim_type in anim_types:
-            images = [
-                'sprites/%s_%s.%s.png' % (
-                    self.sprite_name,
-                    anim_type,
-                    str(num).rjust(3, str('0'))
-                )
-                for num in range(4)
-            ]
-
+        for anim_type in walk_animations:
             frames = []
-            for image in images:
-                surface = load_and_scale(image)
-                frames.append((surface, frame_duration))
+            for image in walking_files[anim_type]:
+                frames.append((atlas[image], frame_duration))
 
             self.sprite[anim_type] = pyganim.PygAnimation(frames, loop=True)
 
@@ -275,7 +317,8 @@ class NPC(Entity):
         Queries the world for a valid path
 
         :param destination:
-        :return:
+        :rtype: bool
+        :returns: False if there is no path
         """
         # TODO: handle invalid paths
         self.pathfinding = destination
@@ -283,6 +326,147 @@ class NPC(Entity):
         if path:
             self.path = path
             self.next_waypoint()
+        return path is not None
+
+    def travel(self, map_name, destination):
+        """ Find a route to a tile of any map, and start walking it
+
+        Routes go through teleport events, so only the player can leave
+        the current map.  Other npcs can only travel within it.
+
+        :param map_name: file name of the map, like "taba_town.tmx"
+        :param destination: (x, y) of the tile
+        :rtype: bool
+        :returns: False if there is no route
+        """
+        current = os.path.basename(self.world.current_map.filename)
+        route = self.world.route_planner.plan(current, trunc(self.tile_pos), map_name, destination)
+        if route is None:
+            logger.error("no route from {} {} to {} {}".format(current, self.tile_pos, map_name, destination))
+            return False
+
+        if not self.isplayer and any(leg.teleport for leg in route):
+            logger.error("{} cannot travel to {}, teleports only move the player".format(self.slug, map_name))
+            return False
+
+        self.route = route
+        if self.route:
+            self.next_leg()
+        return True
+
+    def next_leg(self):
+        """ Walk to the end of the current leg of the route
+
+        When a teleport moves the npc to another map, the route continues
+        with the leg of that map.  If it is not on the route, a new route
+        is planned.
+
+        :return: None
+        """
+        current = os.path.basename(self.world.current_map.filename)
+        if self.route[0].map != current:
+            for index, leg in enumerate(self.route):
+                if leg.map == current:
+                    del self.route[:index]
+                    break
+            else:
+                final = self.route[-1]
+                self.route = []
+                self.travel(final.map, final.position)
+                return
+
+        leg = self.route[0]
+        if trunc(self.tile_pos) == leg.position:
+            self.pathfinding = None
+            if leg.teleport is None:
+                # arrived at the destination
+                self.route = []
+            # otherwise, wait for the event of the teleport tile to move the npc
+            return
+
+        if not self.pathfind(leg.position):
+            self.route = []
+            self.pathfinding = None
+
+    def get_occupied_tiles(self):
+        """ Return the tiles which other entities cannot move into
+
+        While moving between tiles, both tiles are occupied.
+
+        :rtype: tuple
+        """
+        if self.path_origin is not None and self.path and self.moving:
+            return trunc(self.path_origin), trunc(self.path[-1])
+        return nearest(self.tile_pos),
+
+    def follow(self, slug):
+        """ Walk toward another npc, and keep following it
+
+        NPCs following the same npc share a flow field, so adding
+        followers is cheap.  The field is for the tile of the npc being
+        followed, so a new field is started each time it moves to a new
+        tile.
+
+        :param slug: slug of the npc to follow; None to stop following
+        :return: None
+        """
+        self.following = slug
+
+    def follow_step(self):
+        """ Take one step toward the npc being followed, if the way is free
+
+        :return: None
+        """
+        target = self.world.get_entity(self.following)
+        if target is None:
+            self.following = None
+            return
+
+        field = self.world.flow_fields.get(target.tile_pos)
+        position = trunc(self.tile_pos)
+        if field.distance(position) == 1:
+            # next to the target already; face it
+            self.facing = get_direction(position, field.dest)
+            return
+
+        step = field.next_step(position, self.world.get_collision_map())
+        if step is not None:
+            self.path = [step]
+            self.next_waypoint()
+
+    def wander(self, frequency):
+        """ Take a step in a random direction now and then
+
+        The time between steps is randomized between 0.5 and 1.0 of the
+        frequency.  Wandering is done in `move`, so npcs out of view
+        wander when they are updated, and do not need tasks.
+
+        :param frequency: about how many seconds between steps; None to stop
+        :return: None
+        """
+        self.wandering = frequency
+        self.wander_time = 0
+
+    def wander_step(self):
+        """ Take one step in a random direction, if there is a free one
+
+        :return: None
+        """
+        # Don't interrupt existing movement
+        if self.moving or self.path:
+            return
+
+        # Suspend wandering if a dialog window is open
+        # TODO: this should only be done for the NPC the player is conversing with, not everyone
+        for state in self.world.game.active_states:
+            if state.name == "DialogState":
+                return
+
+        # Choose a random direction that is free and walk toward it
+        exits = self.world.get_exits(trunc(self.tile_pos))
+        if exits:
+            self.path = [random.choice(exits)]
+            self.next_waypoint()
 
     def check_continue(self):
         try:
@@ -350,7 +534,7 @@ class NPC(Entity):
         :return:
         """
         if self.path_origin is not None:
-            self.tile_pos = tuple(self.path_origin)
+            self.set_position(self.path_origin)
         self.move_direction = None
         self.stop_moving()
         self.cancel_path()
@@ -372,10 +556,22 @@ class NPC(Entity):
         # update physics.  eventually move to another class
         self.update_physics(time_passed_seconds)
 
+        if self.route and not self.path:
+            self.next_leg()
+
         if self.pathfinding and not self.path:
             # wants to pathfind, but there was no path last check
             self.pathfind(self.pathfinding)
 
+        if self.following and not self.path:
+            self.follow_step()
+
+        if self.wandering:
+            self.wander_time -= time_passed_seconds
+            if self.wander_time <= 0:
+                self.wander_time = (0.5 + 0.5 * random.random()) * self.wandering
+                self.wander_step()
+
         if self.path:
             if self.path_origin:
                 # if path origin is set, then npc has started moving
@@ -461,6 +657,7 @@ class NPC(Entity):
             self.network_notify_start_moving(direction)
             self.path_origin = tuple(self.tile_pos)
             self.velocity3 = self.moverate * dirs3[direction]
+            self.update_occupancy()
         else:
             # the target is blocked now
             self.stop_moving()
@@ -482,6 +679,8 @@ class NPC(Entity):
         * Doesn't verify the target position, just distance
         * Assumes once waypoint is set, direction doesn't change
         * Honors continue tiles
+        * Distance traveled past the waypoint is carried to the next one,
+          so the speed does not depend on how often the npc is moved
 
         :return: None
         """
@@ -492,9 +691,26 @@ class NPC(Entity):
             self.set_position(target)
             self.path.pop()
             self.path_origin = None
+            self.update_occupancy()
             self.check_continue()  # handle "continue" tiles
             if self.path:
                 self.next_waypoint()
+                overshoot = traveled - expected
+                if overshoot and self.path_origin is not None and self.moverate:
+                    self.carry_overshoot(overshoot)
+
+    def carry_overshoot(self, distance):
+        """ Move toward the current waypoint by the distance traveled past the last one
+
+        :param float distance: distance in tiles
+        :return: None
+        """
+        t = distance / self.moverate
+        position = self.position3
+        velocity = self.velocity3
+        position.x += velocity.x * t
+        position.y += velocity.y * t
+        self.pos_update()
 
     def pos_update(self):
         """ WIP.  Required to be called after position changes
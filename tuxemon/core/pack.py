@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.pack Single file asset packs.
+#
+"""Asset packs store many resource files of a mod in a single file.
+
+Loading thousands of small files is slow on SD cards and Android storage.
+A pack is read with one memory map, and files in it are returned as
+in-memory file objects, so they are never extracted to disk.
+
+A pack for the mod "tuxemon" is stored as "mods/tuxemon.pack".  Files in
+the pack are found by `prepare.fetch` like files in the mod folder, but
+loose files in the mod folder take precedence.  Only loaders which use
+`prepare.open_resource` can read packed files, such as
+`tools.load_image`, so by default only images are packed.
+
+To build a pack:
+
+`python -m tuxemon.core.pack tuxemon`
+
+Pack format:
+
+* 8 bytes: magic
+* 4 bytes: version, little endian unsigned int
+* 4 bytes: size of the index, little endian unsigned int
+* index: JSON object, utf-8; relative path => [offset, size]
+* data: contents of all files.  offsets are relative to the data start
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TXMNPACK"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+
+# extensions of the files packed by default
+DEFAULT_EXTENSIONS = ("png", "gif", "jpg", "jpeg")
+
+
+class AssetPack(object):
+    """ A read-only asset pack, memory mapped for reading
+
+    Paths in a pack always use "/" as the separator.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, index_size = HEADER.unpack(self._map[:HEADER.size])
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("not a supported asset pack: {}".format(filename))
+            index_end = HEADER.size + index_size
+            self.index = json.loads(self._map[HEADER.size:index_end].decode("utf-8"))
+            self._data_start = index_end
+        except Exception:
+            self.close()
+            raise
+
+        logger.debug("opened asset pack {} with {} files".format(filename, len(self.index)))
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        """ Return the paths of all files in the pack
+
+        :rtype: list
+        """
+        return list(self.index)
+
+    def read(self, name):
+        """ Return the contents of a file in the pack
+
+        :param name: path of the file in the pack
+        :rtype: bytes
+        :raises: KeyError
+        """
+        offset, size = self.index[name]
+        start = self._data_start + offset
+        return self._map[start:start + size]
+
+    def open(self, name):
+        """ Return a file object with the contents of a file in the pack
+
+        :param name: path of the file in the pack
+        :rtype: io.BytesIO
+        :raises: KeyError
+        """
+        return io.BytesIO(self.read(name))
+
+    def close(self):
+        """ Close the pack.  It cannot be read after this.
+
+        :rtype: None
+        """
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def build_pack(folder, filename, extensions=DEFAULT_EXTENSIONS):
+    """ Pack the files of a folder into an asset pack
+
+    :param folder: folder to pack, such as a mod folder
+    :param filename: path of the pack to write
+    :param extensions: only files with these extensions are packed
+
+    :rtype: int
+    :returns: number of files packed
+    """
+    from tuxemon.core.tools import replace_file
+
+    suffixes = tuple("." + i.lower() for i in extensions)
+
+    files = list()
+    for root, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(suffixes):
+                path = os.path.join(root, name)
+                files.append((os.path.relpath(path, folder).replace(os.sep, "/"), path))
+
+    index = dict()
+    offset = 0
+    for name, path in files:
+        size = os.path.getsize(path)
+        index[name] = [offset, size]
+        offset += size
+
+    index_data = json.dumps(index, sort_keys=True).encode("utf-8")
+
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as fp:
+        fp.write(HEADER.pack(MAGIC, VERSION, len(index_data)))
+        fp.write(index_data)
+        for name, path in files:
+            with open(path, "rb") as source:
+                fp.write(source.read())
+
+    replace_file(temp_filename, filename)
+
+    return len(files)
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    from tuxemon.constants import paths
+
+    parser = ArgumentParser(description="Pack the files of a mod into a single asset pack")
+    parser.add_argument('mod', metavar='mymod', type=str,
+                        help='The mod directory used in the mods directory')
+    parser.add_argument('-e', '--extension', dest='extensions', metavar='png', type=str,
+                        action='append', default=None,
+                        help='Extension of files to pack; may be repeated. Defaults to images')
+    args = parser.parse_args()
+
+    mod_folder = os.path.join(paths.mods_folder, args.mod)
+    pack_filename = os.path.join(paths.mods_folder, args.mod + ".pack")
+    count = build_pack(mod_folder, pack_filename, args.extensions or DEFAULT_EXTENSIONS)
+    print("Packed {} files into {}".format(count, pack_filename))
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.pathfinding Pathfinding on the tiles of a map.
+"""Pathfinding over the tiles of the current map.
+
+Paths are found with A*.  Moves between tiles are checked by `WorldState.get_exits`, so paths honor
+walls, one-way tiles, continue tiles and npcs, like the player does.
+
+The open set is a binary heap, and the parents and costs of the tiles are
+kept in flat arrays indexed by `y * width + x`, so a search allocates
+little more than its heap entries.  Recent paths are cached, and the cache
+is cleared when the collision grid changes or an npc starts or stops moving.
+
+Flow fields are for many npcs going to the same tile, like npcs following
+the player.  A field holds the distance of each tile to the destination,
+so an npc steps to a neighbor with a lower distance, in constant time.
+Fields are found with a breadth-first search going backwards from the
+destination, which is only expanded as far as the npcs using it need.
+There is one field for each destination tile.  Fields are not updated
+when the destination moves or the collisions change: a target which
+moves gets the field of its new tile, and all fields are cleared when
+the collision grid changes.  Fields ignore npcs, since they move; npcs
+wait when their step is occupied.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import heapq
+import logging
+from array import array
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+UNVISITED = -1
+
+
+def manhattan(a, b):
+    """ Return the distance between tiles, moving only in 4 directions
+
+    :param a: (x, y) of a tile
+    :param b: (x, y) of a tile
+    :rtype: int
+    """
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class Pathfinder(object):
+    """ Find paths in a world, with a cache of recent paths
+
+    **Examples:**
+
+    >>> pathfinder = Pathfinder(world)
+    >>> pathfinder.find((1, 1), (1, 3))
+    [(1, 3), (1, 2)]
+    """
+
+    def __init__(self, world, cache_size=64):
+        """
+        :type world: tuxemon.core.states.world.worldstate.WorldState
+        :param cache_size: number of paths to keep
+        """
+        self.world = world
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._grid = None
+        self._grid_version = None
+        self._occupancy_version = None
+
+    def clear(self):
+        """ Forget all cached paths
+
+        :rtype: None
+        """
+        self.cache.clear()
+
+    def validate(self, grid, occupancy):
+        """ Clear the cache if the collisions changed since the paths were found
+
+        :type grid: tuxemon.core.collision.CollisionGrid
+        :type occupancy: tuxemon.core.collision.Occupancy
+        :rtype: None
+        """
+        if (grid is not self._grid or grid.version != self._grid_version
+                or occupancy.version != self._occupancy_version):
+            self.cache.clear()
+            self._grid = grid
+            self._grid_version = grid.version
+            self._occupancy_version = occupancy.version
+
+    def find(self, start, dest):
+        """ Return the path between two tiles, or None if there is no path
+
+        The path is a list of tiles, starting with the destination and
+        ending with the first tile to move into; the start tile is not
+        included.  Waypoints are taken from the end of the list.
+
+        :param start: (x, y) of the start tile
+        :param dest: (x, y) of the destination tile
+        :rtype: list or None
+        """
+        start = int(start[0]), int(start[1])
+        dest = int(dest[0]), int(dest[1])
+        entities = self.world.get_collision_map()
+        self.validate(self.world.collision_map, entities)
+
+        key = start, dest
+        try:
+            path = self.cache.pop(key)
+        except KeyError:
+            self.misses += 1
+            path = self.search(start, dest, entities)
+            if path is None:
+                logger.error("Pathfinding failed to find a path from " +
+                             str(start) + " to " + str(dest) +
+                             ". Are you sure that an obstacle-free path exists?")
+            else:
+                path = tuple(path)
+        else:
+            self.hits += 1
+
+        self.cache[key] = path
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return None if path is None else list(path)
+
+    def search(self, start, dest, entities):
+        """ A* search, with the manhattan distance as heuristic
+
+        :param start: (x, y) of the start tile
+        :param dest: (x, y) of the destination tile
+        :param entities: tiles blocked by npcs, from get_collision_map
+        :rtype: list or None
+        """
+        grid = self.world.collision_map
+        width, height = grid.width, grid.height
+        if not (0 <= start[0] < width and 0 <= start[1] < height):
+            return None
+        if not (0 <= dest[0] < width and 0 <= dest[1] < height):
+            return None
+        if start == dest:
+            return []
+
+        get_exits = self.world.get_exits
+        no_skip = frozenset()
+        dest_x, dest_y = dest
+        start_index = start[1] * width + start[0]
+        dest_index = dest_y * width + dest_x
+
+        parents = array(str("i"), [UNVISITED]) * (width * height)
+        costs = array(str("i"), [0]) * (width * height)
+        parents[start_index] = start_index
+
+        # entries are (estimated total cost, estimated remaining cost, index)
+        # ties go to the tile closest to the destination
+        h = manhattan(start, dest)
+        open_set = [(h, h, start_index)]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        while open_set:
+            f, h, index = heappop(open_set)
+            if index == dest_index:
+                break
+
+            cost = costs[index]
+            if f - h > cost:
+                # a shorter path to this tile was found after it was pushed
+                continue
+
+            cost += 1
+            for x, y in get_exits((index % width, index // width), entities, no_skip):
+                neighbor = y * width + x
+                if parents[neighbor] != UNVISITED and costs[neighbor] <= cost:
+                    continue
+                parents[neighbor] = index
+                costs[neighbor] = cost
+                h = abs(x - dest_x) + abs(y - dest_y)
+                heappush(open_set, (cost + h, h, neighbor))
+        else:
+            return None
+
+        # walk the parents back from the destination
+        path = list()
+        index = dest_index
+        while index != start_index:
+            path.append((index % width, index // width))
+            index = parents[index]
+        return path
+
+
+class FlowField(object):
+    """ Distances of tiles to a destination, expanded when needed
+
+    """
+
+    def __init__(self, fields, dest):
+        """
+        :param FlowFields fields: fields of the world, used for tile exits
+        :param dest: (x, y) of the destination tile
+        """
+        self.fields = fields
+        self.dest = dest
+        self.distances = {dest: 0}
+        self.frontier = deque([dest])
+
+    def expand(self, position):
+        """ Continue the search until the distance of a tile is known
+
+        The search stops when the tile is found, or all tiles which can
+        reach the destination are found.
+
+        :param position: (x, y) of a tile
+        :rtype: None
+        """
+        distances = self.distances
+        frontier = self.frontier
+        get_entrances = self.fields.get_entrances
+        while frontier and position not in distances:
+            tile = frontier.popleft()
+            distance = distances[tile] + 1
+            for neighbor in get_entrances(tile):
+                if neighbor not in distances:
+                    distances[neighbor] = distance
+                    frontier.append(neighbor)
+
+    def distance(self, position):
+        """ Return the number of moves from a tile to the destination
+
+        :param position: (x, y) of a tile
+        :rtype: int or None
+        :returns: None if the destination cannot be reached from the tile
+        """
+        try:
+            return self.distances[position]
+        except KeyError:
+            self.expand(position)
+            return self.distances.get(position)
+
+    def next_step(self, position, occupied=()):
+        """ Return the tile to move into to get closer to the destination
+
+        :param position: (x, y) of the current tile
+        :param occupied: tiles which cannot be entered now, such as tiles with npcs
+        :rtype: tuple or None
+        :returns: None if at the destination, it cannot be reached, or the way is occupied
+        """
+        distance = self.distance(position)
+        if not distance:
+            return None
+
+        distances = self.distances
+        for tile in self.fields.get_exits(position):
+            if distances.get(tile) == distance - 1 and tile not in occupied:
+                return tile
+        return None
+
+
+class FlowFields(object):
+    """ Flow fields of a world, shared by all npcs going to the same tile
+
+    Fields are per destination tile, and are expanded lazily.  When a
+    target moves, a new field is started from its new tile; fields are
+    cached by destination, so when a moving target returns to a tile its
+    field is reused.  All fields are cleared when the collision grid
+    changes.
+
+    **Examples:**
+
+    >>> fields = FlowFields(world)
+    >>> fields.next_step((1, 1), (1, 3))
+    (1, 2)
+    """
+
+    def __init__(self, world, cache_size=16):
+        """
+        :type world: tuxemon.core.states.world.worldstate.WorldState
+        :param cache_size: number of fields to keep
+        """
+        self.world = world
+        self.cache_size = cache_size
+        self.fields = OrderedDict()
+        self._exits = dict()
+        self._entrances = dict()
+        self._grid = None
+        self._grid_version = None
+
+    def clear(self):
+        """ Forget all fields and tile exits
+
+        :rtype: None
+        """
+        self.fields.clear()
+        self._exits.clear()
+        self._entrances.clear()
+
+    def validate(self):
+        """ Clear the fields if the collision grid changed
+
+        :rtype: None
+        """
+        grid = self.world.collision_map
+        if grid is not self._grid or grid.version != self._grid_version:
+            self.clear()
+            self._grid = grid
+            self._grid_version = grid.version
+
+    def get_exits(self, position):
+        """ Return the tiles which can be moved into from a tile, ignoring npcs
+
+        :param position: (x, y) of a tile
+        :rtype: tuple
+        """
+        try:
+            return self._exits[position]
+        except KeyError:
+            exits = tuple(self.world.get_exits(position, {}, ()))
+            self._exits[position] = exits
+            return exits
+
+    def get_entrances(self, position):
+        """ Return the tiles from which a tile can be moved into, ignoring npcs
+
+        :param position: (x, y) of a tile
+        :rtype: tuple
+        """
+        try:
+            return self._entrances[position]
+        except KeyError:
+            pass
+
+        grid = self.world.collision_map
+        x, y = position
+        entrances = list()
+        for neighbor in (x, y - 1), (x - 1, y), (x, y + 1), (x + 1, y):
+            if 0 <= neighbor[0] < grid.width and 0 <= neighbor[1] < grid.height:
+                if position in self.get_exits(neighbor):
+                    entrances.append(neighbor)
+        entrances = tuple(entrances)
+        self._entrances[position] = entrances
+        return entrances
+
+    def get(self, dest):
+        """ Return the flow field of a destination
+
+        :param dest: (x, y) of the destination tile
+        :rtype: FlowField
+        """
+        self.validate()
+        dest = int(dest[0]), int(dest[1])
+        try:
+            field = self.fields.pop(dest)
+        except KeyError:
+            field = FlowField(self, dest)
+
+        self.fields[dest] = field
+        while len(self.fields) > self.cache_size:
+            self.fields.popitem(last=False)
+        return field
+
+    def next_step(self, position, dest, occupied=()):
+        """ Return the tile to move into to get closer to a destination
+
+        :param position: (x, y) of the current tile
+        :param dest: (x, y) of the destination tile
+        :param occupied: tiles which cannot be entered now, such as tiles with npcs
+        :rtype: tuple or None
+        """
+        position = int(position[0]), int(position[1])
+        return self.get(dest).next_step(position, occupied)
@@ -66,6 +66,10 @@ if not os.path.isdir(paths.USER_GAME_DATA_DIR):
 if not os.path.isdir(paths.USER_GAME_SAVE_DIR):
     os.makedirs(paths.USER_GAME_SAVE_DIR)
 
+# Create game cache dir if missing
+if not os.path.isdir(paths.CACHE_DIR):
+    os.makedirs(paths.CACHE_DIR)
+
 # Generate default config
 config.generate_default_config()
 
@@ -134,7 +138,7 @@ def pygame_init():
 
     # Configure databases
     from tuxemon.core.db import db
-    db.load()
+    db.load(lazy=CONFIG.lazy_database, warm=CONFIG.warm_database)
 
     logger.debug("pygame init")
     pg.init()
@@ -187,13 +191,207 @@ def init():
         pygame_init()
 
 
+# Index of resource files: relative path => path in the winning mod
+_resource_index = None
+
+# Index of folders: relative path => names of files and folders in all mods
+_folder_index = None
+
+# Files in asset packs: path returned by fetch => (pack, name in the pack)
+_packed_resources = dict()
+
+# Open asset packs
+_asset_packs = list()
+
+# Extensions tried, in order, when the extension of an image is not known
+IMAGE_EXTENSIONS = ("png", "gif", "jpg", "jpeg")
+
+
+def _resource_key(relative_path):
+    """ Normalize a relative path so it can be used as a resource index key
+
+    :param relative_path: path relative to the mod folder
+    :rtype: str
+    """
+    return os.path.normcase(os.path.normpath(relative_path))
+
+
+def _add_resource(index, folders, relative_path, path):
+    """ Add a file or folder to the resource and folder indexes
+
+    :param index: resource index
+    :param folders: folder index
+    :param relative_path: path relative to the mod folder
+    :param path: path returned by fetch
+    :rtype: None
+    """
+    index[_resource_key(relative_path)] = path
+    parent, name = os.path.split(_resource_key(relative_path))
+    folders.setdefault(parent, set()).add(name)
+
+
+def refresh_resource_index():
+    """ Rebuild the index of resource files in all mods
+
+    The folders of every mod in CONFIG.mods are walked once.  If a file
+    exists in more than one mod, the mod listed first in CONFIG.mods wins.
+    Call this after changing CONFIG.mods or adding files to a mod folder.
+
+    If a mod has an asset pack, the files in it are indexed too, but loose
+    files in the mod folder take precedence.  See `core.pack`.
+
+    :rtype: None
+    """
+    global _resource_index, _folder_index, _packed_resources, _asset_packs
+
+    from tuxemon.core.pack import AssetPack
+
+    index = dict()
+    folders = dict()
+    packed = dict()
+
+    for pack in _asset_packs:
+        pack.close()
+    packs = list()
+
+    # walk in reverse order so that files in the first mods overwrite the others
+    for mod_name in reversed(CONFIG.mods):
+        pack_filename = os.path.join(paths.mods_folder, mod_name + ".pack")
+        if os.path.exists(pack_filename):
+            pack = AssetPack(pack_filename)
+            packs.append(pack)
+            for name in pack.names():
+                parts = name.split("/")
+                path = os.path.join(pack_filename, *parts)
+                packed[path] = pack, name
+                _add_resource(index, folders, os.path.join(*parts), path)
+
+                # add the parent folders
+                for i in range(1, len(parts)):
+                    relative_folder = os.path.join(*parts[:i])
+                    if _resource_key(relative_folder) not in index:
+                        _add_resource(index, folders, relative_folder,
+                                      os.path.join(pack_filename, relative_folder))
+
+        mod_folder = os.path.join(paths.mods_folder, mod_name)
+        for folder, dirnames, filenames in os.walk(mod_folder):
+            relative_folder = os.path.relpath(folder, mod_folder)
+            if relative_folder != os.curdir:
+                _add_resource(index, folders, relative_folder, folder)
+            for filename in filenames:
+                path = os.path.join(folder, filename)
+                _add_resource(index, folders, os.path.join(relative_folder, filename), path)
+
+    logger.debug("indexed {} resource files".format(len(index)))
+    _resource_index = index
+    _folder_index = folders
+    _packed_resources = packed
+    _asset_packs = packs
+
+
+def _get_mod_relative_path(path):
+    """ Return the path of a file in a mod folder, relative to the mod folder
+
+    :param path: absolute path
+    :rtype: str or None
+    :returns: None if the path is not in a mod folder
+    """
+    parts = os.path.relpath(path, paths.mods_folder).split(os.sep)
+    if len(parts) < 2 or parts[0] == os.pardir:
+        return None
+    return os.path.join(*parts[1:])
+
+
 # Fetches a resource file
 def fetch(*args):
     relative_path = os.path.join(*args)
 
-    for mod_name in CONFIG.mods:
-        path = os.path.join(paths.mods_folder, mod_name, relative_path)
-        if os.path.exists(path):
-            return path
+    # paths that were already fetched are absolute
+    if os.path.isabs(relative_path):
+        if relative_path in _packed_resources or os.path.exists(relative_path):
+            return relative_path
+
+        # files found through other files, like the tilesets of a map,
+        # have a path in the mod folder, but may be in an asset pack
+        mod_relative_path = _get_mod_relative_path(relative_path)
+        if mod_relative_path is None:
+            raise IOError(relative_path)
+        relative_path = mod_relative_path
+
+    if _resource_index is None:
+        refresh_resource_index()
+
+    try:
+        return _resource_index[_resource_key(relative_path)]
+    except KeyError:
+        raise IOError(relative_path)
+
+
+def open_resource(*args):
+    """ Open a resource file for reading in binary mode
+
+    Works for files in mod folders and asset packs.  Use this,
+    rather than `open`, for loaders that can read file objects.
+
+    :rtype: file
+    :raises: IOError
+    """
+    path = fetch(*args)
+    try:
+        pack, name = _packed_resources[path]
+    except KeyError:
+        return open(path, "rb")
+    return pack.open(name)
+
+
+def stat_resource(*args):
+    """ Return the modification time and size of a resource file
+
+    Works for files in mod folders and asset packs.  Files in asset packs
+    have the modification time of their pack.
+
+    :rtype: tuple
+    :returns: (modification time, size in bytes)
+    :raises: OSError
+    """
+    path = fetch(*args)
+    try:
+        pack, name = _packed_resources[path]
+    except KeyError:
+        stat = os.stat(path)
+        return stat.st_mtime, stat.st_size
+    return os.path.getmtime(pack.filename), pack.index[name][1]
+
+
+def listdir(*args):
+    """ List the names of files and folders in a resource folder
+
+    Includes the files of all mods and asset packs.
+
+    :rtype: list
+    :returns: sorted list of names
+    """
+    if _folder_index is None:
+        refresh_resource_index()
+
+    return sorted(_folder_index.get(_resource_key(os.path.join(*args)), ()))
+
+
+def fetch_any(relative_path, extensions=IMAGE_EXTENSIONS):
+    """ Fetch a resource file without knowing its extension
+
+    The extensions are tried in order; the first one that exists is returned.
+
+    :param relative_path: path of the resource, without the extension
+    :param extensions: sequence of extensions to try, without the dot
+
+    :rtype: str
+    :raises: IOError
+    """
+    for extension in extensions:
+        try:
+            return fetch("{}.{}".format(relative_path, extension))
+        except IOError:
+            pass
 
     raise IOError(relative_path)
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.routes Routes between maps.
+"""Routes between maps, through the teleports of their events.
+
+The teleport graph has an edge for each event which teleports the player
+when they walk onto its area.  Edges are read from the events of every map
+once, and saved next to the compiled maps, so planning a route does not
+load the maps.  Edges of a map are read again when its file changes.
+
+Routes are planned with Dijkstra's algorithm over the teleports.  On the
+current map, the distance to each teleport is the length of a real path;
+on other maps, where collisions are not loaded, it is the manhattan
+distance.  Each leg of a route is a walk to a tile on one map; walking
+onto a teleport tile starts its event, which moves the walker to the
+next map.
+
+`python -m tuxemon.core.routes` rebuilds the graph.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import heapq
+import itertools
+import logging
+import os
+import pickle
+from collections import namedtuple
+
+from tuxemon.constants import paths
+from tuxemon.core import prepare
+from tuxemon.core.pathfinding import manhattan
+from tuxemon.core.tools import replace_file
+
+logger = logging.getLogger(__name__)
+
+# increase when the format of the graph changes
+GRAPH_VERSION = 1
+
+# actions which change the map; the parameters are map name, x, y
+teleport_actions = "teleport", "transition_teleport", "delayed_teleport"
+
+# conditions which are true when the player is in their area
+area_conditions = "player_at", "player_moved"
+
+Teleport = namedtuple("teleport", "source tile dest position")
+Leg = namedtuple("leg", "map position teleport")
+
+
+def find_teleports(map_name, events):
+    """ Return the teleports of the events of a map
+
+    Only events started by walking onto their area are teleports; the
+    tile of a teleport is the top left tile of the area.
+
+    :param str map_name: file name of the map, like "taba_town.tmx"
+    :param list events: EventObjects of the map
+    :rtype: list
+    """
+    teleports = list()
+    for event in events:
+        areas = [c for c in event.conds if c.type in area_conditions and c.operator == "is"]
+        if not areas:
+            continue
+        area = areas[0]
+        for action in event.acts:
+            if action.type not in teleport_actions or len(action.parameters) < 3:
+                continue
+            try:
+                position = int(action.parameters[1]), int(action.parameters[2])
+            except ValueError:
+                continue
+            teleports.append(Teleport(map_name, (area.x, area.y), action.parameters[0], position))
+    return teleports
+
+
+def read_teleports(filename):
+    """ Return the teleports of a map file
+
+    The compiled map is used if it is up to date, otherwise only the
+    objects of the map are parsed.
+
+    :param str filename: path of the TMX file
+    :rtype: list
+    """
+    from tuxemon.core import mapcache
+    from tuxemon.core.map import get_tile_size, load_events, load_tmx
+
+    scale = prepare.SCALE if prepare.CONFIG.scaling else 1
+    compiled = mapcache.read_compiled(filename, scale)
+    if compiled is not None:
+        events = mapcache.decode_events(compiled["events"])
+    else:
+        data = load_tmx(filename)
+        events = load_events(data, get_tile_size(data))["event"]
+    return find_teleports(os.path.basename(filename), events)
+
+
+def get_graph_path():
+    """ Return the path of the saved teleport graph
+
+    :rtype: str
+    """
+    return os.path.join(paths.CACHE_DIR, "maps", "teleports.pickle")
+
+
+class TeleportGraph(object):
+    """ Teleports of all maps
+
+    **Examples:**
+
+    >>> graph = TeleportGraph.load()
+    >>> graph.get_teleports("taba_town.tmx")
+    [teleport(source='taba_town.tmx', tile=(11, 4), dest='player_house_downstairs.tmx', position=(4, 7)), ...]
+    """
+
+    def __init__(self, maps=None):
+        """
+        :param dict maps: map file names => (modification time, teleports)
+        """
+        self.maps = maps or dict()
+
+    @classmethod
+    def load(cls):
+        """ Load the saved graph, and update the maps which changed
+
+        The graph is saved again if it changed.
+
+        :rtype: TeleportGraph
+        """
+        maps = dict()
+        try:
+            with open(get_graph_path(), "rb") as fp:
+                saved = pickle.load(fp)
+            if saved.get("version") == GRAPH_VERSION:
+                maps = {name: (mtime, [Teleport(*i) for i in teleports])
+                        for name, (mtime, teleports) in saved["maps"].items()}
+        except (IOError, OSError):
+            pass
+        except Exception as e:
+            logger.debug("cannot read teleport graph: {}".format(e))
+
+        graph = cls(maps)
+        if graph.update():
+            graph.save()
+        return graph
+
+    def update(self):
+        """ Read the teleports of new and changed maps, and forget removed maps
+
+        :rtype: bool
+        :returns: True if the graph changed
+        """
+        maps = dict()
+        changed = False
+        for name in prepare.listdir("maps"):
+            if not name.endswith(".tmx"):
+                continue
+            filename = prepare.fetch("maps", name)
+            try:
+                mtime = os.path.getmtime(filename)
+            except OSError:
+                mtime = None
+
+            try:
+                saved_mtime, teleports = self.maps[name]
+            except KeyError:
+                saved_mtime, teleports = None, None
+
+            if teleports is None or mtime is None or mtime != saved_mtime:
+                try:
+                    teleports = read_teleports(filename)
+                except Exception as e:
+                    logger.error("cannot read teleports of {}: {}".format(filename, e))
+                    teleports = list()
+                changed = True
+            maps[name] = mtime, teleports
+
+        changed = changed or set(maps) != set(self.maps)
+        self.maps = maps
+        return changed
+
+    def save(self):
+        """ Save the graph next to the compiled maps
+
+        Errors are logged and ignored; the saved graph is only an optimization.
+
+        :rtype: None
+        """
+        # plain tuples, so they can be pickled
+        maps = {name: (mtime, [tuple(i) for i in teleports])
+                for name, (mtime, teleports) in self.maps.items()}
+
+        path = get_graph_path()
+        folder = os.path.dirname(path)
+        temp_path = path + ".tmp"
+        try:
+            if not os.path.isdir(folder):
+                os.makedirs(folder)
+            with open(temp_path, "wb") as fp:
+                pickle.dump({"version": GRAPH_VERSION, "maps": maps}, fp, protocol=2)
+            replace_file(temp_path, path)
+        except (IOError, OSError) as e:
+            logger.debug("cannot write teleport graph {}: {}".format(path, e))
+
+    def get_teleports(self, map_name):
+        """ Return the teleports of a map
+
+        :param str map_name: file name of the map, like "taba_town.tmx"
+        :rtype: list
+        """
+        try:
+            return self.maps[map_name][1]
+        except KeyError:
+            return list()
+
+
+class RoutePlanner(object):
+    """ Plan routes between maps of a world
+
+    """
+
+    def __init__(self, world, graph=None):
+        """
+        :type world: tuxemon.core.states.world.worldstate.WorldState
+        :param TeleportGraph graph: teleports of all maps; loaded when first needed
+        """
+        self.world = world
+        self._graph = graph
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            self._graph = TeleportGraph.load()
+        return self._graph
+
+    def get_distance(self, map_name, start, dest):
+        """ Return the number of moves between two tiles of a map, or None if there is no path
+
+        :param str map_name: file name of the map
+        :param start: (x, y) of the start tile
+        :param dest: (x, y) of the destination tile
+        :rtype: int or None
+        """
+        current = self.world.current_map
+        if current is not None and os.path.basename(current.filename) == map_name:
+            path = self.world.pathfinder.search(start, dest, self.world.get_collision_map())
+            return None if path is None else len(path)
+        return manhattan(start, dest)
+
+    def plan(self, start_map, start, dest_map, dest):
+        """ Return the legs of the shortest route between tiles of two maps
+
+        :param str start_map: file name of the start map, like "taba_town.tmx"
+        :param start: (x, y) of the start tile
+        :param str dest_map: file name of the destination map
+        :param dest: (x, y) of the destination tile
+        :rtype: list or None
+        :returns: Legs, or None if there is no route
+        """
+        start = int(start[0]), int(start[1])
+        dest = int(dest[0]), int(dest[1])
+        graph = self.graph
+        counter = itertools.count()
+
+        # nodes are (map, tile) where a leg starts; legs are kept to build the route
+        best = {(start_map, start): 0}
+        previous = dict()
+        open_set = [(0, next(counter), start_map, start)]
+        found = None
+        while open_set:
+            cost, _, map_name, position = heapq.heappop(open_set)
+            node = map_name, position
+            if cost > best.get(node, cost):
+                continue
+            if node == (dest_map, dest):
+                found = node
+                break
+
+            # walk to the destination, or to a teleport of this map
+            steps = list()
+            if map_name == dest_map:
+                steps.append((Leg(dest_map, dest, None), (dest_map, dest)))
+            for teleport in graph.get_teleports(map_name):
+                leg = Leg(map_name, teleport.tile, teleport)
+                steps.append((leg, (teleport.dest, teleport.position)))
+
+            for leg, next_node in steps:
+                distance = self.get_distance(map_name, position, leg.position)
+                if distance is None:
+                    continue
+                # teleporting costs one move, so routes prefer fewer maps
+                next_cost = cost + distance + (1 if leg.teleport else 0)
+                if next_cost < best.get(next_node, next_cost + 1):
+                    best[next_node] = next_cost
+                    previous[next_node] = node, leg
+                    heapq.heappush(open_set, (next_cost, next(counter), next_node[0], next_node[1]))
+
+        if found is None:
+            return None
+
+        legs = list()
+        node = found
+        while node in previous:
+            node, leg = previous[node]
+            legs.append(leg)
+        legs.reverse()
+        return legs
+
+
+if __name__ == "__main__":
+    graph = TeleportGraph.load()
+    print("Found {} teleports in {} maps".format(
+        sum(len(i[1]) for i in graph.maps.values()), len(graph.maps)))
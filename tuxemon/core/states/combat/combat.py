@@ -42,6 +42,7 @@ import pygame
 
 from tuxemon.core import state, tools
 from tuxemon.core.combat import check_status, fainted, get_awake_monsters, defeated
+from tuxemon.core.loader import LOW
 from tuxemon.core.locale import T
 from tuxemon.core.pyganim import PygAnimation
 from tuxemon.core.sprite import Sprite
@@ -476,6 +477,7 @@ class CombatState(CombatAnimations):
         self.animate_monster_release(player, monster)
         self.build_hud(self._layout[player]['hud'][0], monster)
         self.monsters_in_play[player].append(monster)
+        self.prefetch_techniques(monster)
 
         # TODO: not hardcode
         if player is self.players[0]:
@@ -791,6 +793,23 @@ class CombatState(CombatAnimations):
             self._technique_cache[technique] = sprite
             return sprite
 
+    def prefetch_techniques(self, monster):
+        """ Request the animations and sounds of a monster's techniques to be loaded in the background
+
+        Loading a technique animation later waits for images which are
+        still loading, instead of loading them again.
+
+        :param monster: monster entering play
+        :return: None
+        """
+        for technique in monster.moves:
+            if technique in self._technique_cache:
+                continue
+            for fn in technique.images:
+                tools.load_and_scale_async(fn, LOW)
+            if technique.sfx:
+                tools.load_sound_async(technique.sfx, LOW)
+
     @staticmethod
     def load_technique_animation(technique):
         """
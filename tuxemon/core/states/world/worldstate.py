@@ -38,15 +38,25 @@ import logging
 import pygame
 from six.moves import map as imap
 
-from tuxemon.core import prepare, state, networking
+from tuxemon.core import collision, prepare, state, networking
+from tuxemon.core.cache import LRUCache
 from tuxemon.core.db import db
-from tuxemon.core.map import PathfindNode, Map, dirs2, pairs
+from tuxemon.core.entitystore import EntityStore
+from tuxemon.core.loader import asset_loader, LOW, NORMAL
+from tuxemon.core.map import Map, pairs, tile_offsets
+from tuxemon.core.npc import prefetch_sprites
+from tuxemon.core.pathfinding import FlowFields, Pathfinder
+from tuxemon.core.routes import RoutePlanner
 from tuxemon.core.platform.const import buttons, events, intentions
 from tuxemon.core.tools import nearest
+from tuxemon.core.worldmap import WorldMap, is_world
 
 logger = logging.getLogger(__name__)
 
 
+# actions which change the map; the first parameter is the map name
+teleport_actions = "teleport", "transition_teleport", "delayed_teleport"
+
 direction_map = {
     intentions.UP: "up",
     intentions.DOWN: "down",
@@ -59,8 +69,6 @@ class WorldState(state.State):
     """ The state responsible for the world game play
     """
 
-    preloaded_maps = {}
-
     keymap = {
         buttons.UP: intentions.UP,
         buttons.DOWN: intentions.DOWN,
@@ -85,16 +93,29 @@ class WorldState(state.State):
 
         self.npcs = {}
         self.npcs_off_map = {}
+        self.occupancy = collision.Occupancy()
+        self.occupancy_source = self.npcs
+        self.entity_store = None
+        if prepare.CONFIG.batch_physics and EntityStore.available:
+            self.entity_store = EntityStore()
+        self.lod_frame = 0
         self.player1 = None
         self.wants_to_move_player = None
         self.allow_player_movement = True
+        self.pathfinder = Pathfinder(self)
+        self.flow_fields = FlowFields(self)
+        self.route_planner = RoutePlanner(self)
 
         ######################################################################
         #                              Map                                   #
         ######################################################################
 
-        # Keep a map of preloaded maps for fast map switching.
-        self.preloaded_maps = {}
+        # Keep a cache of preloaded maps for fast map switching.
+        # The current map is pinned, so it is never evicted.
+        self.preloaded_maps = LRUCache(prepare.CONFIG.map_cache_size * 1024 * 1024,
+                                       lambda map_data: map_data["data"].get_byte_size())
+        # maps which are loading in the background, by name
+        self.map_futures = dict()
         self.current_map = None
 
         ######################################################################
@@ -278,6 +299,7 @@ class WorldState(state.State):
         """
         super(WorldState, self).update(time_delta)
         self.move_npcs(time_delta)
+        self.update_world_chunks()
         logger.debug("*** Game Loop Started ***")
         logger.debug("Player Variables:" + str(self.player1.game_variables))
 
@@ -428,7 +450,8 @@ class WorldState(state.State):
                 # offset for center and image height
                 c = nearest((c[0], c[1] - h // 2))
 
-            screen_surfaces.append((s, c, l))
+            # newer versions of pyscroll require a rect
+            screen_surfaces.append((s, s.get_rect(topleft=c), l))
 
         # draw the map and sprites
         self.rect = self.current_map.renderer.draw(surface, surface.get_rect(), screen_surfaces)
@@ -462,6 +485,9 @@ class WorldState(state.State):
         """
         entity.world = self
         self.npcs[entity.slug] = entity
+        entity.update_occupancy()
+        if self.entity_store is not None:
+            self.entity_store.add(entity)
 
     def get_entity(self, slug):
         """
@@ -477,7 +503,10 @@ class WorldState(state.State):
         :type slug: str
         :return:
         """
-        del self.npcs[slug]
+        entity = self.npcs.pop(slug)
+        self.occupancy.remove(entity)
+        if self.entity_store is not None:
+            self.entity_store.remove(entity)
 
     def get_all_entities(self):
         """ List of players and NPCs, for collision checking
@@ -487,81 +516,41 @@ class WorldState(state.State):
         return self.npcs.values()
 
     def get_collision_map(self):
-        """ Return dictionary for collision testing
+        """ Return the tiles occupied by entities, for collision testing
 
-        Returns a dictionary where keys are (x, y) tile tuples
-        and the values are tiles or NPCs.
+        Works like a dictionary where keys are (x, y) tile tuples
+        and the values are {"entity": npc}.  Collisions of the map tiles
+        are in `self.collision_map`, a CollisionGrid.
 
-        # NOTE:
-        This will not respect map changes to collisions
-        after the map has been loaded!
+        The occupancy is updated by the entities when they move.  If NPCs
+        were added or removed without `add_entity` and `remove_entity`, it
+        is rebuilt.
 
-        :rtype: dict
-        :returns: A dictionary of collision tiles
+        :rtype: tuxemon.core.collision.Occupancy
+        :returns: The tiles occupied by entities
         """
-        # TODO: overlapping tiles/objects by returning a list
-        collision_dict = dict()
-
-        # Get all the NPCs' tile positions
-        for npc in self.get_all_entities():
-            pos = nearest(npc.tile_pos)
-            collision_dict[pos] = {"entity": npc}
+        occupancy = self.occupancy
+        if self.occupancy_source is not self.npcs or occupancy.count() != len(self.npcs):
+            occupancy.clear()
+            for npc in self.get_all_entities():
+                occupancy.place(npc, npc.get_occupied_tiles())
+            self.occupancy_source = self.npcs
 
-        # tile layout takes precedence
-        collision_dict.update(self.collision_map)
-
-        return collision_dict
+        return occupancy
 
     def pathfind(self, start, dest):
         """ Pathfind
 
-        :param start:
-        :type dest: tuple
-
-        :return:
-        """
-        pathnode = self.pathfind_r(
-            dest,
-            [PathfindNode(start)],
-            set(),
-        )
-
-        if pathnode:
-            # traverse the node to get the path
-            path = []
-            while pathnode:
-                path.append(pathnode.get_value())
-                pathnode = pathnode.get_parent()
-
-            return path[:-1]
-
-        else:
-            # TODO: get current map name for a more useful error
-            logger.error("Pathfinding failed to find a path from " +
-                         str(start) + " to " + str(dest) +
-                         ". Are you sure that an obstacle-free path exists?")
-
-    def pathfind_r(self, dest, queue, known_nodes):
-        """ Breadth first search algorithm
+        Paths are found with A*, and recent paths are cached until
+        collisions change.
 
+        :param start:
         :type dest: tuple
-        :type queue: list
-        :type known_nodes: set
 
-        :rtype: list
+        :rtype: list or None
+        :returns: tiles of the path, from the destination back to the first step
         """
-        # The collisions shouldn't have changed whilst we were calculating,
-        # so it saves time to reuse the map.
-        collision_map = self.get_collision_map()
-        while queue:
-            node = queue.pop(0)
-            if node.get_value() == dest:
-                return node
-            else:
-                for adj_pos in self.get_exits(node.get_value(), collision_map, known_nodes):
-                    new_node = PathfindNode(adj_pos, node)
-                    known_nodes.add(new_node.get_value())
-                    queue.append(new_node)
+        return self.pathfinder.find(start, dest)
 
     def get_explicit_tile_exits(self, position, tile, skip_nodes):
         """ Check for exits from tile which are defined in the map
@@ -571,7 +560,7 @@ class WorldState(state.State):
         Checks "continue" and "exits" properties of the tile
 
         :param position: tuple
-        :param tile:
+        :param tile: collision flags of the tile
         :param skip_nodes: set
         :return: list
         """
@@ -579,24 +568,24 @@ class WorldState(state.State):
         # this check is for tiles which define the only way to exit.
         # for instance, one-way tiles.
 
+        x, y = position
+
         # does the tile define continue movements?
-        try:
-            return [tuple(dirs2[tile["continue"]] + position)]
-        except KeyError:
-            pass
+        continues = collision.get_directions(tile, collision.CONTINUE)
+        if continues:
+            dx, dy = tile_offsets[continues[0]]
+            return [(x + dx, y + dy)]
 
         # does the tile explicitly define exits?
-        try:
-            adjacent_tiles = list()
-            for direction in tile["exit"]:
-                exit_tile = tuple(dirs2[direction] + position)
-                if exit_tile in skip_nodes:
-                    continue
+        adjacent_tiles = list()
+        for direction in collision.get_directions(tile, collision.EXIT):
+            dx, dy = tile_offsets[direction]
+            exit_tile = x + dx, y + dy
+            if exit_tile in skip_nodes:
+                continue
 
-                adjacent_tiles.append(exit_tile)
-            return adjacent_tiles
-        except KeyError:
-            pass
+            adjacent_tiles.append(exit_tile)
+        return adjacent_tiles
 
     def get_exits(self, position, collision_map=None, skip_nodes=None):
         """ Return list of tiles which can be moved into
@@ -605,23 +594,25 @@ class WorldState(state.State):
         npcs, and collision lines, one-way tiles, etc
 
         :param position: tuple
-        :param collision_map: dict
+        :param collision_map: dict of entities, from get_collision_map
         :param skip_nodes: set
 
         :rtype: list
         """
-        # get tile-level and npc/entity blockers
+        # get npc/entity blockers
         if collision_map is None:
             collision_map = self.get_collision_map()
 
         if skip_nodes is None:
             skip_nodes = set()
 
+        grid = self.collision_map
+        tile = grid.get_flags(position)
+
         # if there are explicit way to exit this position use that information,
         # handles 'continue' and 'exits'
-        tile_data = collision_map.get(position)
-        if tile_data:
-            exits = self.get_explicit_tile_exits(position, tile_data, skip_nodes)
+        if tile & collision.PROPERTIES:
+            exits = self.get_explicit_tile_exits(position, tile, skip_nodes)
         else:
             exits = None
 
@@ -647,27 +638,20 @@ class WorldState(state.State):
                 continue
 
             # check to see if this tile is separated by a wall
-            if (position, direction) in self.collision_lines_map:
+            if tile & collision.flag(collision.WALL, direction):
                 # there is a wall so stop checking this direction
                 continue
 
             # test if this tile has special movement handling
-            # NOTE: Do not refact. into a dict.get(xxxxx, None) style check
-            # NOTE: None has special meaning in this check
-            try:
-                tile_data = collision_map[neighbor]
-            except KeyError:
-                pass
-            else:
-                # None means tile is blocked with no specific data
-                if tile_data is None:
+            # tile layout takes precedence over entities
+            neighbor_tile = grid.get_flags(neighbor)
+            if neighbor_tile & collision.COLLISION:
+                if not neighbor_tile & collision.flag(collision.ENTER, pairs[direction]):
                     continue
 
-                try:
-                    if pairs[direction] not in tile_data["enter"]:
-                        continue
-                except KeyError:
-                    continue
+            # entities block the tile
+            elif neighbor in collision_map:
+                continue
 
             # no tile data, so assume it is free to move into
             adjacent_tiles.append(neighbor)
@@ -751,25 +735,92 @@ class WorldState(state.State):
     def project(self, position):
         return position[0] * self.tile_size[0], position[1] * self.tile_size[1]
 
+    def get_lod(self):
+        """ Return how often entities out of view are moved, and the tiles in view
+
+        The tiles in view are the tiles of the camera, plus a margin.  The
+        rate and margin are set by the "lod_rate" and "lod_margin" map
+        properties, or the config.
+
+        :rtype: tuple
+        :returns: (rate in frames, (left, top, right, bottom) in tiles)
+        """
+        current_map = self.current_map
+        rate = current_map.lod_rate
+        if rate is None:
+            rate = prepare.CONFIG.lod_rate
+        renderer = getattr(current_map, "renderer", None)
+        if rate <= 1 or renderer is None:
+            return 1, None
+
+        margin = current_map.lod_margin
+        if margin is None:
+            margin = prepare.CONFIG.lod_margin
+        view = renderer.view_rect
+        tw, th = self.tile_size
+        bounds = (view.left / tw - margin, view.top / th - margin,
+                  view.right / tw + margin, view.bottom / th + margin)
+        return rate, bounds
+
+    def get_moves(self, entities, time_delta, rate, bounds):
+        """ Return the entities to move this frame, and the time to move each by
+
+        Entities out of view are moved every `rate` frames, by all the
+        time since they were last moved.  They are spread over the frames,
+        so about the same number is moved every frame.  Entities which come
+        into view catch up on the next frame.
+
+        :param entities: entities to move
+        :param float time_delta: time passed since the last frame
+        :param int rate: move entities out of view every `rate` frames
+        :param bounds: (left, top, right, bottom) tiles in view; None if none are
+        :rtype: list
+        """
+        moves = list()
+        frame = self.lod_frame
+        player = self.player1
+        for index, entity in enumerate(entities):
+            entity.lod_time += time_delta
+            if rate > 1 and entity is not player and (frame + index) % rate:
+                x, y = entity.tile_pos
+                if bounds is None or not (bounds[0] <= x <= bounds[2] and bounds[1] <= y <= bounds[3]):
+                    continue
+            moves.append((entity, entity.lod_time))
+            entity.lod_time = 0.0
+        return moves
+
     def move_npcs(self, time_delta):
         """ Move NPCs and Players around according to their state
 
+        Entities out of view are moved less often; see `get_moves`.
+
         :type time_delta: float
         :return:
         """
         # TODO: This function may be moved to a server
+        self.lod_frame += 1
+        rate, bounds = self.get_lod()
+        moves = self.get_moves(self.get_all_entities(), time_delta, rate, bounds)
+
+        # Move any multiplayer characters that are off map so we know where they should be when we change maps.
+        off_map_moves = self.get_moves(self.npcs_off_map.values(), time_delta, rate, None)
+
+        # entities in the store are moved all at once; they only update
+        # their tile positions in `move`
+        if self.entity_store is not None:
+            self.entity_store.step_entities(moves + off_map_moves)
+
         # Draw any game NPC's
-        for entity in self.get_all_entities():
-            entity.move(time_delta)
+        for entity, td in moves:
+            entity.move(td)
 
             if entity.update_location:
                 char_dict = {"tile_pos": entity.final_move_dest}
                 networking.update_client(entity, char_dict, self.game)
                 entity.update_location = False
 
-        # Move any multiplayer characters that are off map so we know where they should be when we change maps.
-        for entity in self.npcs_off_map.values():
-            entity.move(time_delta, self)
+        for entity, td in off_map_moves:
+            entity.move(td)
 
     def _collision_box_to_pgrect(self, box):
         """Returns a pygame.Rect (in screen-coords) version of a collision box (in world-coords).
@@ -909,15 +960,28 @@ class WorldState(state.State):
         # Set the currently loaded map. This is needed because the event
         # engine loads event conditions and event actions from the currently
         # loaded map. If we change maps, we need to update this.
-        if map_name not in self.preloaded_maps.keys():
+        map_data = self.get_preloaded_map(map_name)
+        if map_data is None:
             logger.debug("Map was not preloaded. Loading from disk.")
             map_data = self.load_map(map_name)
         else:
             logger.debug("%s was found in preloaded maps." % map_name)
-            map_data = self.preloaded_maps[map_name]
-            self.clear_preloaded_maps()
+
+        # preloaded maps are loaded on a loader thread, so their images are
+        # converted, and their renderer created, here on the main thread
+        if map_data["data"].renderer is None:
+            map_data["data"].load_images()
+            map_data["data"].renderer = map_data["data"].initialize_renderer()
+
+        # keep the current map in the cache, so going back is fast
+        if self.current_map is not None:
+            self.preloaded_maps.unpin(self.current_map.filename)
+        self.preloaded_maps.put(map_name, map_data, pin=True)
 
         self.current_map = map_data["data"]
+        if isinstance(self.current_map, WorldMap):
+            # chunks are loaded around the player, and their NPCs are created again
+            self.current_map.reset()
         self.collision_map = map_data["collision_map"]
         self.collision_lines_map = map_data["collision_lines_map"]
         self.map_size = map_data["map_size"]
@@ -926,11 +990,17 @@ class WorldState(state.State):
         self.invalid_x = (-1, self.map_size[0])
         self.invalid_y = (-1, self.map_size[1])
 
+        self.prefetch_map_assets(map_data)
         self.game.load_map(map_data)
+        self.preload_teleport_destinations(map_data)
 
         # Clear out any existing NPCs
         self.npcs = {}
         self.npcs_off_map = {}
+        self.occupancy.clear()
+        self.occupancy_source = self.npcs
+        if self.entity_store is not None:
+            self.entity_store.clear()
         self.add_player(self.game.player1)
 
         # reset controls and stop moving to prevent player from
@@ -942,11 +1012,72 @@ class WorldState(state.State):
             if eo.name.lower() == "player spawn":
                 self.player1.set_position((eo.x, eo.y))
 
-    def load_map(self, map_name):
+    def prefetch_map_assets(self, map_data):
+        """ Request the sprites of NPCs created by map events to be loaded in the background
+
+        NPCs created when the map loads are requested first.
+
+        :param map_data: map data returned by load_map
+        :return: None
+        """
+        groups = (map_data["inits"], NORMAL), (map_data["events"], LOW), (map_data["interacts"], LOW)
+        for event_objects, priority in groups:
+            for event_object in event_objects:
+                for action in event_object.acts:
+                    if action.type != "create_npc" or not action.parameters:
+                        continue
+                    params = action.parameters
+                    sprite_name = params[3] if len(params) > 3 else None
+                    if not sprite_name:
+                        npc_data = db.database["npc"].get(params[0])
+                        sprite_name = npc_data and npc_data.get("sprite_name")
+                    if sprite_name:
+                        prefetch_sprites(sprite_name, priority)
+
+    def update_world_chunks(self):
+        """ Stream the chunks of a world around the player
+
+        The events of new chunks are added to the game, and their
+        NPC sprites and teleport destinations are loaded in the background.
+
+        :return: None
+        """
+        world = self.current_map
+        if not isinstance(world, WorldMap) or self.player1 is None:
+            return
+
+        attached, detached = world.update(self.player1.tile_pos)
+        self.game.events = world.events
+        self.game.interacts = world.interacts
+        for chunk in detached:
+            # the tiles of the npcs are gone; the inits of the chunk
+            # create them again when it is loaded
+            for slug in chunk.npc_slugs:
+                if slug in self.npcs and self.npcs[slug] is not self.player1:
+                    self.remove_entity(slug)
+        for chunk in attached:
+            chunk_data = {
+                "data": world,
+                "events": chunk.events,
+                "inits": chunk.inits,
+                "interacts": chunk.interacts,
+            }
+            self.game.inits = self.game.inits + chunk.inits
+            self.prefetch_map_assets(chunk_data)
+            self.preload_teleport_destinations(chunk_data)
+
+    def load_map(self, map_name, create_renderer=True):
         """ Returns map data as a dictionary to be used for map changing and preloading
+
+        :param map_name: path of the map file
+        :param create_renderer: If False, the images are converted and the renderer
+            is created by change_map.  Both must be done on the main thread.
         """
         map_data = {}
-        map_data["data"] = Map(map_name)
+        if is_world(map_name):
+            map_data["data"] = WorldMap(map_name, create_renderer)
+        else:
+            map_data["data"] = Map(map_name, create_renderer)
         map_data["events"] = map_data["data"].events
         map_data["inits"] = map_data["data"].inits
         map_data["interacts"] = map_data["data"].interacts
@@ -956,19 +1087,71 @@ class WorldState(state.State):
         return map_data
 
     def preload_map(self, map_name):
-        """ Preload a map for quicker access
+        """ Preload a map in the background for quicker access
+
+        The map is added to the preloaded maps when it is loaded.
+
+        :param map_name: path of the map file
+        :rtype: tuxemon.core.loader.AssetFuture
+        """
+        def add(future):
+            # don't replace the map if it became the current map meanwhile
+            if future.exception() is None:
+                self.preloaded_maps.put_if_absent(map_name, future.result())
+            # forget the future only once the map is cached, so
+            # get_preloaded_map always finds it in one or the other
+            if self.map_futures.get(map_name) is future:
+                del self.map_futures[map_name]
+
+        future = asset_loader.submit(("map", map_name), self.load_map, map_name, False, priority=LOW)
+        self.map_futures[map_name] = future
+        future.add_done_callback(add)
+        return future
+
+    def get_preloaded_map(self, map_name):
+        """ Return a preloaded map, waiting for it if it is still loading
+
+        :param map_name: path of the map file
+        :returns: map data returned by load_map, or None if the map is not preloaded
+        """
+        future = self.map_futures.get(map_name)
+        if future is None:
+            return self.preloaded_maps.get(map_name)
+
+        try:
+            # moves the request to the front of the queue, if it is waiting
+            asset_loader.wait(future.key)
+            return future.result()
+        except Exception:
+            # the error was logged by the loader; the map is loaded again
+            return None
+
+    def preload_teleport_destinations(self, map_data):
+        """ Preload the maps which can be reached by teleport events of a map
 
-        :param map_name:
+        :param map_data: map data returned by load_map
         :return: None
         """
-        self.preloaded_maps[map_name] = self.load_map(map_name)
+        for event_object in itertools.chain(map_data["events"], map_data["interacts"]):
+            for action in event_object.acts:
+                if action.type not in teleport_actions or not action.parameters:
+                    continue
+                try:
+                    map_name = prepare.fetch("maps", action.parameters[0])
+                except IOError:
+                    logger.error("teleport to missing map: {}".format(action.parameters[0]))
+                    continue
+                if map_name != map_data["data"].filename and map_name not in self.preloaded_maps:
+                    self.preload_map(map_name)
 
     def clear_preloaded_maps(self):
         """ Clear the preloaded maps cache
 
+        The current map is kept.
+
         :return: None
         """
-        self.preloaded_maps = {}
+        self.preloaded_maps.clear(keep_pinned=True)
 
     def check_interactable_space(self):
         """Checks to see if any Npc objects around the player are interactable. It then populates a menu
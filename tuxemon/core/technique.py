@@ -42,7 +42,7 @@ from collections import namedtuple
 from tuxemon.core import prepare
 from tuxemon.core import formula
 from tuxemon.core.locale import T
-from tuxemon.core.db import db, process_targets
+from tuxemon.core.db import db
 
 logger = logging.getLogger(__name__)
 
@@ -136,14 +136,13 @@ class Technique(object):
         self.accuracy = results.get("accuracy")
         self.potency = results.get("potency")
         self.effect = results["effects"]
-        self.target = process_targets(results["target"])
+        self.target = results["target"]
 
         # Load the animation sprites that will be used for this technique
         self.animation = results["animation"]
         if self.animation:
             self.images = []
-            animation_dir = prepare.fetch("animations", "technique")
-            directory = sorted(os.listdir(animation_dir))
+            directory = prepare.listdir("animations", "technique")
             for image in directory:
                 if self.animation and image.startswith(self.animation):
                     self.images.append(os.path.join("animations/technique", image))
@@ -31,23 +31,64 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import io
 import logging
 import operator
 import os.path
 import re
+from collections import OrderedDict, namedtuple
 
 import pygame
 
 import tuxemon.core.sprite
 import tuxemon.core.monster
+from tuxemon.constants import paths
 from tuxemon.core import prepare
 from tuxemon.core import pyganim
+from tuxemon.core.atlas import Atlas, build_atlas
+from tuxemon.core.cache import ImageDiskCache, LRUCache, surface_size
 from tuxemon.core.db import db
+from tuxemon.core.loader import asset_loader, NORMAL
 from tuxemon.core.platform import mixer
 
 logger = logging.getLogger(__name__)
 
 
+# unconverted image, and whether it has transparent pixels
+decoded_image = namedtuple("decoded_image", "surface alpha")
+
+
+def _cached_size(value):
+    if isinstance(value, Atlas):
+        return value.get_byte_size()
+    return surface_size(value)
+
+
+def _decoded_size(value):
+    if isinstance(value, decoded_image):
+        return surface_size(value.surface)
+    return sum(surface_size(image.surface) for name, image in value)
+
+
+# Shared cache of loaded images and atlases.  Keys are (path, scale, conversion mode)
+surface_cache = LRUCache(prepare.CONFIG.surface_cache_size * 1024 * 1024, _cached_size)
+
+# Images and atlas frames decoded by loader threads, which are converted
+# on the main thread when they are first used.  Keys are the same as
+# the keys of the surface cache.
+decoded_cache = LRUCache(prepare.CONFIG.surface_cache_size * 1024 * 1024, _decoded_size)
+
+# Loaded sounds, by slug
+sound_cache = LRUCache(128)
+
+# Converted and scaled images saved between launches
+if prepare.CONFIG.image_disk_cache:
+    image_disk_cache = ImageDiskCache(os.path.join(paths.CACHE_DIR, "images"))
+    image_disk_cache.prune(prepare.CONFIG.image_disk_cache_size * 1024 * 1024)
+else:
+    image_disk_cache = None
+
+
 def strip_from_sheet(sheet, start, size, columns, rows=1):
     """Strips individual frames from a sprite sheet given a start location,
     sprite size, and number of columns and rows."""
@@ -101,17 +142,145 @@ def transform_resource_filename(*filename):
     return prepare.fetch(*filename)
 
 
-def load_and_scale(filename):
+def replace_file(temp_path, path):
+    """ Move a finished temporary file over another file
+
+    Files are written to a temporary file first and moved in place when
+    complete, so a running game will never read a partially written
+    file.  The move is atomic where the platform allows it.
+
+    :param str temp_path: completely written file
+    :param str path: file to replace
+    :rtype: None
+    """
+    try:
+        replace = os.replace
+    except AttributeError:
+        # python 2: rename replaces files atomically, except on windows
+        if os.name == "nt" and os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+    else:
+        replace(temp_path, path)
+
+
+def load_and_scale(filename, pin=False):
     """ Load an image and scale it according to game settings
 
     * Filename will be transformed to be loaded from game resource folder
     * Will be converted if needed.
     * Scale factor will match game setting.
 
+    The image is cached, and the same surface is returned each time it is
+    loaded.  Do not draw on it; make a copy instead.
+
     :param filename:
+    :param pin: Keep the image in the cache, for images that are always used
     :rtype: pygame.Surface
     """
-    return scale_surface(load_image(filename), prepare.SCALE)
+    path = transform_resource_filename(filename)
+    key = path, prepare.SCALE, "smart"
+    surface = surface_cache.get(key)
+    if surface is None:
+        # it may be decoding in the background
+        asset_loader.wait(("image", filename, prepare.SCALE))
+        image = _take_decoded(key) or _decode_file(path, prepare.SCALE)
+        surface = _convert(image)
+        surface_cache.put(key, surface, pin)
+    elif pin:
+        surface_cache.pin(key)
+    return surface
+
+
+def load_atlas(filenames, pin=False):
+    """ Load images, scale them, and pack them into an atlas
+
+    Use this for the frames of sprites, so they are kept in a few large
+    surfaces instead of many small ones.  The atlas is cached, and the
+    same atlas is returned each time the same files are loaded.  Do not
+    draw on the frames.
+
+    **Examples:**
+
+    >>> atlas = load_atlas(["sprites/adventurer_front.png", "sprites/adventurer_back.png"])
+    >>> atlas["sprites/adventurer_back.png"]
+    <Surface(64x96x32 SW)>
+
+    :param list filenames: filenames to load, which are also the names of the frames
+    :param pin: Keep the atlas in the cache, for images that are always used
+    :rtype: tuxemon.core.atlas.Atlas
+    """
+    # the same file may be used for more than one frame
+    filenames = list(OrderedDict.fromkeys(filenames))
+    fetched = [transform_resource_filename(i) for i in filenames]
+    key = tuple(fetched), prepare.SCALE, "atlas"
+    atlas = surface_cache.get(key)
+    if atlas is None:
+        # it may be decoding in the background
+        asset_loader.wait(("atlas", tuple(filenames), prepare.SCALE))
+        images = _take_decoded(key) or _decode_atlas(filenames, fetched)
+        atlas = build_atlas([(name, _convert(image)) for name, image in images])
+        surface_cache.put(key, atlas, pin)
+    elif pin:
+        surface_cache.pin(key)
+    return atlas
+
+
+def load_and_scale_async(filename, priority=NORMAL):
+    """ Request an image for `load_and_scale` to be decoded in the background
+
+    Surfaces can only be converted on the main thread, so the image is
+    converted when `load_and_scale` is first called for it.  The result
+    of the future is None.
+
+    :param filename: image to load
+    :param priority: loader priority
+    :rtype: tuxemon.core.loader.AssetFuture
+    """
+    key = "image", filename, prepare.SCALE
+    return asset_loader.submit(key, _prefetch_image, filename, priority=priority)
+
+
+def load_atlas_async(filenames, priority=NORMAL):
+    """ Request images for `load_atlas` to be decoded in the background
+
+    Surfaces can only be converted on the main thread, so the images are
+    converted and packed when `load_atlas` is first called for them.  The
+    result of the future is None.
+
+    :param filenames: images to load
+    :param priority: loader priority
+    :rtype: tuxemon.core.loader.AssetFuture
+    """
+    filenames = tuple(OrderedDict.fromkeys(filenames))
+    key = "atlas", filenames, prepare.SCALE
+    return asset_loader.submit(key, _prefetch_atlas, filenames, priority=priority)
+
+
+def _prefetch_image(filename):
+    path = transform_resource_filename(filename)
+    key = path, prepare.SCALE, "smart"
+    if key not in surface_cache and key not in decoded_cache:
+        decoded_cache.put(key, _decode_file(path, prepare.SCALE))
+
+
+def _prefetch_atlas(filenames):
+    fetched = [transform_resource_filename(i) for i in filenames]
+    key = tuple(fetched), prepare.SCALE, "atlas"
+    if key not in surface_cache and key not in decoded_cache:
+        decoded_cache.put(key, _decode_atlas(filenames, fetched))
+
+
+def _decode_atlas(filenames, fetched):
+    return [(name, _decode_file(path, prepare.SCALE)) for name, path in zip(filenames, fetched)]
+
+
+def _take_decoded(key):
+    """ Remove and return a value of the decoded cache, or None if missing """
+    value = decoded_cache.get(key)
+    if value is not None:
+        decoded_cache.discard(key)
+    return value
 
 
 def smart_convert(image):
@@ -121,32 +290,94 @@ def smart_convert(image):
     :param image: pygame.Surface
     :rtype: pygame.Surface
     """
+    if has_transparency(image):
+        return image.convert_alpha()
+
+    return image.convert()
+
+
+def has_transparency(image):
+    """ Return True if an unconverted image has transparent pixels
+
+    :param image: pygame.Surface
+    :rtype: bool
+    """
     # get number of opaque pixels in the image
     px = pygame.mask.from_surface(image, 127).count()
 
-    # there are no transparent pixels in the image because
+    # there are no transparent pixels in the image if
     # the number of pixels matches the number of opaque pixels
-    if px == operator.mul(*image.get_size()):
-        return image.convert()
-
-    return image.convert_alpha()
+    return px != operator.mul(*image.get_size())
 
 
-def load_image(filename):
+def load_image(filename, pin=False):
     """ Load image from the resources folder
 
     * Filename will be transformed to be loaded from game resource folder
     * Will be converted if needed.
 
     This is a "smart" loader, and will convert files in the best way,
-    but is slightly slower than just loading.  Its important that
-    this is not called too often (like once per draw!)
+    but is slightly slower than just loading.  The image is cached, and
+    the same surface is returned each time it is loaded.  Do not draw on
+    it; make a copy instead.
 
     :param filename: String
+    :param pin: Keep the image in the cache, for images that are always used
     :rtype: pygame.Surface
     """
     filename = transform_resource_filename(filename)
-    return smart_convert(pygame.image.load(filename))
+    key = filename, 1, "smart"
+    surface = surface_cache.get(key)
+    if surface is None:
+        surface = _convert(_decode_file(filename))
+        surface_cache.put(key, surface, pin)
+    elif pin:
+        surface_cache.pin(key)
+    return surface
+
+
+def _decode_file(filename, scale=1):
+    """ Load and scale an image, without converting it or using the surface cache
+
+    This does not touch the display, so it may be called from loader
+    threads.  If enabled, the image disk cache is checked first, which
+    skips reading the file, decoding, the transparency check, and scaling.
+
+    :param filename: path returned by prepare.fetch
+    :param scale: scale factor
+    :rtype: decoded_image
+    """
+    key = None
+    if image_disk_cache is not None:
+        key = image_disk_cache.make_key(filename, scale)
+        source_stat = prepare.stat_resource(filename)
+        cached = image_disk_cache.load(key, source_stat)
+        if cached is not None:
+            return decoded_image(*cached)
+
+    with prepare.open_resource(filename) as fp:
+        data = fp.read()
+
+    image = pygame.image.load(io.BytesIO(data), filename)
+    alpha = has_transparency(image)
+    if scale != 1:
+        image = scale_surface(image, scale)
+
+    if key is not None:
+        image_disk_cache.save(key, source_stat, image, alpha)
+
+    return decoded_image(image, alpha)
+
+
+def _convert(image):
+    """ Convert a decoded image to the display format; only call this on the main thread
+
+    :param decoded_image image: image returned by _decode_file
+    :rtype: pygame.Surface
+    """
+    if image.alpha:
+        return image.surface.convert_alpha()
+    return image.surface.convert()
 
 
 def load_sprite(filename, **rect_kwargs):
@@ -162,7 +393,8 @@ def load_sprite(filename, **rect_kwargs):
     :rtype: core.sprite.Sprite
     """
     sprite = tuxemon.core.sprite.Sprite()
-    sprite.image = load_and_scale(filename)
+    # sprites may be drawn on, so don't share the cached image
+    sprite.image = load_and_scale(filename).copy()
     sprite.rect = sprite.image.get_rect(**rect_kwargs)
     return sprite
 
@@ -182,9 +414,11 @@ def load_animated_sprite(filenames, delay, **rect_kwargs):
     """
     anim = []
     for filename in filenames:
-        if os.path.exists(filename):
+        try:
             image = load_and_scale(filename)
-            anim.append((image, delay))
+        except IOError:
+            continue
+        anim.append((image, delay))
 
     tech = pyganim.PygAnimation(anim, True)
     tech.play()
@@ -229,16 +463,18 @@ def load_frames_files(directory, name):
 
     For example, water00.png, water01.png, water03.png
 
+    :param directory: resource folder, relative to the mod folder
     :type directory: str
     :type name: str
 
     :rtype: generator
     """
     scale = prepare.SCALE
-    for animation_frame in os.listdir(directory):
+    for animation_frame in prepare.listdir(directory):
         pattern = name + "\.[0-9].*"
         if re.findall(pattern, animation_frame):
-            frame = pygame.image.load(directory + "/" + animation_frame).convert_alpha()
+            with prepare.open_resource(directory, animation_frame) as fp:
+                frame = pygame.image.load(fp, animation_frame).convert_alpha()
             frame = pygame.transform.scale(frame, (frame.get_width() * scale, frame.get_height() * scale))
             yield frame
 
@@ -361,10 +597,23 @@ def check_parameters(parameters, required=0, exit=True):
 def load_sound(slug):
     """ Load a sound from disk, identified by it's slug in the db
 
+    Sounds are cached, and the same sound is returned each time it is
+    loaded.
+
     :param slug: slug for the file record to load
     :type slug: String
     :rtype: core.platform.mixer.Sound
     """
+    sound = sound_cache.get(slug)
+    if sound is None:
+        sound = asset_loader.wait(("sound", slug))
+    if sound is None:
+        sound = _load_sound(slug)
+        sound_cache.put(slug, sound)
+    return sound
+
+
+def _load_sound(slug):
 
     class DummySound(object):
         def play(self):
@@ -397,6 +646,16 @@ def load_sound(slug):
         return DummySound()
 
 
+def load_sound_async(slug, priority=NORMAL):
+    """ Request a sound to be loaded by `load_sound` in the background
+
+    :param slug: slug for the file record to load
+    :param priority: loader priority
+    :rtype: tuxemon.core.loader.AssetFuture
+    """
+    return asset_loader.submit(("sound", slug), load_sound, slug, priority=priority)
+
+
 def get_avatar(game, avatar):
     """Gets the avatar sprite of a monster or NPC.
 
@@ -473,34 +732,78 @@ def trunc(l):
     return tuple(int(i) for i in l)
 
 
-def scaled_image_loader(filename, colorkey, **kwargs):
+def load_tileset_image(filename, scale):
+    """ Load and scale a tileset image, without converting it
+
+    The image is only decoded, so this can be called on a loader thread,
+    and the tiles are converted by `scaled_image_loader` when a map is
+    loaded on the main thread.  The image is kept in the surface cache.
+
+    :param filename: path of the tileset image
+    :param scale: scale factor
+    :rtype: pygame.Surface
+    """
+    key = filename, scale, "tileset"
+    image = surface_cache.get(key)
+    if image is None:
+        with prepare.open_resource(filename) as fp:
+            data = fp.read()
+        image = pygame.image.load(io.BytesIO(data), filename)
+
+        # scale the tileset image to match game scale
+        if scale != 1:
+            scaled_size = [i * scale for i in image.get_size()]
+            image = pygame.transform.scale(image, scaled_size)
+        surface_cache.put(key, image)
+    return image
+
+
+def scaled_image_loader(filename, colorkey, scale=None, **kwargs):
     """ pytmx image loader for pygame
 
     Modified to load images at a scaled size
 
+    Tilesets are shared by many maps, so the scaled tileset image and
+    the tiles are kept in the surface cache, and reused by every map
+    which uses the tileset.  Tileset images are read with
+    `prepare.open_resource`, so they can be in asset packs.
+
     :param filename:
     :param colorkey:
+    :param scale: scale factor; defaults to prepare.SCALE
     :param kwargs:
     :return:
     """
     from pytmx.util_pygame import smart_convert, handle_transformation
 
+    if scale is None:
+        scale = prepare.SCALE
+
     if colorkey:
         colorkey = pygame.Color('#{0}'.format(colorkey))
 
     pixelalpha = kwargs.get('pixelalpha', True)
+    colorkey_key = tuple(colorkey) if colorkey else None
 
-    # load the tileset image
-    image = pygame.image.load(filename)
+    # the tileset image is only loaded if a tile is not cached
+    sheet = []
 
-    # scale the tileset image to match game scale
-    scaled_size = scale_sequence(image.get_size())
-    image = pygame.transform.scale(image, scaled_size)
+    def get_sheet():
+        if not sheet:
+            sheet.append(load_tileset_image(filename, scale))
+        return sheet[0]
 
     def load_image(rect=None, flags=None):
+        key = (filename, scale, "tile", colorkey_key, pixelalpha,
+               tuple(rect) if rect else None, tuple(flags) if flags else None)
+        tile = surface_cache.get(key)
+        if tile is not None:
+            return tile
+
+        image = get_sheet()
         if rect:
             # scale the rect to match the scaled image
-            rect = scale_rect(rect)
+            rect = scale_rect(rect, scale)
             try:
                 tile = image.subsurface(rect)
             except ValueError:
@@ -513,10 +816,12 @@ def scaled_image_loader(filename, colorkey, **kwargs):
             tile = handle_transformation(tile, flags)
 
         tile = smart_convert(tile, colorkey, pixelalpha)
+        surface_cache.put(key, tile)
         return tile
 
     return load_image
 
+
 def number_or_variable(game, value):
     """ Returns a numeric game variable by its name
     If value is already a number, convert from string to float and return that
@@ -0,0 +1,362 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.vector Small vectors for tile positions, velocities and directions.
+#
+"""2D and 3D vectors, used like the euclid vectors of the same names.
+
+euclid is a general purpose module; its vectors check their arguments
+with asserts, look up unknown attributes for swizzling, and its points
+keep a `__dict__`.  These vectors only have what the engine uses:
+
+* arithmetic with vectors, points, tuples and scalars, and the in-place
+  versions, which do not allocate
+* comparison with vectors and tuples
+* indexing, iteration and unpacking, so `tuple(v)` and `x, y = v` work
+* magnitude, normalize and dot
+
+Like euclid, adding a vector to a point makes a point, and multiplying
+makes a vector.  Vectors are mutable, so they cannot be hashed; use
+`tuple(v)` for dict keys.
+
+`python scripts/benchmark_vectors.py` compares them with euclid.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import math
+
+
+class Vector2(object):
+    __slots__ = ("x", "y")
+    __hash__ = None
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+    def __copy__(self):
+        return self.__class__(self.x, self.y)
+
+    copy = __copy__
+
+    def __reduce__(self):
+        return self.__class__, (self.x, self.y)
+
+    def __repr__(self):
+        return "Vector2(%.2f, %.2f)" % (self.x, self.y)
+
+    def __eq__(self, other):
+        if isinstance(other, Vector2):
+            return self.x == other.x and self.y == other.y
+        try:
+            x, y = other
+        except (TypeError, ValueError):
+            return False
+        return self.x == x and self.y == y
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __bool__(self):
+        return self.x != 0 or self.y != 0
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, key):
+        return (self.x, self.y)[key]
+
+    def __setitem__(self, key, value):
+        values = [self.x, self.y]
+        values[key] = value
+        self.x, self.y = values
+
+    def __iter__(self):
+        return iter((self.x, self.y))
+
+    def __add__(self, other):
+        if isinstance(other, Vector2):
+            # Vector + Vector -> Vector
+            # Vector + Point -> Point
+            # Point + Point -> Vector
+            cls = Vector2 if self.__class__ is other.__class__ else Point2
+            return cls(self.x + other.x, self.y + other.y)
+        return self.__class__(self.x + other[0], self.y + other[1])
+
+    __radd__ = __add__
+
+    def __iadd__(self, other):
+        if isinstance(other, Vector2):
+            self.x += other.x
+            self.y += other.y
+        else:
+            self.x += other[0]
+            self.y += other[1]
+        return self
+
+    def __sub__(self, other):
+        if isinstance(other, Vector2):
+            cls = Vector2 if self.__class__ is other.__class__ else Point2
+            return cls(self.x - other.x, self.y - other.y)
+        return self.__class__(self.x - other[0], self.y - other[1])
+
+    def __rsub__(self, other):
+        return self.__class__(other[0] - self.x, other[1] - self.y)
+
+    def __isub__(self, other):
+        if isinstance(other, Vector2):
+            self.x -= other.x
+            self.y -= other.y
+        else:
+            self.x -= other[0]
+            self.y -= other[1]
+        return self
+
+    def __mul__(self, other):
+        return Vector2(self.x * other, self.y * other)
+
+    __rmul__ = __mul__
+
+    def __imul__(self, other):
+        self.x *= other
+        self.y *= other
+        return self
+
+    def __truediv__(self, other):
+        return Vector2(self.x / other, self.y / other)
+
+    __div__ = __truediv__
+
+    def __itruediv__(self, other):
+        self.x /= other
+        self.y /= other
+        return self
+
+    __idiv__ = __itruediv__
+
+    def __floordiv__(self, other):
+        return Vector2(self.x // other, self.y // other)
+
+    def __neg__(self):
+        return Vector2(-self.x, -self.y)
+
+    __pos__ = __copy__
+
+    def __abs__(self):
+        return math.hypot(self.x, self.y)
+
+    magnitude = __abs__
+
+    def magnitude_squared(self):
+        return self.x * self.x + self.y * self.y
+
+    def normalize(self):
+        d = self.magnitude()
+        if d:
+            self.x /= d
+            self.y /= d
+        return self
+
+    def normalized(self):
+        d = self.magnitude()
+        if d:
+            return Vector2(self.x / d, self.y / d)
+        return self.copy()
+
+    def dot(self, other):
+        return self.x * other[0] + self.y * other[1]
+
+
+class Point2(Vector2):
+    __slots__ = ()
+
+    def __repr__(self):
+        return "Point2(%.2f, %.2f)" % (self.x, self.y)
+
+
+class Vector3(object):
+    __slots__ = ("x", "y", "z")
+    __hash__ = None
+
+    def __init__(self, x=0, y=0, z=0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __copy__(self):
+        return self.__class__(self.x, self.y, self.z)
+
+    copy = __copy__
+
+    def __reduce__(self):
+        return self.__class__, (self.x, self.y, self.z)
+
+    def __repr__(self):
+        return "Vector3(%.2f, %.2f, %.2f)" % (self.x, self.y, self.z)
+
+    def __eq__(self, other):
+        if isinstance(other, Vector3):
+            return self.x == other.x and self.y == other.y and self.z == other.z
+        try:
+            x, y, z = other
+        except (TypeError, ValueError):
+            return False
+        return self.x == x and self.y == y and self.z == z
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __bool__(self):
+        return self.x != 0 or self.y != 0 or self.z != 0
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, key):
+        return (self.x, self.y, self.z)[key]
+
+    def __setitem__(self, key, value):
+        values = [self.x, self.y, self.z]
+        values[key] = value
+        self.x, self.y, self.z = values
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.z))
+
+    def __add__(self, other):
+        if isinstance(other, Vector3):
+            cls = Vector3 if self.__class__ is other.__class__ else Point3
+            return cls(self.x + other.x, self.y + other.y, self.z + other.z)
+        return self.__class__(self.x + other[0], self.y + other[1], self.z + other[2])
+
+    __radd__ = __add__
+
+    def __iadd__(self, other):
+        if isinstance(other, Vector3):
+            self.x += other.x
+            self.y += other.y
+            self.z += other.z
+        else:
+            self.x += other[0]
+            self.y += other[1]
+            self.z += other[2]
+        return self
+
+    def __sub__(self, other):
+        if isinstance(other, Vector3):
+            cls = Vector3 if self.__class__ is other.__class__ else Point3
+            return cls(self.x - other.x, self.y - other.y, self.z - other.z)
+        return self.__class__(self.x - other[0], self.y - other[1], self.z - other[2])
+
+    def __rsub__(self, other):
+        return self.__class__(other[0] - self.x, other[1] - self.y, other[2] - self.z)
+
+    def __isub__(self, other):
+        if isinstance(other, Vector3):
+            self.x -= other.x
+            self.y -= other.y
+            self.z -= other.z
+        else:
+            self.x -= other[0]
+            self.y -= other[1]
+            self.z -= other[2]
+        return self
+
+    def __mul__(self, other):
+        return Vector3(self.x * other, self.y * other, self.z * other)
+
+    __rmul__ = __mul__
+
+    def __imul__(self, other):
+        self.x *= other
+        self.y *= other
+        self.z *= other
+        return self
+
+    def __truediv__(self, other):
+        return Vector3(self.x / other, self.y / other, self.z / other)
+
+    __div__ = __truediv__
+
+    def __itruediv__(self, other):
+        self.x /= other
+        self.y /= other
+        self.z /= other
+        return self
+
+    __idiv__ = __itruediv__
+
+    def __floordiv__(self, other):
+        return Vector3(self.x // other, self.y // other, self.z // other)
+
+    def __neg__(self):
+        return Vector3(-self.x, -self.y, -self.z)
+
+    __pos__ = __copy__
+
+    def __abs__(self):
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    magnitude = __abs__
+
+    def magnitude_squared(self):
+        return self.x * self.x + self.y * self.y + self.z * self.z
+
+    def normalize(self):
+        d = self.magnitude()
+        if d:
+            self.x /= d
+            self.y /= d
+            self.z /= d
+        return self
+
+    def normalized(self):
+        d = self.magnitude()
+        if d:
+            return Vector3(self.x / d, self.y / d, self.z / d)
+        return self.copy()
+
+    def dot(self, other):
+        return self.x * other[0] + self.y * other[1] + self.z * other[2]
+
+    def cross(self, other):
+        return Vector3(self.y * other[2] - self.z * other[1],
+                       -self.x * other[2] + self.z * other[0],
+                       self.x * other[1] - self.y * other[0])
+
+
+class Point3(Vector3):
+    __slots__ = ()
+
+    def __repr__(self):
+        return "Point3(%.2f, %.2f, %.2f)" % (self.x, self.y, self.z)
@@ -0,0 +1,628 @@
+# -*- coding: utf-8 -*-
+#
+# Tuxemon
+# Copyright (C) 2014, William Edwards <shadowapex@gmail.com>,
+#                     Benjamin Bean <superman2k5@gmail.com>
+#
+# This file is part of Tuxemon.
+#
+# Tuxemon is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Tuxemon is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Tuxemon.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Contributor(s):
+#
+# William Edwards <shadowapex@gmail.com>
+#
+#
+# core.worldmap Stitched worlds, streamed in chunks.
+#
+"""A world is a large map made of many TMX maps, called chunks.
+
+Worlds are Tiled world files, which list the chunk maps and their
+positions in pixels:
+
+    {
+        "type": "world",
+        "maps": [
+            {"fileName": "route1.tmx", "x": 0, "y": 0},
+            {"fileName": "route2.tmx", "x": 640, "y": 0}
+        ]
+    }
+
+A world is used like a map: teleport to "overworld.world" and the player
+walks between chunks without a loading screen.  Only the chunks near the
+player are loaded.  Chunks are loaded in the background as the player
+walks towards them, and unloaded when the player is far away, so the
+memory used does not depend on the size of the world.  NPCs created by
+the events of a chunk are removed when it is unloaded, and the inits of
+a chunk run each time it is loaded, like the inits of a map.
+
+Chunks must use the same tile size.  Positions in the world are tiles
+from the top left chunk.  Events of chunks are moved to world positions,
+along with the positions of `position_parameters` actions.  Tiles of
+chunks which are not loaded, and tiles between chunks, cannot be entered.
+
+sample_world.world in the tuxemon mod is a small world of four chunks.
+`python scripts/check_world.py` walks across it without a window.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import itertools
+import json
+import logging
+import math
+import os
+import xml.etree.ElementTree as ElementTree
+
+import pygame
+import pyscroll
+
+from tuxemon.core import prepare
+from tuxemon.core.collision import COLLISION, CollisionGrid, CollisionLines
+from tuxemon.core.loader import asset_loader, HIGH, NORMAL
+from tuxemon.core.map import Map, get_optional_int, get_renderer_byte_size
+
+logger = logging.getLogger(__name__)
+
+WORLD_EXTENSION = ".world"
+
+# size of the cells used to find the chunk of a tile, in tiles
+CELL_SIZE = 32
+
+# actions with tile positions in their parameters => index of x and y
+position_parameters = {
+    "create_npc": (1, 2),
+    "pathfind": (1, 2),
+    "play_map_animation": (3, 4),
+}
+
+
+def is_world(filename):
+    """ Return True if a file is a world, not a single map
+
+    :param filename: path of the map or world
+    :rtype: bool
+    """
+    return filename.lower().endswith(WORLD_EXTENSION)
+
+
+def read_map_header(filename):
+    """ Return the size and properties of a TMX map, without reading all of it
+
+    :param filename: path of the TMX file
+    :rtype: tuple
+    :returns: (width, height) in tiles; (width, height) of tiles in pixels; dict of properties
+    """
+    properties = dict()
+    root = None
+    for event, element in ElementTree.iterparse(filename, events=("start",)):
+        if root is None:
+            root = element
+        elif element.tag == "property":
+            properties[element.get("name")] = element.get("value")
+        elif element.tag != "properties":
+            # map properties are before the tilesets and layers
+            break
+
+    size = int(root.get("width")), int(root.get("height"))
+    tile_size = int(root.get("tilewidth")), int(root.get("tileheight"))
+    return size, tile_size, properties
+
+
+def read_world(filename):
+    """ Return the chunk maps of a world file and their positions
+
+    :param filename: path of the world file
+    :rtype: list
+    :returns: list of (path of the TMX file, (x, y) in pixels)
+    """
+    with open(filename) as fp:
+        data = json.load(fp)
+
+    if data.get("patterns"):
+        logger.warning("world patterns are not supported: {}".format(filename))
+
+    folder = os.path.dirname(filename)
+    return [
+        (os.path.normpath(os.path.join(folder, i["fileName"])), (int(i["x"]), int(i["y"])))
+        for i in data.get("maps", ())
+    ]
+
+
+def get_created_npcs(event_objects):
+    """ Return the slugs of the NPCs created by events
+
+    :param list event_objects: EventObjects
+    :rtype: set
+    """
+    return {
+        action.parameters[0]
+        for event_object in event_objects
+        for action in event_object.acts
+        if action.type == "create_npc" and action.parameters
+    }
+
+
+def offset_events(event_objects, chunk_name, offset):
+    """ Return copies of event objects, moved to world positions
+
+    Event ids are prefixed with the chunk name, so events of different
+    chunks do not share ids.
+
+    :param list event_objects: EventObjects of a chunk
+    :param chunk_name: name of the chunk
+    :param offset: (x, y) position of the chunk in the world, in tiles
+    :rtype: list
+    """
+    ox, oy = offset
+
+    def move_action(action):
+        indexes = position_parameters.get(action.type)
+        if not indexes:
+            return action
+        parameters = list(action.parameters)
+        for index, delta in zip(indexes, offset):
+            try:
+                parameters[index] = str(int(parameters[index]) + delta)
+            except (IndexError, ValueError):
+                # optional or not a position, such as "player"
+                pass
+        return action._replace(parameters=parameters)
+
+    return [
+        eo._replace(
+            id="{}:{}".format(chunk_name, eo.id),
+            x=eo.x + ox,
+            y=eo.y + oy,
+            conds=[c._replace(x=c.x + ox, y=c.y + oy) for c in eo.conds],
+            acts=[move_action(a) for a in eo.acts],
+        )
+        for eo in event_objects
+    ]
+
+
+class Chunk(object):
+    """ One map of a world
+
+    """
+
+    def __init__(self, filename, rect):
+        """
+        :param filename: path of the TMX file
+        :param pygame.Rect rect: position and size of the chunk in the world, in tiles
+        """
+        self.filename = filename
+        self.name = os.path.splitext(os.path.basename(filename))[0]
+        self.rect = rect
+        self.map = None
+        self.future = None
+        self.failed = False
+        self.events = []
+        self.inits = []
+        self.interacts = []
+
+        # NPCs created by the events of the chunk, removed when it is unloaded
+        self.npc_slugs = set()
+
+    @property
+    def key(self):
+        return "chunk", self.filename
+
+
+class WorldCollisionGrid(CollisionGrid):
+    """ Collision grid of a world; reads the grids of the loaded chunks
+
+    Tiles which are not in a loaded chunk are collisions.  Iterating only
+    returns tiles of loaded chunks.
+    """
+
+    def __init__(self, world):
+        """
+        :param WorldMap world: world of the grid
+        """
+        self.world = world
+        self.width, self.height = world.size
+        self.tiles = None
+        self.lines = CollisionLines(self)
+
+    def index(self, position):
+        return None
+
+    def get_flags(self, position):
+        x, y = int(position[0]), int(position[1])
+        chunk = self.world.get_chunk(x, y)
+        if chunk is None or chunk.map is None:
+            return COLLISION
+        return chunk.map.collision_map.get_flags((x - chunk.rect.x, y - chunk.rect.y))
+
+    def add_flags(self, position, flags):
+        x, y = int(position[0]), int(position[1])
+        chunk = self.world.get_chunk(x, y)
+        if chunk is not None and chunk.map is not None:
+            chunk.map.collision_map.add_flags((x - chunk.rect.x, y - chunk.rect.y), flags)
+            self.version += 1
+
+    def iter_flags(self):
+        for chunk in self.world.loaded_chunks():
+            ox, oy = chunk.rect.topleft
+            for (x, y), tile in chunk.map.collision_map.iter_flags():
+                yield (x + ox, y + oy), tile
+
+
+class WorldMapData(pyscroll.data.PyscrollDataAdapter):
+    """ pyscroll data source for worlds; draws the loaded chunks
+
+    """
+
+    def __init__(self, world):
+        """
+        :param WorldMap world: world to draw
+        """
+        super(WorldMapData, self).__init__()
+        self.world = world
+        self._layers = set()
+        self._queued_chunks = list()
+        self.reload_animations()
+
+    def add_layers(self, layers):
+        """ Add the tile layers of a chunk
+
+        Layers are never removed, so the layers do not change when
+        chunks are unloaded.
+
+        :param layers: layer numbers
+        :rtype: None
+        """
+        self._layers.update(layers)
+
+    def queue_chunk(self, chunk):
+        """ Queue the tiles of a loaded chunk to be drawn
+
+        The renderer only draws tiles when they scroll into view, so the
+        tiles of chunks which are loaded while in view are returned with
+        the animated tiles of the next frame.
+
+        :param Chunk chunk: loaded chunk
+        :rtype: None
+        """
+        self._queued_chunks.append(chunk)
+
+    def reload_data(self):
+        pass
+
+    def reload_animations(self):
+        super(WorldMapData, self).reload_animations()
+        for chunk in self.world.loaded_chunks():
+            chunk.map.data.reload_animations()
+
+    def get_animations(self):
+        return iter(())
+
+    def convert_surfaces(self, parent, alpha=False):
+        pass
+
+    @property
+    def tile_size(self):
+        return self.world.render_tile_size
+
+    @property
+    def map_size(self):
+        return self.world.size
+
+    @property
+    def visible_tile_layers(self):
+        return sorted(self._layers) or [self.world.sprite_layer]
+
+    @property
+    def visible_object_layers(self):
+        return iter(())
+
+    def process_animation_queue(self, tile_view):
+        new_tiles = list()
+        if self._queued_chunks:
+            chunks, self._queued_chunks = self._queued_chunks, list()
+            view = pygame.Rect(tile_view)
+            for chunk in chunks:
+                if chunk.map is not None and chunk.rect.colliderect(view):
+                    new_tiles.extend(self.get_tile_images_by_rect(chunk.rect.clip(view)))
+
+        for chunk in self.world.loaded_chunks():
+            if not chunk.rect.colliderect(tile_view):
+                continue
+            ox, oy = chunk.rect.topleft
+            view = pygame.Rect(tile_view).move(-ox, -oy)
+            # returns None when there are no animations
+            for x, y, l, image in chunk.map.data.process_animation_queue(view) or ():
+                new_tiles.append((x + ox, y + oy, l, image))
+        return new_tiles
+
+    def _get_tile_image(self, x, y, l):
+        chunk = self.world.get_chunk(x, y)
+        if chunk is None or chunk.map is None:
+            return None
+        return chunk.map.data.get_tile_image(x - chunk.rect.x, y - chunk.rect.y, l)
+
+    def get_tile_images_by_rect(self, rect):
+        view = pygame.Rect(rect)
+        for chunk in self.world.loaded_chunks():
+            clipped = chunk.rect.clip(view)
+            if not clipped.width or not clipped.height:
+                continue
+            ox, oy = chunk.rect.topleft
+            for x, y, l, image in chunk.map.data.get_tile_images_by_rect(clipped.move(-ox, -oy)):
+                yield x + ox, y + oy, l, image
+
+
+class WorldMap(object):
+    """ A world made of chunk maps, which are streamed around the player
+
+    Has the same attributes as `Map`, so it can be used as the current map.
+    Call `update` every frame with the position of the player to stream
+    the chunks.
+    """
+
+    def __init__(self, filename, create_renderer=True):
+        """
+        :param filename: path of the world file
+        :param create_renderer: If False, the renderer is not created.
+        """
+        self.filename = filename
+        self.edges = "stitched"
+        self.chunks = []
+        self.events = []
+        self.inits = []
+        self.interacts = []
+        self._cells = dict()
+        self._last_chunk = None
+        self._position = None
+
+        self.load(filename)
+
+        self.data = WorldMapData(self)
+        self.collision_map = WorldCollisionGrid(self)
+        self.collision_lines_map = self.collision_map.lines
+        self.renderer = None
+        if create_renderer:
+            self.renderer = self.initialize_renderer()
+
+    def load(self, filename):
+        """ Read the world file and the sizes of its chunks
+
+        Chunks are not loaded until `update` is called.
+
+        :param filename: path of the world file
+        :rtype: None
+        """
+        maps = read_world(filename)
+        if not maps:
+            raise ValueError("world has no maps: {}".format(filename))
+
+        scale = prepare.SCALE if prepare.CONFIG.scaling else 1
+        headers = [(path, position) + read_map_header(path) for path, position in maps]
+
+        path, position, size, self.tile_size, properties = headers[0]
+        self.render_tile_size = self.tile_size[0] * scale, self.tile_size[1] * scale
+        self.sprite_layer = int(properties.get("sprite_layer", 2))
+        self.lod_rate = get_optional_int(properties, "lod_rate")
+        self.lod_margin = get_optional_int(properties, "lod_margin")
+
+        tw, th = self.tile_size
+        rects = list()
+        for path, position, size, tile_size, properties in headers:
+            if tuple(tile_size) != tuple(self.tile_size):
+                raise ValueError("chunks of a world must have the same tile size: {}".format(path))
+            rects.append((path, pygame.Rect(position[0] // tw, position[1] // th, size[0], size[1])))
+
+        # tile positions must not be negative
+        left = min(rect.left for path, rect in rects)
+        top = min(rect.top for path, rect in rects)
+        for path, rect in rects:
+            self.add_chunk(Chunk(path, rect.move(-left, -top)))
+
+        self.size = (max(chunk.rect.right for chunk in self.chunks),
+                     max(chunk.rect.bottom for chunk in self.chunks))
+
+    def add_chunk(self, chunk):
+        """ Add a chunk to the world and index it by the cells it covers
+
+        :param Chunk chunk: chunk to add
+        :rtype: None
+        """
+        self.chunks.append(chunk)
+        rect = chunk.rect
+        for cx in range(rect.left // CELL_SIZE, (rect.right - 1) // CELL_SIZE + 1):
+            for cy in range(rect.top // CELL_SIZE, (rect.bottom - 1) // CELL_SIZE + 1):
+                self._cells.setdefault((cx, cy), []).append(chunk)
+
+    def get_chunk(self, x, y):
+        """ Return the chunk which contains a tile, or None
+
+        :param int x: x position of the tile
+        :param int y: y position of the tile
+        :rtype: Chunk or None
+        """
+        chunk = self._last_chunk
+        if chunk is not None and chunk.rect.collidepoint(x, y):
+            return chunk
+        for chunk in self._cells.get((x // CELL_SIZE, y // CELL_SIZE), ()):
+            if chunk.rect.collidepoint(x, y):
+                self._last_chunk = chunk
+                return chunk
+        return None
+
+    def loaded_chunks(self):
+        """ Return the chunks which are loaded
+
+        :rtype: list
+        """
+        return [chunk for chunk in self.chunks if chunk.map is not None]
+
+    def get_areas(self, position):
+        """ Return the areas where chunks are loaded, and where they are kept
+
+        :param position: (x, y) of the player, in tiles
+        :rtype: tuple
+        :returns: (load area, unload area) as pygame.Rects in tiles
+        """
+        tw, th = self.render_tile_size
+        width = int(math.ceil(prepare.SCREEN_SIZE[0] / tw))
+        height = int(math.ceil(prepare.SCREEN_SIZE[1] / th))
+        view = pygame.Rect(0, 0, width, height)
+        view.center = position
+        load_distance = prepare.CONFIG.chunk_load_distance
+        unload_distance = max(prepare.CONFIG.chunk_unload_distance, load_distance)
+        return (view.inflate(load_distance * 2, load_distance * 2),
+                view.inflate(unload_distance * 2, unload_distance * 2))
+
+    def update(self, position):
+        """ Load the chunks near a position, and unload the ones far from it
+
+        Chunks are loaded in the background.  The chunk at the position is
+        loaded immediately, if it is not loaded yet.
+
+        :param position: (x, y) of the player, in tiles
+        :rtype: tuple
+        :returns: (chunks which were loaded, chunks which were unloaded) since the last update
+        """
+        x, y = int(position[0]), int(position[1])
+        loading = [chunk for chunk in self.chunks if chunk.future is not None]
+        if (x, y) == self._position and not loading:
+            return [], []
+        self._position = x, y
+
+        load_area, unload_area = self.get_areas((x, y))
+        current = self.get_chunk(x, y)
+        detached = list()
+        for chunk in self.chunks:
+            if chunk.rect.colliderect(load_area):
+                if chunk.map is None and chunk.future is None and not chunk.failed:
+                    priority = HIGH if chunk is current else NORMAL
+                    chunk.future = asset_loader.submit(chunk.key, Map, chunk.filename, False,
+                                                       priority=priority)
+            elif not chunk.rect.colliderect(unload_area):
+                if chunk.map is not None:
+                    self.detach(chunk)
+                    detached.append(chunk)
+                elif chunk.future is not None:
+                    self.detach(chunk)
+
+        # never let the player walk into a chunk which is not loaded
+        if current is not None and current.future is not None:
+            asset_loader.wait(current.key)
+
+        attached = list()
+        for chunk in self.chunks:
+            if chunk.future is not None and chunk.future.done():
+                future, chunk.future = chunk.future, None
+                if future.exception() is not None:
+                    logger.error("cannot load chunk {} of {}".format(chunk.filename, self.filename))
+                    chunk.failed = True
+                    continue
+                self.attach(chunk, future.result())
+                attached.append(chunk)
+
+        if detached or attached:
+            self.update_events()
+
+        return attached, detached
+
+    def attach(self, chunk, map_data):
+        """ Add a loaded chunk map to the world
+
+        :param Chunk chunk: chunk of the map
+        :param Map map_data: map of the chunk, without a renderer
+        :rtype: None
+        """
+        logger.debug("attaching chunk {}".format(chunk.filename))
+        # chunks are loaded on a loader thread, and converted here
+        map_data.load_images()
+        offset = chunk.rect.topleft
+        chunk.map = map_data
+        chunk.events = offset_events(map_data.events, chunk.name, offset)
+        chunk.interacts = offset_events(map_data.interacts, chunk.name, offset)
+        chunk.inits = offset_events(map_data.inits, chunk.name, offset)
+        chunk.npc_slugs = get_created_npcs(map_data.inits + map_data.events + map_data.interacts)
+        self.data.add_layers(map_data.data.visible_tile_layers)
+        self.data.queue_chunk(chunk)
+        self.collision_map.version += 1
+
+    def detach(self, chunk):
+        """ Unload a chunk, or cancel loading it
+
+        :param Chunk chunk: chunk to unload
+        :rtype: None
+        """
+        logger.debug("detaching chunk {}".format(chunk.filename))
+        chunk.map = None
+        chunk.future = None
+        chunk.events = []
+        chunk.inits = []
+        chunk.interacts = []
+        if self._last_chunk is chunk:
+            self._last_chunk = None
+        self.collision_map.version += 1
+
+    def reset(self):
+        """ Unload all chunks
+
+        Use this when the player enters the world.
+
+        :rtype: None
+        """
+        for chunk in self.chunks:
+            self.detach(chunk)
+        self._position = None
+        self.update_events()
+
+    def update_events(self):
+        """ Collect the events of the loaded chunks
+
+        :rtype: None
+        """
+        chunks = self.loaded_chunks()
+        self.events = list(itertools.chain.from_iterable(chunk.events for chunk in chunks))
+        self.inits = list(itertools.chain.from_iterable(chunk.inits for chunk in chunks))
+        self.interacts = list(itertools.chain.from_iterable(chunk.interacts for chunk in chunks))
+
+    def get_byte_size(self):
+        """ Return an estimate of the memory used by the loaded chunks and the renderer
+
+        :rtype: int
+        """
+        size = sum(chunk.map.get_byte_size() for chunk in self.loaded_chunks())
+        return size + get_renderer_byte_size(self.renderer)
+
+    def load_images(self):
+        """ Does nothing; the images of chunks are loaded when they are attached
+
+        :rtype: None
+        """
+        pass
+
+    def loadfile(self):
+        """ Returns the collision data of the world and its size
+
+        :rtype: Tuple
+        :returns: collision grid; collision lines; the world size.
+        """
+        return self.collision_map, self.collision_lines_map, self.size
+
+    def initialize_renderer(self):
+        """ Initialize the renderer for the world and sprites
+
+        :rtype: pyscroll.BufferedRenderer
+        """
+        return pyscroll.BufferedRenderer(self.data, prepare.SCREEN_SIZE, clamp_camera=True, tall_sprites=2)